@@ -25,6 +25,8 @@ import os
 import boto3
 import uuid
 from boto3.dynamodb.conditions import Key, Attr
+import dynamodb_scan
+import item_changes
 
 application = os.environ['application']
 environment = os.environ['environment']
@@ -74,6 +76,7 @@ def launch(launchtype, session, headers, endpoint, HOST, project_id, serverlist)
                   existing_attr = servers_table.get_item(Key={'server_id': sid})
                   existing_attr['Item']['migration_status'] = "Test instance launched"
                   resp = servers_table.put_item(Item=existing_attr['Item'])
+                  item_changes.record_change('server', sid, 'update')
                   if AnonymousUsageData == "Yes":
                      usage_data = {"Solution": "SO0097",
                                    "UUID": s_uuid,
@@ -100,6 +103,7 @@ def launch(launchtype, session, headers, endpoint, HOST, project_id, serverlist)
                   existing_attr = servers_table.get_item(Key={'server_id': sid})
                   existing_attr['Item']['migration_status'] = "Cutover instance launched"
                   resp = servers_table.put_item(Item=existing_attr['Item'])
+                  item_changes.record_change('server', sid, 'update')
                   if AnonymousUsageData == "Yes":
                      usage_data = {"Solution": "SO0097",
                                    "UUID": s_uuid,
@@ -122,10 +126,4 @@ def launch(launchtype, session, headers, endpoint, HOST, project_id, serverlist)
 
 # Pagination for server DDB table scan  
 def scan_dynamodb_server_table():
-    response = servers_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key for server is   " + str(response['LastEvaluatedKey']))
-        response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
\ No newline at end of file
+    return dynamodb_scan.scan_table(servers_table)
\ No newline at end of file
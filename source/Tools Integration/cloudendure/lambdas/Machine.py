@@ -26,6 +26,7 @@ import json
 import boto3
 import os
 from boto3.dynamodb.conditions import Key, Attr
+import item_tree
 
 application = os.environ['application']
 environment = os.environ['environment']
@@ -65,27 +66,21 @@ def execute(launchtype, session, headers, endpoint, HOST, projectname, dryrun, w
             machinelist[machine['id']] = machine['sourceProperties']['name']
         print("")
        
-       # Get all Apps and servers from migration factory
+       # Get the apps of the wave and their servers from migration factory
 
-        getserver = scan_dynamodb_server_table()
-        servers = sorted(getserver, key = lambda i: i['server_name'])
-
-        getapp = scan_dynamodb_app_table()
-        apps = sorted(getapp, key = lambda i: i['app_name'])
+        apps = item_tree.get_wave_apps(waveid, apps_table)
 
         # Get App list
         applist = []
         for app in apps:
-            if 'wave_id' in app and 'cloudendure_projectname' in app:
-                if str(app['wave_id']) == str(waveid) and str(app['cloudendure_projectname']) == str(projectname):
+            if 'cloudendure_projectname' in app:
+                if str(app['cloudendure_projectname']) == str(projectname):
                     applist.append(app['app_id'])
         # Get Server List
         serverlist = []
+        app_servers = item_tree.get_app_servers(applist, servers_table)
         for app in applist:
-            for server in servers:
-                if "app_id" in server:
-                    if app == server['app_id']:
-                        serverlist.append(server)
+            serverlist.extend(app_servers[app])
         if len(serverlist) == 0:
             return "ERROR: Serverlist for wave " + waveid + " in Migration Factory is empty...."
 
@@ -118,23 +113,3 @@ def execute(launchtype, session, headers, endpoint, HOST, projectname, dryrun, w
            return r
     except:
         print(sys.exc_info())
-
-# Pagination for server DDB table scan  
-def scan_dynamodb_server_table():
-    response = servers_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key for server is   " + str(response['LastEvaluatedKey']))
-        response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
-
-#Pagination for app DDB table scan  
-def scan_dynamodb_app_table():
-    response = apps_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key for app is   " + str(response['LastEvaluatedKey']))
-        response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
\ No newline at end of file
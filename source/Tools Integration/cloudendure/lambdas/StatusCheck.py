@@ -23,6 +23,7 @@ import json
 import os
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
+import dynamodb_scan
 
 application = os.environ['application']
 environment = os.environ['environment']
@@ -114,20 +115,8 @@ def check(launchtype, session, headers, endpoint, HOST, projectname, waveid):
 
 # Pagination for server DDB table scan  
 def scan_dynamodb_server_table():
-    response = servers_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key for server is   " + str(response['LastEvaluatedKey']))
-        response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
+    return dynamodb_scan.scan_table(servers_table)
 
 # Pagination for app DDB table scan  
 def scan_dynamodb_app_table():
-    response = apps_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key for app is   " + str(response['LastEvaluatedKey']))
-        response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
\ No newline at end of file
+    return dynamodb_scan.scan_table(apps_table)
\ No newline at end of file
@@ -46,6 +46,9 @@ serverendpoint = '/prod/user/server'
 appendpoint = '/prod/user/app'
 waveendpoint = '/prod/user/wave'
 
+# Accept type requesting a compressed response, requests decompresses it transparently.
+compressed_media_type = 'application/vnd.cmf.compressed+json'
+
 credentials_store = {}
 
 with open('FactoryEndpoints.json') as json_file:
@@ -349,45 +352,44 @@ def getCredentials(secret_name):
         print("No secret specified. Returning blank username and password")
         return {'username': '', 'password': ''}
 
+def get_wave_tree(waveid, token, UserHOST):
+    # Get the apps of the wave, each with its servers, from migration factory
+    auth = {"Authorization": token, "Accept": compressed_media_type}
+    response = requests.get(UserHOST + waveendpoint + '/' + str(waveid) + '/tree', headers=auth)
+    if response.status_code != 200:
+        print("ERROR: Unable to get the apps and servers of wave " + str(waveid) + ": " + response.text)
+        sys.exit(1)
+    return json.loads(response.text)['apps']
+
 def ServerList(waveid, token, UserHOST, Projectname):
-    # Get all Apps and servers from migration factory
-    auth = {"Authorization": token}
-    servers = json.loads(requests.get(UserHOST + serverendpoint, headers=auth).text)
-    #print(servers)
-    apps = json.loads(requests.get(UserHOST + appendpoint, headers=auth).text)
-    #print(apps)
+    apps = get_wave_tree(waveid, token, UserHOST)
 
     # Get App list
     applist = []
     for app in apps:
-        if 'wave_id' in app:
-            if str(app['wave_id']) == str(waveid):
-                if Projectname != "":
-                    if str(app['cloudendure_projectname']) == str(Projectname):
-                        applist.append(app['app_id'])
-                else:
-                    applist.append(app['app_id'])
+        if Projectname != "":
+            if str(app['cloudendure_projectname']) == str(Projectname):
+                applist.append(app)
+        else:
+            applist.append(app)
 
-    #print(apps)
-    #print(servers)
     # Get Server List
     servers_Windows = []
     servers_Linux = []
     for app in applist:
-        for server in servers:
-            if app == server['app_id']:
-                if 'server_os_family' in server:
-                    if 'server_fqdn' in server:
-                        if server['server_os_family'].lower() == "windows":
-                            servers_Windows.append(server)
-                        if server['server_os_family'].lower() == "linux":
-                            servers_Linux.append(server)
-                    else:
-                        print("ERROR: server_fqdn for server: " + server['server_name'] + " doesn't exist")
-                        sys.exit(4)
+        for server in app['servers']:
+            if 'server_os_family' in server:
+                if 'server_fqdn' in server:
+                    if server['server_os_family'].lower() == "windows":
+                        servers_Windows.append(server)
+                    if server['server_os_family'].lower() == "linux":
+                        servers_Linux.append(server)
                 else:
-                    print ('server_os_family attribute does not exist for server: ' + server['server_name'] + ", please update this attribute")
-                    sys.exit(2)
+                    print("ERROR: server_fqdn for server: " + server['server_name'] + " doesn't exist")
+                    sys.exit(4)
+            else:
+                print ('server_os_family attribute does not exist for server: ' + server['server_name'] + ", please update this attribute")
+                sys.exit(2)
     if len(servers_Windows) == 0 and len(servers_Linux) == 0:
         print("ERROR: Serverlist for wave: " + waveid + " in CE Project " + Projectname + " is empty....")
         print("")
@@ -498,35 +500,27 @@ def get_factory_servers(waveid, token, UserHOST, osSplit = True, rtype = None):
     try:
         linux_exist = False
         windows_exist = False
-        auth = {"Authorization": token}
-        # Get all Apps and servers from migration factory
-        getservers = json.loads(requests.get(UserHOST + serverendpoint, headers=auth).text)
-        #print(servers)
-        getapps = json.loads(requests.get(UserHOST + appendpoint, headers=auth).text)
-        #print(apps)
-        servers = sorted(getservers, key = lambda i: i['server_name'])
-        apps = sorted(getapps, key = lambda i: i['app_name'])
+        apps = get_wave_tree(waveid, token, UserHOST)
 
         # Get Unique target AWS account and region
         aws_accounts = []
         for app in apps:
-            if 'wave_id' in app and 'aws_accountid' in app and 'aws_region' in app:
-                if str(app['wave_id']) == str(waveid):
-                    if len(str(app['aws_accountid']).strip()) == 12:
-                        target_account = {}
-                        target_account['aws_accountid'] = str(app['aws_accountid']).strip()
-                        target_account['aws_region'] = app['aws_region'].lower().strip()
-                        if osSplit:
-                            target_account['servers_windows'] = []
-                            target_account['servers_linux'] = []
-                        else:
-                            target_account['servers'] = []
-                        if target_account not in aws_accounts:
-                            aws_accounts.append(target_account)
+            if 'aws_accountid' in app and 'aws_region' in app:
+                if len(str(app['aws_accountid']).strip()) == 12:
+                    target_account = {}
+                    target_account['aws_accountid'] = str(app['aws_accountid']).strip()
+                    target_account['aws_region'] = app['aws_region'].lower().strip()
+                    if osSplit:
+                        target_account['servers_windows'] = []
+                        target_account['servers_linux'] = []
                     else:
-                        msg = "ERROR: Incorrect AWS Account Id Length for app: " + app['app_name']
-                        print(msg)
-                        sys.exit()
+                        target_account['servers'] = []
+                    if target_account not in aws_accounts:
+                        aws_accounts.append(target_account)
+                else:
+                    msg = "ERROR: Incorrect AWS Account Id Length for app: " + app['app_name']
+                    print(msg)
+                    sys.exit()
         if len(aws_accounts) == 0:
             msg = "ERROR: Server list for wave " + waveid + " is empty...."
             print(msg)
@@ -536,35 +530,32 @@ def get_factory_servers(waveid, token, UserHOST, osSplit = True, rtype = None):
         for account in aws_accounts:
             print("### Servers in Target Account: " + account['aws_accountid'] + " , region: " + account['aws_region'] + " ###")
             for app in apps:
-                if 'wave_id' in app and 'aws_accountid' in app and 'aws_region' in app:
-                    if str(app['wave_id']) == str(waveid):
-                        if str(app['aws_accountid']).strip() == str(account['aws_accountid']):
-                            if app['aws_region'].lower().strip() == account['aws_region']:
-                                for server in servers:
-                                    if (rtype is None) or ('r_type' in server and server['r_type'] == rtype):
-                                        if 'app_id' in server:
-                                            if server['app_id'] == app['app_id']:
-                                                # verify server_os_family attribute, only accepts Windows or Linux
-                                                if 'server_os_family' in server:
-                                                    # Verify server_fqdn, this is mandatory attribute
-                                                    if 'server_fqdn' in server:
-                                                        if osSplit:
-                                                            if server['server_os_family'].lower() == 'windows':
-                                                                account['servers_windows'].append(server)
-                                                            elif server['server_os_family'].lower() == 'linux':
-                                                                account['servers_linux'].append(server)
-                                                            else:
-                                                                print("ERROR: Invalid server_os_family for: " + server['server_name'] + ", please select either Windows or Linux")
-                                                                sys.exit()
-                                                        else:
-                                                            account['servers'].append(server)
-                                                        print(server['server_fqdn'])
-                                                    else:
-                                                        print("ERROR: server_fqdn for server: " + server['server_name'] + " doesn't exist")
-                                                        sys.exit()
+                if 'aws_accountid' in app and 'aws_region' in app:
+                    if str(app['aws_accountid']).strip() == str(account['aws_accountid']):
+                        if app['aws_region'].lower().strip() == account['aws_region']:
+                            for server in app['servers']:
+                                if (rtype is None) or ('r_type' in server and server['r_type'] == rtype):
+                                    # verify server_os_family attribute, only accepts Windows or Linux
+                                    if 'server_os_family' in server:
+                                        # Verify server_fqdn, this is mandatory attribute
+                                        if 'server_fqdn' in server:
+                                            if osSplit:
+                                                if server['server_os_family'].lower() == 'windows':
+                                                    account['servers_windows'].append(server)
+                                                elif server['server_os_family'].lower() == 'linux':
+                                                    account['servers_linux'].append(server)
                                                 else:
-                                                    print("ERROR: server_os_family does not exist for: " + server['server_name'])
+                                                    print("ERROR: Invalid server_os_family for: " + server['server_name'] + ", please select either Windows or Linux")
                                                     sys.exit()
+                                            else:
+                                                account['servers'].append(server)
+                                            print(server['server_fqdn'])
+                                        else:
+                                            print("ERROR: server_fqdn for server: " + server['server_name'] + " doesn't exist")
+                                            sys.exit()
+                                    else:
+                                        print("ERROR: server_os_family does not exist for: " + server['server_name'])
+                                        sys.exit()
             print("")
             if osSplit:
                 # Check if the server list is empty for both Windows and Linux
@@ -28,6 +28,7 @@ import logging
 import multiprocessing
 from botocore import config
 from policy import MFAuth
+import item_tree
 
 log = logging.getLogger()
 log.setLevel(logging.INFO)
@@ -58,26 +59,6 @@ apps_table_name = '{}-{}-apps'.format(application, environment)
 servers_table = boto3.resource('dynamodb').Table(servers_table_name)
 apps_table = boto3.resource('dynamodb').Table(apps_table_name)
 
-# Pagination for server DynamoDB table scan
-def scan_dynamodb_server_table():
-    response = servers_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        log.info("Last Evaluate key for server is   " + str(response['LastEvaluatedKey']))
-        response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
-
-#Pagination for app DynamoDB table scan
-def scan_dynamodb_app_table():
-    response = apps_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        log.info("Last Evaluate key for app is   " + str(response['LastEvaluatedKey']))
-        response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return(scan_data)
-
 #Pagination for describe MGN source servers
 def get_mgn_source_servers(mgn_client_base):
     token = None
@@ -130,11 +111,8 @@ def get_session(creds, region):
 
 def get_factory_servers(waveid, accountid, appidlist):
     try:
-        # Get all Apps and servers from migration factory
-        getserver = scan_dynamodb_server_table()
-        servers = sorted(getserver, key = lambda i: i['server_name'])
-        getapp = scan_dynamodb_app_table()
-        apps = sorted(getapp, key = lambda i: i['app_name'])
+        # Get the apps of the wave, each with its servers, from migration factory
+        apps = item_tree.get_wave_tree(waveid, apps_table, servers_table)
         if accountid == '' and len(appidlist) == 0:
             msg = "ERROR: Either AWS Account Id or Application Id List must be provided"
             log.error(msg)
@@ -143,32 +121,31 @@ def get_factory_servers(waveid, accountid, appidlist):
         # Get Unique target AWS account and region
         aws_accounts = []
         for app in apps:
-            if 'wave_id' in app and 'aws_accountid' in app and 'aws_region' in app:
-                if str(app['wave_id']) == str(waveid):
-                    if len(str(app['aws_accountid']).strip()) == 12 and str(app['aws_accountid']).isdigit():
-                        target_account = {}
-                        target_account['aws_accountid'] = str(app['aws_accountid']).strip()
-                        target_account['aws_region'] = app['aws_region'].lower().strip()
-                        target_account['servers'] = []
-                        # If account Id is all accounts, skip the check
-                        if accountid.strip() == 'All Accounts':
-                            if target_account not in aws_accounts:
-                                aws_accounts.append(target_account)
-                        else:
-                            # Check what parameter is used. If account Id is used, a specific account will be added to the list. If Appidlist is used,
-                            # AWS account Id of that specific app will be added to the list
-                            if accountid != '':
-                                if str(app['aws_accountid']).strip() == str(accountid).strip():
+            if 'aws_accountid' in app and 'aws_region' in app:
+                if len(str(app['aws_accountid']).strip()) == 12 and str(app['aws_accountid']).isdigit():
+                    target_account = {}
+                    target_account['aws_accountid'] = str(app['aws_accountid']).strip()
+                    target_account['aws_region'] = app['aws_region'].lower().strip()
+                    target_account['servers'] = []
+                    # If account Id is all accounts, skip the check
+                    if accountid.strip() == 'All Accounts':
+                        if target_account not in aws_accounts:
+                            aws_accounts.append(target_account)
+                    else:
+                        # Check what parameter is used. If account Id is used, a specific account will be added to the list. If Appidlist is used,
+                        # AWS account Id of that specific app will be added to the list
+                        if accountid != '':
+                            if str(app['aws_accountid']).strip() == str(accountid).strip():
+                                if target_account not in aws_accounts:
+                                    aws_accounts.append(target_account)
+                        elif len(appidlist) > 0:
+                                if app['app_id'] in appidlist:
                                     if target_account not in aws_accounts:
                                         aws_accounts.append(target_account)
-                            elif len(appidlist) > 0:
-                                    if app['app_id'] in appidlist:
-                                        if target_account not in aws_accounts:
-                                            aws_accounts.append(target_account)
-                    else:
-                        msg = "ERROR: Incorrect AWS Account Id for app: " + app['app_name']
-                        log.error(msg)
-                        return msg
+                else:
+                    msg = "ERROR: Incorrect AWS Account Id for app: " + app['app_name']
+                    log.error(msg)
+                    return msg
         if len(aws_accounts) == 0:
             msg = "ERROR: Server list for wave id " + waveid + " is empty...."
             log.error(msg)
@@ -186,14 +163,12 @@ def get_factory_servers(waveid, accountid, appidlist):
         # Get server list
         for account in aws_accounts:
             for app in filtered_apps:
-                if 'wave_id' in app and 'aws_accountid' in app and 'aws_region' in app:
-                    if str(app['wave_id']) == str(waveid):
-                        if str(app['aws_accountid']).strip() == str(account['aws_accountid']):
-                            if app['aws_region'].lower().strip() == account['aws_region']:
-                                for server in servers:
-                                    if 'r_type' in server and server['r_type'] == 'Rehost':
-                                        if 'app_id' in server and server['app_id'] == app['app_id']:
-                                            account['servers'].append(server)
+                if 'aws_accountid' in app and 'aws_region' in app:
+                    if str(app['aws_accountid']).strip() == str(account['aws_accountid']):
+                        if app['aws_region'].lower().strip() == account['aws_region']:
+                            for server in app['servers']:
+                                if 'r_type' in server and server['r_type'] == 'Rehost':
+                                    account['servers'].append(server)
             if len(account['servers']) == 0:
                 msg = "ERROR: Server list for wave " + waveid + " and account: " + account['aws_accountid'] + " region: " + account['aws_region'] + " is empty, only servers with 'Rehost' Migration Strategy will be processed...."
                 log.error(msg)
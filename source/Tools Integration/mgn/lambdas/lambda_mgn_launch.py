@@ -23,6 +23,7 @@ import json
 import os
 import boto3
 import lambda_mgn
+import item_changes
 import botocore.exceptions
 from boto3.dynamodb.conditions import Key, Attr
 import logging
@@ -118,6 +119,7 @@ def multiprocessing_usage(server, launch_type):
     existing_attr = servers_table.get_item(Key={'server_id': server['server_id']})
     existing_attr['Item']['migration_status'] = launch_type + " instance launched"
     resp = servers_table.put_item(Item=existing_attr['Item'])
+    item_changes.record_change('server', server['server_id'], 'update')
     log.info("Pid: " + str(os.getpid()) + " - This is " + launch_type + " Launch, migration_status updated")
     if AnonymousUsageData == "Yes":
         usage_data = {"Solution": "SO0097",
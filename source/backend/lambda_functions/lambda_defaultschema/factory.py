@@ -178,6 +178,9 @@ schema = [
                         "type": {
                             "S": "relationship"
                         },
+                        "indexed": {
+                            "BOOL": True
+                        },
                         "group_order": {
                             "S": "-999"
                         },
@@ -322,6 +325,9 @@ schema = [
                         "type": {
                             "S": "relationship"
                         },
+                        "indexed": {
+                            "BOOL": True
+                        },
                         "rel_display_attribute": {
                             "S": "app_name"
                         },
@@ -1120,6 +1126,9 @@ schema = [
                         "type": {
                             "S": "relationship"
                         },
+                        "indexed": {
+                            "BOOL": True
+                        },
                         "rel_display_attribute": {
                             "S": "app_name"
                         },
@@ -19,7 +19,14 @@
 import factory
 import roles
 import policies
-import json, boto3, logging, os
+import item_list
+import item_names
+import item_indexes
+import permissions
+import schema_versions
+import json, boto3, logging, os, datetime
+import botocore.exceptions
+from boto3.dynamodb.types import TypeDeserializer
 import requests
 
 log = logging.getLogger()
@@ -28,6 +35,13 @@ log.setLevel(logging.INFO)
 ROLE_TABLE = os.getenv('RoleDynamoDBTable')
 SCHEMA_TABLE = os.getenv('SchemaDynamoDBTable')
 POLICY_TABLE = os.getenv('PolicyDynamoDBTable')
+NAMES_TABLE = os.getenv('NamesDynamoDBTable')
+DATA_TABLES = {
+    'server': os.getenv('ServersDynamoDBTable'),
+    'app': os.getenv('AppsDynamoDBTable'),
+    'wave': os.getenv('WavesDynamoDBTable'),
+    'database': os.getenv('DatabasesDynamoDBTable')
+}
 
 def load_schema():
     client = boto3.client('dynamodb')
@@ -53,6 +67,86 @@ def load_schema():
             Item = item
         )
 
+    permissions.rebuild()
+
+
+def update_data_tables():
+    # Items created before the name index and names table were added are missing the index partition key and
+    # name reservation.
+    names_table = boto3.resource('dynamodb').Table(NAMES_TABLE)
+    for schema_name, table_name in DATA_TABLES.items():
+        if table_name:
+            data_table = boto3.resource('dynamodb').Table(table_name)
+            item_list.backfill_item_type(data_table, schema_name)
+            item_names.backfill_names(data_table, schema_name, names_table)
+
+
+def get_default_indexed_attributes():
+    # {schema_name: names of the attributes declared indexed in the default schema} for the data table schemas.
+    deserializer = TypeDeserializer()
+    indexed_attributes = {}
+    for item in factory.schema:
+        schema = {key: deserializer.deserialize(value) for key, value in item.items()}
+        if schema['schema_name'] in DATA_TABLES:
+            indexed_attributes[schema['schema_name']] = item_list.get_indexed_attributes(schema)
+    return indexed_attributes
+
+
+def update_schema_indexes():
+    # Schemas loaded by earlier versions do not declare the default relationship attributes as indexed. Returns the
+    # current schema of each data table.
+    schema_table = boto3.resource('dynamodb').Table(SCHEMA_TABLE)
+    default_indexed_attributes = get_default_indexed_attributes()
+    schemas = {}
+    for schema_name in DATA_TABLES:
+        schema = schema_table.get_item(Key={'schema_name': schema_name}).get('Item')
+        if not schema:
+            continue
+        for index, attribute in enumerate(schema.get('attributes', [])):
+            if attribute.get('name') in default_indexed_attributes.get(schema_name, []) and \
+                    not attribute.get('indexed'):
+                try:
+                    schema_table.update_item(
+                        Key={'schema_name': schema_name},
+                        UpdateExpression='SET #attributes[' + str(index) + '].#indexed = :indexed, '
+                                         '#timestamp = :timestamp',
+                        ConditionExpression='#attributes[' + str(index) + '].#name = :name',
+                        ExpressionAttributeNames={'#attributes': 'attributes', '#indexed': 'indexed',
+                                                  '#name': 'name', '#timestamp': 'lastModifiedTimestamp'},
+                        ExpressionAttributeValues={':indexed': True, ':name': attribute['name'],
+                                                   ':timestamp': datetime.datetime.utcnow().isoformat()}
+                    )
+                    attribute['indexed'] = True
+                except botocore.exceptions.ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    log.warning('Schema %s changed while marking %s indexed.', schema_name, attribute['name'])
+        schemas[schema_name] = schema
+    return schemas
+
+
+def create_indexes():
+    # Adds the {attribute}-index of each indexed attribute to the data tables, see item_indexes. Indexes that cannot
+    # be created while another index of the table is being created are added by the next stack update, lists
+    # filtered on the attribute are served from the name index until then.
+    for schema_name, schema in update_schema_indexes().items():
+        if DATA_TABLES[schema_name]:
+            data_table = boto3.resource('dynamodb').Table(DATA_TABLES[schema_name])
+            for attribute_name in item_list.get_indexed_attributes(schema):
+                item_indexes.create_index(data_table, attribute_name)
+
+
+def update_schema_versions():
+    # Records the current version of every schema in the schema versions registry served by the notifications API.
+    schema_table = boto3.resource('dynamodb').Table(SCHEMA_TABLE)
+    scan_args = {'ProjectionExpression': 'schema_name, lastModifiedTimestamp', 'ConsistentRead': True}
+    response = schema_table.scan(**scan_args)
+    schemas = response['Items']
+    while 'LastEvaluatedKey' in response:
+        response = schema_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'], **scan_args)
+        schemas.extend(response['Items'])
+    schema_versions.rebuild(schemas)
+
 
 def lambda_handler(event, context):
 
@@ -63,13 +157,19 @@ def lambda_handler(event, context):
         if event['RequestType'] == 'Create':
             log.info('Create action')
             load_schema()
+            create_indexes()
+            update_schema_versions()
             status='SUCCESS'
             message='Default schema loaded successfully'
 
         elif event['RequestType'] == 'Update':
             log.info('Update action')
+            update_data_tables()
+            create_indexes()
+            permissions.rebuild()
+            update_schema_versions()
             status='SUCCESS'
-            message='No update required'
+            message='Data tables updated successfully'
 
         elif event['RequestType'] == 'Delete':
             log.info('Delete action')
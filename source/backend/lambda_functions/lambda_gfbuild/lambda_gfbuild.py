@@ -24,6 +24,10 @@ import os
 import troposphere.ec2 as ec2
 from troposphere import Base64, Tags,FindInMap, GetAtt, Output, Parameter, Ref, Template
 from policy import MFAuth
+import dynamodb_scan
+import item_changes
+import item_list
+import item_tree
 import traceback
 
 headers = {'Content-Type': 'application/json'}
@@ -203,22 +207,9 @@ def GetServerList(waveid,servers_table):
     try:
 
         templategenlist = []
-        # Get all Apps and servers from migration factory
+        # Get the apps of the wave and their servers from migration factory
 
-        getserver = scan_dynamodb_table('server')
-
-        if getserver is not None and "ERROR" in getserver:
-            templategenlist.append ("ERROR: Unable to Retrieve Data from Dynamo DB Server table")
-            print('ERROR: Unable to Retrieve Data from Dynamo DB Server table')
-
-        servers = sorted(getserver, key = lambda i: i['server_name'])
-
-        getapp = scan_dynamodb_table('app')
-        if getapp is not None and "ERROR" in getapp:
-            templategenlist.append ("ERROR: Unable to Retrieve Data from Dynamo DB App table")
-            print('ERROR: Unable to Retrieve Data from Dynamo DB App table')
-
-        apps = sorted(getapp, key = lambda i: i['app_name'])
+        apps = item_tree.get_wave_apps(waveid, apps_table)
 
         # Get App list
         applist = []
@@ -229,11 +220,10 @@ def GetServerList(waveid,servers_table):
         # Pull App Id and App Name from Apps Dynamo table
 
         for app in apps:
-            if 'wave_id' in app:
-                if str(app['wave_id']) == waveid:
-                    applist.append(app['app_id'])
-                    appnamelist.append(app['app_name'])
+            applist.append(app['app_id'])
+            appnamelist.append(app['app_name'])
 
+        app_servers = item_tree.get_app_servers(applist, servers_table)
 
         serverlist = []
 
@@ -253,11 +243,11 @@ def GetServerList(waveid,servers_table):
 
         # Pull Server List and Attributes
 
-            for server in servers:
-                if "app_id" in server and "r_type" in server:
+            for server in app_servers[applist[appnumb]]:
+                if "r_type" in server:
                     addvolcount=0
                     print(server['r_type'].upper())
-                    if applist[appnumb] == server['app_id'] and server['r_type'].upper() == 'REPLATFORM' :
+                    if server['r_type'].upper() == 'REPLATFORM' :
                         serverlist.append(server)
 
 
@@ -296,7 +286,9 @@ def GetServerList(waveid,servers_table):
                     serverresponse = servers_table.get_item(Key={'server_id': server['server_id']})
                     serveritem = serverresponse['Item']
                     serveritem['migration_status'] = 'CF Template Generated'
+                    item_list.set_item_type(serveritem, 'server')
                     servers_table.put_item(Item=serveritem)
+                    item_changes.record_change('server', serveritem['server_id'], 'update')
 
             appnumb=appnumb+1
 
@@ -663,22 +655,12 @@ def scan_dynamodb_table(datatype):
     try:
 
         if datatype == 'server':
-            response = servers_table.scan(ConsistentRead=True)
+            data_table = servers_table
         elif datatype == 'app':
-            response = apps_table.scan(ConsistentRead=True)
+            data_table = apps_table
         elif datatype == 'wave':
-            response = waves_table.scan(ConsistentRead=True)
-        scan_data = response['Items']
-        while 'LastEvaluatedKey' in response:
-            print("Last Evaluate key is   " + str(response['LastEvaluatedKey']))
-            if datatype == 'server':
-                response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'app':
-                response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'wave':
-                response = waves_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            scan_data.extend(response['Items'])
-        return(scan_data)
+            data_table = waves_table
+        return dynamodb_scan.scan_table(data_table)
 
     except Exception as e:
         print( "ERROR: Unable to retrieve the data from Dynamo DB table: " + str(e) )
@@ -22,6 +22,9 @@ import json
 import sys
 import os
 from policy import MFAuth
+import dynamodb_scan
+import item_changes
+import item_list
 from botocore import config
 
 if 'solution_identifier' in os.environ:
@@ -245,7 +248,9 @@ def lambda_handler(event, context):
                             serverresponse = servers_table.get_item(Key={'server_id': server['server_id']})
                             serveritem = serverresponse['Item']
                             serveritem['migration_status'] = 'CF Deployment Submitted'
+                            item_list.set_item_type(serveritem, 'server')
                             servers_table.put_item(Item=serveritem)
+                            item_changes.record_change('server', serveritem['server_id'], 'update')
                         
                 print(msg)
                 return {'headers': {**default_http_headers},
@@ -300,22 +305,12 @@ def scan_dynamodb_table(datatype):
     try:
 
         if datatype == 'server':
-            response = servers_table.scan(ConsistentRead=True)
+            data_table = servers_table
         elif datatype == 'app':
-            response = apps_table.scan(ConsistentRead=True)
+            data_table = apps_table
         elif datatype == 'wave':
-            response = waves_table.scan(ConsistentRead=True)       
-        scan_data = response['Items']
-        while 'LastEvaluatedKey' in response:
-            print("Last Evaluate key is   " + str(response['LastEvaluatedKey']))
-            if datatype == 'server':
-                response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'app':
-                response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'wave':
-                response = waves_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)        
-            scan_data.extend(response['Items'])
-        return(scan_data)
+            data_table = waves_table
+        return dynamodb_scan.scan_table(data_table)
 
     except Exception as e:
         print( "ERROR: Unable to retrieve the data from Dynamo DB table: " + str(e) )
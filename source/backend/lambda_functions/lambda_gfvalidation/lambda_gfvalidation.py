@@ -22,6 +22,9 @@ import sys
 import os
 import json
 from policy import MFAuth
+import dynamodb_scan
+import item_changes
+import item_list
 
 if 'cors' in os.environ:
     cors = os.environ['cors']
@@ -343,7 +346,9 @@ def validateinput(apptotal,app_id,app_name,addvolcount,server_name,instance_type
         serverresponse = servers_table.get_item(Key={'server_id': server_id})
         serveritem = serverresponse['Item']
         serveritem['migration_status'] = 'Validation Completed'
+        item_list.set_item_type(serveritem, 'server')
         servers_table.put_item(Item=serveritem)
+        item_changes.record_change('server', server_id, 'update')
 
 
 
@@ -355,22 +360,12 @@ def scan_dynamodb_table(datatype):
     try:
 
         if datatype == 'server':
-            response = servers_table.scan(ConsistentRead=True)
+            data_table = servers_table
         elif datatype == 'app':
-            response = apps_table.scan(ConsistentRead=True)
+            data_table = apps_table
         elif datatype == 'wave':
-            response = waves_table.scan(ConsistentRead=True)       
-        scan_data = response['Items']
-        while 'LastEvaluatedKey' in response:
-            print("Last Evaluate key is   " + str(response['LastEvaluatedKey']))
-            if datatype == 'server':
-                response = servers_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'app':
-                response = apps_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)
-            elif datatype == 'wave':
-                response = waves_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'],ConsistentRead=True)        
-            scan_data.extend(response['Items'])
-        return(scan_data)
+            data_table = waves_table
+        return dynamodb_scan.scan_table(data_table)
 
     except Exception as e:
         print( "ERROR: Unable to retrieve the data from Dynamo DB table: " + str(e) )
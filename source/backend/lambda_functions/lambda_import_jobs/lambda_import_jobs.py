@@ -0,0 +1,528 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Asynchronous imports of waves, applications, servers and databases. The client creates a job and uploads an NDJSON
+# or CSV file to the presigned URL returned, then starts the job. The function is invoked asynchronously as the worker,
+# which streams the file from S3 once per schema, in dependency order, so that rows can reference items created
+# earlier in the same job by name. Progress and per row errors are recorded in the import jobs table for the UI to
+# poll. Workers that run short of time save their position and continue in a new invocation.
+
+import os
+import csv
+import json
+import uuid
+import codecs
+import datetime
+import boto3
+import botocore.exceptions
+from boto3.dynamodb.conditions import Key, Attr
+from policy import MFAuth
+import api_response
+import item_validation
+import item_list
+import item_names
+import item_ids
+import bulk_write
+import item_changes
+import schema_cache
+import logging
+
+logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.DEBUG)
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+application = os.environ['application']
+environment = os.environ['environment']
+
+import_jobs_table_name = '{}-{}-import-jobs'.format(application, environment)
+if 'import_bucket' in os.environ:
+    import_bucket = os.environ['import_bucket']
+else:
+    import_bucket = '{}-{}-import'.format(application, environment)
+
+# Schemas that can be imported, in the order they are processed.
+import_schema_order = ['wave', 'app', 'server', 'database']
+import_formats = ['ndjson', 'csv']
+
+# Row attribute that names the schema of the row.
+schema_attribute = 'schema'
+
+# Rows are validated and written in chunks of this size.
+chunk_size = 500
+# Separator of multiple values in a CSV column.
+csv_value_separator = ';'
+# Number of row errors recorded per job, further errors are only counted.
+max_row_errors = 1000
+# Time kept in reserve when the worker hands over to a new invocation.
+handover_time_ms = 120000
+upload_url_expiry = 3600
+
+job_record_id = 'job'
+
+
+def get_import_jobs_table():
+    return boto3.resource('dynamodb').Table(import_jobs_table_name)
+
+
+def get_data_table_name(schema_name):
+    return '{}-{}-{}s'.format(application, environment, schema_name)
+
+
+def get_item_schema_name(rel_entity):
+    # Relationships to applications use the schema name application, the app schema holds the items.
+    if rel_entity == 'application':
+        return 'app'
+    return rel_entity
+
+
+def get_job(job_id):
+    resp = get_import_jobs_table().get_item(Key={'job_id': job_id, 'record_id': job_record_id}, ConsistentRead=True)
+    return resp.get('Item')
+
+
+def get_job_errors(job_id):
+    errors = []
+    query_arguments = {'KeyConditionExpression': Key('job_id').eq(job_id) & Key('record_id').begins_with('error#')}
+    while True:
+        resp = get_import_jobs_table().query(**query_arguments)
+        errors.extend(resp['Items'])
+        if 'LastEvaluatedKey' not in resp:
+            return errors
+        query_arguments['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+
+def new_progress(schemas):
+    return {schema_name: {'rows': 0, 'created': 0, 'failed': 0} for schema_name in schemas}
+
+
+def create_job(event, body):
+    # Validates the job request, checks the user can create every schema in the job and returns the response.
+    errors = []
+    import_format = body.get('format', 'ndjson')
+    if import_format not in import_formats:
+        errors.append('format must be one of ' + ', '.join(import_formats) + '.')
+    schemas = body.get('schemas', [])
+    if not isinstance(schemas, list) or not schemas or \
+            not all(schema_name in import_schema_order for schema_name in schemas):
+        errors.append('schemas must be a list of ' + ', '.join(import_schema_order) + '.')
+    if errors:
+        return api_response.response({'errors': errors}, 400)
+
+    auth = MFAuth()
+    for schema_name in schemas:
+        authResponse = auth.getUserResourceCreationPolicy(event, schema_name)
+        if authResponse['action'] != 'allow':
+            logger.error('Invocation: import:POST, Authorisation failed: ' + json.dumps(authResponse))
+            return api_response.response({'errors': [authResponse]}, 401)
+
+    job_id = str(uuid.uuid4())
+    job = {
+        'job_id': job_id,
+        'record_id': job_record_id,
+        'status': 'WAITING_UPLOAD',
+        'format': import_format,
+        'schemas': [schema_name for schema_name in import_schema_order if schema_name in schemas],
+        's3_key': 'imports/' + job_id + '.' + import_format,
+        'progress': new_progress(schemas),
+        'error_count': 0,
+        'position': {'schema_index': 0, 'row': 0},
+        '_history': {'createdTimestamp': datetime.datetime.utcnow().isoformat()}
+    }
+    if 'user' in authResponse:
+        job['_history']['createdBy'] = authResponse['user']
+    get_import_jobs_table().put_item(Item=job)
+
+    upload_url = boto3.client('s3').generate_presigned_url(
+        'put_object',
+        Params={'Bucket': import_bucket, 'Key': job['s3_key']},
+        ExpiresIn=upload_url_expiry
+    )
+    logger.info('Invocation: import:POST, Created import job %s.', job_id)
+    return api_response.response({'job': job, 'upload_url': upload_url, 'expires_in': upload_url_expiry})
+
+
+def start_job(event, job_id, context):
+    job = get_job(job_id)
+    if job is None:
+        return api_response.response({'errors': ['Import job ' + job_id + ' does not exist.']}, 404)
+
+    auth = MFAuth()
+    for schema_name in job['schemas']:
+        authResponse = auth.getUserResourceCreationPolicy(event, schema_name)
+        if authResponse['action'] != 'allow':
+            return api_response.response({'errors': [authResponse]}, 401)
+
+    try:
+        boto3.client('s3').head_object(Bucket=import_bucket, Key=job['s3_key'])
+    except botocore.exceptions.ClientError:
+        return api_response.response({'errors': ['Import file has not been uploaded.']}, 400)
+
+    try:
+        get_import_jobs_table().update_item(
+            Key={'job_id': job_id, 'record_id': job_record_id},
+            UpdateExpression='SET #status = :queued',
+            ConditionExpression='#status = :waiting',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':queued': 'QUEUED', ':waiting': 'WAITING_UPLOAD'}
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return api_response.response({'errors': ['Import job ' + job_id + ' has already started.']}, 400)
+
+    invoke_worker(job_id, context)
+    logger.info('Invocation: import:POST, Started import job %s.', job_id)
+    return api_response.response({'job_id': job_id, 'status': 'QUEUED'})
+
+
+def invoke_worker(job_id, context):
+    boto3.client('lambda').invoke(FunctionName=context.function_name,
+                                  InvocationType='Event',
+                                  Payload=json.dumps({'import_job_id': job_id}))
+
+
+def iter_file_rows(job):
+    # Yields (row number, row) for every row in the uploaded file, rows are numbered from 1 excluding the CSV header.
+    body = boto3.client('s3').get_object(Bucket=import_bucket, Key=job['s3_key'])['Body']
+    lines = codecs.iterdecode(body.iter_lines(), 'utf-8-sig')
+    if job['format'] == 'csv':
+        for row_number, row in enumerate(csv.DictReader(lines), 1):
+            yield row_number, row
+    else:
+        row_number = 0
+        for line in lines:
+            if line.strip() == '':
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row
+
+
+def convert_csv_row(row, schema):
+    # CSV values are strings, empty values are dropped, multiple values are separated by csv_value_separator.
+    schema_attributes = item_list.get_schema_attributes(schema)
+    item = {}
+    for key, value in row.items():
+        if key is None or value is None or value == '':
+            continue
+        attribute = schema_attributes.get(key)
+        if attribute is not None and item_list.is_multivalue_attribute(attribute):
+            item[key] = [value.strip() for value in value.split(csv_value_separator) if value.strip() != '']
+        elif attribute is not None and attribute['type'] == 'checkbox':
+            item[key] = value.lower() == 'true'
+        else:
+            item[key] = value
+    return item
+
+
+def resolve_names(item, schema, name_cache):
+    # Replaces the display name of related items with their id. Returns a list of errors for names not found.
+    errors = []
+    for attribute in schema['attributes']:
+        if attribute['type'] != 'relationship' or 'rel_display_attribute' not in attribute or \
+                attribute.get('rel_key') != get_item_schema_name(attribute.get('rel_entity', '')) + '_id':
+            continue
+        display_attribute = attribute['rel_display_attribute']
+        if attribute['name'] in item or display_attribute not in item:
+            continue
+
+        related_schema_name = get_item_schema_name(attribute['rel_entity'])
+        names = item.pop(display_attribute)
+        multiple = isinstance(names, list)
+        related_ids = []
+        for name in names if multiple else [names]:
+            cache_key = (related_schema_name, str(name).lower())
+            if cache_key not in name_cache:
+                name_cache[cache_key] = item_names.get_name_owner(related_schema_name, name)
+            if name_cache[cache_key] is None:
+                errors.append('Attribute: ' + attribute['name'] + ', ' + display_attribute + ' ' + str(name) +
+                              ' does not exist.')
+            else:
+                related_ids.append(name_cache[cache_key])
+        item[attribute['name']] = related_ids if multiple else (related_ids[0] if related_ids else '')
+    return errors
+
+
+class ImportPass(object):
+    """Import of the rows of one schema, rows are added with add_row and written in chunks."""
+
+    def __init__(self, job, schema_name, schema, history):
+        self.job = job
+        self.schema_name = schema_name
+        self.schema = schema
+        self.compiled_schema = item_validation.get_compiled_schema(schema)
+        self.data_table = boto3.resource('dynamodb').Table(get_data_table_name(schema_name))
+        self.history = history
+        self.relationship_index = {}
+        self.name_cache = {}
+        self.names_seen = set()
+        self.rows = []
+        self.row_errors = []
+        self.progress = {'rows': 0, 'created': 0, 'failed': 0}
+
+    def add_error(self, row_number, name, errors):
+        self.row_errors.append({'row': row_number, 'schema': self.schema_name, 'name': name, 'errors': errors})
+        self.progress['failed'] += 1
+
+    def add_row(self, row_number, row):
+        self.progress['rows'] += 1
+        name = row.get(self.schema_name + '_name')
+        if self.job['format'] == 'csv':
+            item = convert_csv_row(row, self.schema)
+        else:
+            item = dict(row)
+        item.pop(schema_attribute, None)
+
+        if name is None or name == '':
+            self.add_error(row_number, name, ['Attribute: ' + self.schema_name + '_name is required and not provided.'])
+            return
+        if self.schema_name + '_id' in item:
+            self.add_error(row_number, name, ['You cannot create ' + self.schema_name +
+                                              '_id, this is managed by the system'])
+            return
+        if str(name).lower() in self.names_seen:
+            self.add_error(row_number, name, ['Duplicate ' + self.schema_name + '_name in import.'])
+            return
+
+        errors = resolve_names(item, self.schema, self.name_cache)
+        if not errors:
+            errors = item_validation.check_valid_item_create(item, self.compiled_schema, self.relationship_index)
+        if errors:
+            self.add_error(row_number, name, errors)
+            return
+
+        # Only accepted rows hold their name, a rejected row can be corrected by a later row with the same name.
+        self.names_seen.add(str(name).lower())
+        item['_history'] = self.history
+        item_list.set_item_type(item, self.schema_name)
+        self.rows.append((row_number, item))
+
+    def write(self):
+        # Writes the rows added since the last write.
+        if not self.rows:
+            return
+        rows = self.rows
+        self.rows = []
+
+        item_id = item_ids.allocate_ids(self.data_table, self.schema_name + '_id', len(rows))
+        for row_number, item in rows:
+            item[self.schema_name + '_id'] = str(item_id)
+            item_id += 1
+
+        items = [item for row_number, item in rows]
+        name_exists_ids = set(item[self.schema_name + '_id']
+                              for item in item_names.reserve_names(self.data_table, self.schema_name, items))
+        write_rows = []
+        for row_number, item in rows:
+            if item[self.schema_name + '_id'] in name_exists_ids:
+                self.add_error(row_number, item[self.schema_name + '_name'],
+                               [self.schema_name + '_name already exists.'])
+            else:
+                write_rows.append((row_number, item))
+
+        write_result = bulk_write.put_items(self.data_table.name, [item for row_number, item in write_rows],
+                                            self.schema_name + '_id')
+        for row_number, item in write_rows:
+            if item[self.schema_name + '_id'] in write_result.failed:
+                self.add_error(row_number, item[self.schema_name + '_name'],
+                               [write_result.failed[item[self.schema_name + '_id']]])
+                item_names.release_name(self.schema_name, item[self.schema_name + '_name'],
+                                        item[self.schema_name + '_id'])
+        item_changes.record_changes(self.schema_name, write_result.succeeded, 'create')
+        self.progress['created'] += len(write_result.succeeded)
+
+
+def save_progress(job, import_pass, position, status=None):
+    # Adds the progress of import_pass to the job and records its row errors.
+    job_errors = import_pass.row_errors
+    import_pass.row_errors = []
+    error_records = []
+    for row_error in job_errors:
+        if job['error_count'] + len(error_records) >= max_row_errors:
+            break
+        error_records.append({'job_id': job['job_id'], 'record_id': 'error#{:08d}#{}'.format(row_error['row'],
+                                                                                            row_error['schema']),
+                              **row_error})
+    if error_records:
+        bulk_write.put_items(import_jobs_table_name, error_records, 'record_id')
+    job['error_count'] += len(error_records)
+
+    update_expression = 'SET #position = :position, error_count = :error_count, ' + \
+                        '#progress.#schema.#rows = #progress.#schema.#rows + :rows, ' + \
+                        '#progress.#schema.created = #progress.#schema.created + :created, ' + \
+                        '#progress.#schema.failed = #progress.#schema.failed + :failed'
+    attribute_values = {':position': position, ':error_count': job['error_count'],
+                        ':rows': import_pass.progress['rows'], ':created': import_pass.progress['created'],
+                        ':failed': import_pass.progress['failed']}
+    attribute_names = {'#position': 'position', '#progress': 'progress', '#schema': import_pass.schema_name,
+                       '#rows': 'rows'}
+    if status is not None:
+        update_expression += ', #status = :status'
+        attribute_names['#status'] = 'status'
+        attribute_values[':status'] = status
+    get_import_jobs_table().update_item(
+        Key={'job_id': job['job_id'], 'record_id': job_record_id},
+        UpdateExpression=update_expression,
+        ExpressionAttributeNames=attribute_names,
+        ExpressionAttributeValues=attribute_values
+    )
+    import_pass.progress = {'rows': 0, 'created': 0, 'failed': 0}
+    job['position'] = position
+
+
+def set_job_status(job_id, status, message=None):
+    update_expression = 'SET #status = :status, #history.completedTimestamp = :completed'
+    attribute_values = {':status': status, ':completed': datetime.datetime.utcnow().isoformat()}
+    if message is not None:
+        update_expression += ', message = :message'
+        attribute_values[':message'] = message
+    get_import_jobs_table().update_item(
+        Key={'job_id': job_id, 'record_id': job_record_id},
+        UpdateExpression=update_expression,
+        ExpressionAttributeNames={'#status': 'status', '#history': '_history'},
+        ExpressionAttributeValues=attribute_values
+    )
+
+
+def run_job(job_id, context):
+    # Processes the job from its saved position, returns the final status or HANDOVER if continued elsewhere.
+    job = get_job(job_id)
+    if job is None or job['status'] not in ['QUEUED', 'RUNNING']:
+        logger.error('Invocation: import:worker, Import job %s is not queued.', job_id)
+        return None
+
+    get_import_jobs_table().update_item(
+        Key={'job_id': job_id, 'record_id': job_record_id},
+        UpdateExpression='SET #status = :running',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':running': 'RUNNING'}
+    )
+    history = {'createdBy': job['_history'].get('createdBy'), 'createdTimestamp': datetime.datetime.utcnow().isoformat()}
+    if history['createdBy'] is None:
+        del history['createdBy']
+
+    schema_index = int(job['position']['schema_index'])
+    start_row = int(job['position']['row'])
+    import_pass = None
+    try:
+        while schema_index < len(job['schemas']):
+            schema_name = job['schemas'][schema_index]
+            schema = schema_cache.get_schema(schema_name, max_age=0)
+            import_pass = ImportPass(job, schema_name, schema, history)
+            unknown_schema_pass = schema_index == 0
+
+            last_row = start_row
+            for row_number, row in iter_file_rows(job):
+                if row_number <= start_row:
+                    continue
+                last_row = row_number
+                if not isinstance(row, dict):
+                    if unknown_schema_pass:
+                        import_pass.row_errors.append({'row': row_number, 'schema': None, 'name': None,
+                                                       'errors': ['Row is not a valid JSON object.']})
+                    continue
+                if row.get(schema_attribute) == schema_name:
+                    import_pass.add_row(row_number, row)
+                elif unknown_schema_pass and row.get(schema_attribute) not in job['schemas']:
+                    import_pass.row_errors.append({'row': row_number, 'schema': row.get(schema_attribute),
+                                                   'name': None, 'errors': [schema_attribute + ' must be one of ' +
+                                                                            ', '.join(job['schemas']) + '.']})
+
+                if len(import_pass.rows) >= chunk_size:
+                    import_pass.write()
+                    save_progress(job, import_pass, {'schema_index': schema_index, 'row': row_number})
+                    if context.get_remaining_time_in_millis() < handover_time_ms:
+                        logger.info('Invocation: import:worker, Continuing import job %s from row %s.', job_id,
+                                    row_number)
+                        invoke_worker(job_id, context)
+                        return 'HANDOVER'
+
+            import_pass.write()
+            schema_index += 1
+            start_row = 0
+            save_progress(job, import_pass, {'schema_index': schema_index, 'row': 0})
+            logger.info('Invocation: import:worker, Imported %s rows of import job %s up to row %s.', schema_name,
+                        job_id, last_row)
+    except Exception:
+        # Row errors found since the last save are recorded before the job is marked as failed.
+        if import_pass is not None:
+            try:
+                save_progress(job, import_pass, job['position'])
+            except Exception as e:
+                logger.error('Invocation: import:worker, Unable to save the progress of import job %s: %s', job_id,
+                             str(e))
+        raise
+
+    job = get_job(job_id)
+    failed = sum(int(progress['failed']) for progress in job['progress'].values())
+    status = 'COMPLETE_WITH_ERRORS' if failed or job['error_count'] else 'COMPLETE'
+    set_job_status(job_id, status)
+    return status
+
+
+def lambda_handler(event, context):
+    if 'import_job_id' in event:
+        # Asynchronous worker invocation.
+        job_id = event['import_job_id']
+        try:
+            return run_job(job_id, context)
+        except Exception as e:
+            logger.error('Invocation: import:worker, Import job %s failed: %s', job_id, str(e))
+            set_job_status(job_id, 'FAILED', 'Import failed: check logs for detailed error message.')
+            return 'FAILED'
+
+    logging_context = 'import:' + event['httpMethod']
+    path_parameters = event.get('pathParameters') or {}
+    job_id = path_parameters.get('jobid')
+
+    if event['httpMethod'] == 'GET':
+        if job_id is None:
+            jobs = []
+            scan_arguments = {'FilterExpression': Attr('record_id').eq(job_record_id)}
+            while True:
+                resp = get_import_jobs_table().scan(**scan_arguments)
+                jobs.extend(resp['Items'])
+                if 'LastEvaluatedKey' not in resp:
+                    break
+                scan_arguments['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+            jobs.sort(key=lambda job: job['_history']['createdTimestamp'], reverse=True)
+            return api_response.response(jobs)
+
+        job = get_job(job_id)
+        if job is None:
+            return api_response.response({'errors': ['Import job ' + job_id + ' does not exist.']}, 404)
+        job['errors'] = get_job_errors(job_id)
+        return api_response.response(job)
+
+    elif event['httpMethod'] == 'POST':
+        if job_id is not None:
+            return start_job(event, job_id, context)
+        try:
+            body = json.loads(event['body'] or '{}')
+            if not isinstance(body, dict):
+                raise ValueError()
+        except ValueError:
+            logger.error('Invocation: %s, malformed json input', logging_context)
+            return api_response.response({'errors': ['malformed json input']}, 400)
+        return create_job(event, body)
+
+    return api_response.response({'errors': ['Method not allowed.']}, 405)
@@ -19,33 +19,27 @@
 import os
 import json
 import boto3
+import botocore.exceptions
 import datetime
 from boto3.dynamodb.conditions import Key, Attr
 from policy import MFAuth
+import api_response
 import item_validation
+import item_list
+import item_names
+import item_updates
+import item_tree
+import item_changes
+import schema_cache
 import logging
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.DEBUG)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-if 'cors' in os.environ:
-    cors = os.environ['cors']
-else:
-    cors = '*'
-
-default_http_headers = {
-    'Access-Control-Allow-Origin': cors,
-    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
-    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
-}
 application = os.environ['application']
 environment = os.environ['environment']
 
-schema_table_name = '{}-{}-schema'.format(application, environment)
-
-schema_table = boto3.resource('dynamodb').Table(schema_table_name)
-
 def lambda_handler(event, context):
     logging_context = 'unknown'
 
@@ -54,47 +48,47 @@ def lambda_handler(event, context):
         logging_context = schema_name + ':' + event['httpMethod']
         logger.debug('Invocation: %s', logging_context)
 
-        #  Get schema object.
-        schema = {}
-        schema_found = False
-        for data_schema in schema_table.scan()['Items']:
-            if data_schema['schema_name'] == schema_name:
-                schema = data_schema
-                schema_found = True
-                break
-        if not schema_found:
+        #  Get schema object, writes always re-check the schema version so validation uses the latest schema.
+        if event['httpMethod'] == 'GET':
+            schema = schema_cache.get_schema(schema_name)
+        else:
+            schema = schema_cache.get_schema(schema_name, max_age=0)
+        if schema is None:
             msg = 'Invalid schema provided :' + schema_name
             logger.error('Invocation: %s, ' + msg, logging_context)
-            return {'headers': {**default_http_headers},
-            'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+            return api_response.response({'errors': [msg]}, 400)
 
     data_table_name = '{}-{}-'.format(application, environment) + schema_name + 's'
     data_table = boto3.resource('dynamodb').Table(data_table_name)
 
+    if event['httpMethod'] == 'GET' and event.get('resource', '').endswith('/tree'):
+        return get_tree(event, schema_name, data_table, logging_context)
+
     if event['httpMethod'] == 'GET':
+        # The change version is read before the item, so the ETag returned is never newer than the item.
+        etag = item_changes.get_etag(schema_name, item_changes.get_version(schema_name), event['pathParameters'])
+        if item_changes.is_not_modified(event, etag):
+            return api_response.response('', 304, {'ETag': etag})
+
         if 'appid' in event['pathParameters']:
             resp = data_table.query(
                     IndexName='app_id-index',
                     KeyConditionExpression=Key('app_id').eq(event['pathParameters']['appid'])
                 )
             if 'ResponseMetadata' in resp and resp['ResponseMetadata']['HTTPStatusCode'] == 200:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(resp['Items'])}
+                return api_response.response(resp['Items'], 200, {'ETag': etag}, event=event)
             else:
                 msg = 'Error getting data from table for appid: ' + str(event['pathParameters']['appid'])
                 logger.error('Invocation: %s, ' + msg, logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+                return api_response.response({'errors': [msg]}, 400)
         elif 'id' in event['pathParameters']:
             resp = data_table.get_item(Key={schema_name + '_id': event['pathParameters']['id']})
             if 'Item' in resp:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(resp['Item'])}
+                return api_response.response(resp['Item'], 200, {'ETag': etag})
             else:
                 msg = schema_name + ' Id ' + str(event['pathParameters']['id']) + ' does not exist'
                 logger.error('Invocation: %s, ' + msg, logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+                return api_response.response({'errors': [msg]}, 400)
 
     elif event['httpMethod'] == 'PUT':
         auth = MFAuth()
@@ -105,58 +99,60 @@ def lambda_handler(event, context):
                     if schema_name + "_id" in body:
                         msg = 'You cannot modify ' + schema_name + '_id, it is managed by the system'
                         logger.error('Invocation: %s, ' + msg, logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+                        return api_response.response({'errors': [msg]}, 400)
+                    if any(key.startswith('_') for key in body):
+                        msg = 'You cannot modify system attributes, these are managed by the system'
+                        logger.error('Invocation: %s, ' + msg, logging_context)
+                        return api_response.response({'errors': [msg]}, 400)
                 except Exception as e:
                     logger.error('Invocation: %s, ' + str(e), logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': json.dumps({'errors': ['malformed json input']})}
+                    return api_response.response({'errors': ['malformed json input']}, 400)
                 # check if item id exist
-                existing_attr = data_table.get_item(Key={schema_name + '_id': event['pathParameters']['id']})
-                print(existing_attr)
+                existing_attr = data_table.get_item(Key={schema_name + '_id': event['pathParameters']['id']},
+                                                    ConsistentRead=True)
                 if 'Item' not in existing_attr:
                   msg = schema_name + ' Id: ' + str(event['pathParameters']['id']) + ' does not exist'
                   logger.error('Invocation: %s, ' + msg, logging_context)
-                  return {'headers': {**default_http_headers},
-                          'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
-
-                # Check if there is a duplicate [schema]_name
-                existing_data = item_validation.scan_dynamodb_data_table(data_table)
-                for existing_item in existing_data:
-                  if schema_name + '_name' in body:
-                    if existing_item[schema_name + '_name'].lower() == str(body[schema_name + '_name']).lower() and existing_item[schema_name + '_id'] != str(event['pathParameters']['id']):
-                        msg = schema_name + '_name: ' + body[schema_name + '_name'] + ' already exist'
-                        logger.error('Invocation: %s, ' + msg, logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+                  return api_response.response({'errors': [msg]}, 400)
 
-                # Get schema object
-                schema = {}
-                for table_schema in schema_table.scan()['Items']:
-                    if table_schema['schema_name'] == schema_name:
-                        schema = table_schema
+                stored_item = existing_attr['Item']
+                old_name = stored_item.get(schema_name + '_name')
+
+                # The update is conditioned on the version read, or the version given in If-Match, so concurrent
+                # writers cannot overwrite each other.
+                version = item_updates.get_version(stored_item)
+                expected_version = item_updates.get_expected_version(event)
+                if expected_version is not None and expected_version != version:
+                    msg = schema_name + ' Id: ' + str(event['pathParameters']['id']) + \
+                          ' has been modified, the current version is ' + version
+                    logger.error('Invocation: %s, ' + msg, logging_context)
+                    return api_response.response({'errors': [msg]}, 409)
 
                 # Merge new attributes with existing one
+                new_item = dict(stored_item)
                 for key in body.keys():
-                    existing_attr['Item'][key] = body[key]
-                new_attr = existing_attr
-                keys = list(new_attr['Item'].keys())
+                    new_item[key] = body[key]
 
                 # Delete empty keys
-                for key in keys:
-                    if new_attr['Item'][key] == '':
-                       del new_attr['Item'][key]
-                       continue
-                    if isinstance(new_attr['Item'][key], list):
-                       if len(new_attr['Item'][key]) == 1 and new_attr['Item'][key][0] == '':
-                            del new_attr['Item'][key]
+                for key in list(new_item.keys()):
+                    if item_updates.is_empty_value(new_item[key]):
+                        del new_item[key]
 
                 # Validate item against schema attribute requirements
-                item_validation_result = item_validation.check_valid_item_create(new_attr['Item'], schema)
+                item_validation_result = item_validation.check_valid_item_create(new_item, schema)
                 if item_validation_result is not None:
                     logger.error('Invocation: %s, Item validation failed: ' + json.dumps(item_validation_result), logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': json.dumps({'errors': [item_validation_result]})}
+                    return api_response.response({'errors': [item_validation_result]}, 400)
+
+                # Only attributes that differ from the stored item are written, empty values remove the attribute.
+                changes = {key: value for key, value in body.items()
+                           if (key in new_item and stored_item.get(key) != value) or
+                           (key not in new_item and key in stored_item)}
+                if changes and item_list.item_type_attribute not in stored_item:
+                    item_list.set_item_type(changes, schema_name)
+                if not changes:
+                    logger.info('Invocation: %s, No changes to item, update skipped.', logging_context)
+                    return api_response.response({'version': version})
 
                 # Update record audit.
                 newAudit = {}
@@ -164,24 +160,42 @@ def lambda_handler(event, context):
                     newAudit['lastModifiedBy'] = authResponse['user']
                     newAudit['lastModifiedTimestamp'] = datetime.datetime.utcnow().isoformat()
 
-                if '_history' in new_attr['Item']:
-                    oldAudit = new_attr['Item']['_history']
-                    if 'createdTimestamp' in oldAudit:
-                        newAudit['createdTimestamp'] = oldAudit['createdTimestamp']
-                    if 'createdBy' in oldAudit:
-                        newAudit['createdBy'] = oldAudit['createdBy']
-
-                new_attr['Item']['_history'] = newAudit
-                resp = data_table.put_item(
-                    Item=new_attr['Item']
-                    )
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(resp)}
+                # Reserve the [schema]_name, this fails if the name is held by another item.
+                item_id = str(event['pathParameters']['id'])
+                renamed = schema_name + '_name' in changes and (old_name is None or
+                    item_names.get_name_key(schema_name, old_name) !=
+                    item_names.get_name_key(schema_name, changes[schema_name + '_name']))
+                if renamed:
+                    if not item_names.reserve_name(data_table, schema_name, changes[schema_name + '_name'], item_id):
+                        msg = schema_name + '_name: ' + changes[schema_name + '_name'] + ' already exist'
+                        logger.error('Invocation: %s, ' + msg, logging_context)
+                        return api_response.response({'errors': [msg]}, 400)
+
+                new_version = item_updates.new_version()
+                try:
+                    old_values = item_updates.update_item(data_table,
+                                                          {schema_name + '_id': stored_item[schema_name + '_id']},
+                                                          changes, new_version, newAudit, expected_version=version)
+                except botocore.exceptions.ClientError as e:
+                    if renamed:
+                        item_names.release_name(schema_name, changes[schema_name + '_name'], item_id)
+                    logger.error('Invocation: %s, Update failed: ' + str(e), logging_context)
+                    return api_response.response(
+                        {'errors': ['Unhandled API Exception: check logs for detailed error message.']}, 500)
+                if old_values is None:
+                    if renamed:
+                        item_names.release_name(schema_name, changes[schema_name + '_name'], item_id)
+                    msg = schema_name + ' Id: ' + item_id + ' was modified by another request, reload and try again'
+                    logger.error('Invocation: %s, ' + msg, logging_context)
+                    return api_response.response({'errors': [msg]}, 409)
+
+                if renamed and old_name is not None:
+                    item_names.release_name(schema_name, old_name, item_id)
+                item_changes.record_change(schema_name, item_id, 'update')
+                return api_response.response({'version': new_version})
         else:
             logger.warning('Invocation: %s, Authorisation failed: ' + json.dumps(authResponse), logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 401,
-                    'body': json.dumps({'errors': [authResponse]})}
+            return api_response.response({'errors': [authResponse]}, 401)
 
     elif event['httpMethod'] == 'DELETE':
         auth = MFAuth()
@@ -191,20 +205,57 @@ def lambda_handler(event, context):
             if 'Item' in resp:
                 respdel = data_table.delete_item(Key={schema_name + '_id': event['pathParameters']['id']})
                 if respdel['ResponseMetadata']['HTTPStatusCode'] == 200:
+                    if schema_name + '_name' in resp['Item']:
+                        item_names.release_name(schema_name, resp['Item'][schema_name + '_name'],
+                                                resp['Item'][schema_name + '_id'])
+                    item_changes.record_change(schema_name, resp['Item'][schema_name + '_id'], 'delete')
                     logger.info('Invocation: %s, All items successfully deleted.', logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 200, 'body': "Item was successfully deleted."}
+                    return api_response.response("Item was successfully deleted.")
                 else:
                     logger.error('Invocation: %s, ' + json.dumps(respdel), logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': respdel['ResponseMetadata']['HTTPStatusCode'], 'body': json.dumps({'errors': [respdel]})}
+                    return api_response.response({'errors': [respdel]},
+                                                 respdel['ResponseMetadata']['HTTPStatusCode'])
             else:
                 msg = schema_name + ' Id: ' + str(event['pathParameters']['id']) + ' does not exist'
                 logger.error('Invocation: %s, ' + msg, logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': json.dumps({'errors': [msg]})}
+                return api_response.response({'errors': [msg]}, 400)
         else:
             logger.error('Invocation: %s, Authorisation failed: ' + json.dumps(authResponse), logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 401,
-                    'body': json.dumps({'errors': [authResponse]})}
\ No newline at end of file
+            return api_response.response({'errors': [authResponse]}, 401)
+
+def get_tree(event, schema_name, data_table, logging_context):
+    # Wave with its apps and their servers, GET /user/wave/{id}/tree. With ?group_by=account,os the servers are
+    # returned grouped by target account and region and/or OS family instead of under each app.
+    if schema_name != 'wave':
+        msg = 'Tree is only available for waves.'
+        logger.error('Invocation: %s, ' + msg, logging_context)
+        return api_response.response({'errors': [msg]}, 400)
+
+    group_by = []
+    if event.get('queryStringParameters') and 'group_by' in event['queryStringParameters']:
+        group_by = [option.strip() for option in event['queryStringParameters']['group_by'].split(',')
+                    if option.strip() != '']
+        invalid_options = [option for option in group_by if option not in item_tree.group_by_options]
+        if invalid_options:
+            msg = 'group_by must be one or more of ' + ', '.join(item_tree.group_by_options) + '.'
+            logger.error('Invocation: %s, ' + msg, logging_context)
+            return api_response.response({'errors': [msg]}, 400)
+
+    # The tree changes with any of the three schemas, so the ETag is derived from all their versions.
+    versions = '-'.join(str(item_changes.get_version(tree_schema)) for tree_schema in ['wave', 'app', 'server'])
+    etag = item_changes.get_etag('tree', versions, {**event['pathParameters'], 'group_by': ','.join(group_by)})
+    if item_changes.is_not_modified(event, etag):
+        return api_response.response('', 304, {'ETag': etag})
+
+    resp = data_table.get_item(Key={'wave_id': event['pathParameters']['id']})
+    if 'Item' not in resp:
+        msg = schema_name + ' Id ' + str(event['pathParameters']['id']) + ' does not exist'
+        logger.error('Invocation: %s, ' + msg, logging_context)
+        return api_response.response({'errors': [msg]}, 400)
+
+    apps = item_tree.get_wave_tree(event['pathParameters']['id'])
+    if group_by:
+        tree = {'wave': resp['Item'], 'groups': item_tree.group_servers(apps, group_by)}
+    else:
+        tree = {'wave': resp['Item'], 'apps': apps}
+    return api_response.response(tree, 200, {'ETag': etag}, event=event)
@@ -19,33 +19,31 @@
 
 import os
 import json
-from time import sleep
 import boto3
 import datetime
 from boto3.dynamodb.conditions import Key, Attr
 from policy import MFAuth
+import api_response
 import item_validation
+import item_list
+import item_names
+import item_ids
+import bulk_write
+import bulk_read
+import item_updates
+import item_changes
+import schema_cache
 import logging
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.DEBUG)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-if 'cors' in os.environ:
-    cors = os.environ['cors']
-else:
-    cors = '*'
-
-default_http_headers = {
-    'Access-Control-Allow-Origin': cors,
-    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
-    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
-}
 application = os.environ['application']
 environment = os.environ['environment']
 
-schema_table_name = '{}-{}-schema'.format(application, environment)
-schema_table = boto3.resource('dynamodb').Table(schema_table_name)
+# Maximum number of ids in a POST /{schema}/batchget request.
+max_batch_get_ids = 5000
 
 
 def lambda_handler(event, context):
@@ -55,33 +53,64 @@ def lambda_handler(event, context):
         schema_name = event['pathParameters']['schema']
         logging_context = schema_name + ':' + event['httpMethod']
         logger.debug('Invocation: %s', logging_context)
-        #  Get schema object.
-        schema = {}
-        schema_found = False
-        for data_schema in schema_table.scan()['Items']:
-            if data_schema['schema_name'] == schema_name:
-                schema = data_schema
-                schema_found = True
-                break
-        if not schema_found:
+        #  Get schema object, writes always re-check the schema version so validation uses the latest schema.
+        if event['httpMethod'] == 'GET' or is_batch_get(event):
+            schema = schema_cache.get_schema(schema_name)
+        else:
+            schema = schema_cache.get_schema(schema_name, max_age=0)
+        if schema is None:
             msg = 'Invalid schema provided :' + schema_name
             logger.error(msg)
-            return {'headers': {**default_http_headers},
-            'statusCode': 400, 'body': msg}
+            return api_response.response(msg, 400)
 
     else:
         logger.error('No schema provided.')
-        return {'headers': {**default_http_headers},
-        'statusCode': 400, 'body': 'No schema provided to function.'}
+        return api_response.response('No schema provided to function.', 400)
 
     data_table_name = '{}-{}-'.format(application, environment) + schema_name + 's'
     data_table = boto3.resource('dynamodb').Table(data_table_name)
 
+    if is_batch_get(event):
+        return batch_get_items(event, schema_name, schema, data_table, logging_context)
+
     if event['httpMethod'] == 'GET':
+        # The change version is read before the items, so the ETag returned is never newer than the items.
+        etag = item_changes.get_etag(schema_name, item_changes.get_version(schema_name),
+                                     event.get('queryStringParameters'))
+        if item_changes.is_not_modified(event, etag):
+            return api_response.response('', 304, {'ETag': etag})
+
+        if event.get('queryStringParameters') and 'since' in event['queryStringParameters']:
+            # Items created, modified or deleted after since, served from the item changes table.
+            list_request, errors = item_list.get_list_request(event['queryStringParameters'], schema)
+            since = item_changes.parse_since(event['queryStringParameters']['since'])
+            if since is None:
+                errors.append('since must be an ISO 8601 timestamp.')
+            if list_request['paginated'] or list_request['filters']:
+                errors.append('since can only be combined with attributes.')
+            if errors:
+                logger.error('Invocation: %s, Invalid changes request: ' + json.dumps(errors), logging_context)
+                return api_response.response({'errors': errors}, 400)
+            if not item_changes.is_within_retention(since):
+                msg = 'since is older than the ' + str(item_changes.change_retention_days) + \
+                      ' days changes are kept, all items must be reloaded.'
+                return api_response.response({'errors': [msg]}, 410)
+            return api_response.response(item_changes.get_delta(data_table, schema_name, since,
+                                                                list_request['attributes']),
+                                         200, {'ETag': etag}, event=event)
+
+        if event.get('queryStringParameters'):
+            # Paginated, filtered or projected list served from the name index.
+            list_request, errors = item_list.get_list_request(event['queryStringParameters'], schema)
+            if errors:
+                logger.error('Invocation: %s, Invalid list request: ' + json.dumps(errors), logging_context)
+                return api_response.response({'errors': errors}, 400)
+            return api_response.response(item_list.list_items(data_table, list_request, schema_name),
+                                         200, {'ETag': etag}, event=event)
+
         item = item_validation.scan_dynamodb_data_table(data_table)
         newitem = sorted(item, key=lambda i: i[schema_name + '_name'])
-        return {'headers': {**default_http_headers},
-                'body': json.dumps(newitem)}
+        return api_response.response(newitem, 200, {'ETag': etag}, event=event)
 
     elif event['httpMethod'] == 'POST':
         auth = MFAuth()
@@ -92,8 +121,7 @@ def lambda_handler(event, context):
 
             except Exception as e:
                 logger.error('Invocation: %s, ' + json.dumps(e))
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': json.dumps({'errors': ['malformed json input']})}
+                return api_response.response({'errors': ['malformed json input']}, 400)
             if type(body) is dict:
                 # convert to list and process.
                 logger.debug('Invocation: %s, DICT provided, converting to single item list.', logging_context)
@@ -107,18 +135,13 @@ def lambda_handler(event, context):
                     logger.debug('Invocation: %s, Checking '+ schema_name + '_name exists.',logging_context)
                     if schema_name + '_name' not in record:
                         logger.error('Invocation: %s, attribute ' + schema_name + '_name is required', logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': 'attribute ' + schema_name + '_name is required'}
+                        return api_response.response('attribute ' + schema_name + '_name is required', 400)
                     logger.debug('Invocation: %s, Checking '+ schema_name + '_id does not exist.', logging_context)
                     if schema_name + '_id' in record:
                         logger.error('Invocation: %s, You cannot create ' + schema_name +
                                      '_id, this is managed by the system', logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': "You cannot create " + schema_name +
-                                                           "_id, this is managed by the system"}
-
-                # Get Data table content
-                existing_itemlist = item_validation.scan_dynamodb_data_table(data_table)
+                        return api_response.response("You cannot create " + schema_name +
+                                                     "_id, this is managed by the system", 400)
 
                 # Create record audit.
                 newAudit = {}
@@ -130,10 +153,9 @@ def lambda_handler(event, context):
                 client_ddb = boto3.client('dynamodb')
                 # get related data for validation
                 related_data = item_validation.get_relationship_data(body, schema)
+                compiled_schema = item_validation.get_compiled_schema(schema)
 
-                # Get vacant {schema}_id
-                item_id = get_vacant_id(existing_itemlist, schema_name)
-                item_name_list = []
+                item_name_list = set()
                 item_name_duplicates = []
                 item_name_exists = []
 
@@ -142,87 +164,64 @@ def lambda_handler(event, context):
                 # Validate records before putRequest.
                 for item in body:
                     is_valid = True
-                    # Check if the record already exists.
-                    if item_validation.does_item_exist(schema_name + '_name', item[schema_name + '_name'],
-                                                       existing_itemlist):
-                        item_name_exists.append(item[schema_name + '_name'])
-                        is_valid = False
-
                     # Validate record
-                    item_validation_result = item_validation.check_valid_item_create(item, schema, related_data)
+                    item_validation_result = item_validation.check_valid_item_create(item, compiled_schema, related_data)
                     if item_validation_result is not None:
                         items_validation_errors.append({item[schema_name + '_name']: item_validation_result})
                         is_valid = False
 
                     # Check if _name is duplicated in the list passed.
                     if item[schema_name + '_name'] not in item_name_list:
-                        item_name_list.append(item[schema_name + '_name'])
+                        item_name_list.add(item[schema_name + '_name'])
                     else:
                         item_name_duplicates.append(item[schema_name + '_name'])
                         is_valid = False
 
                     if is_valid:
-                        item[schema_name + '_id'] = str(item_id)
-                        item_id += 1
                         # Add audit data to new item.
                         item['_history'] = newAudit
+                        item_list.set_item_type(item, schema_name)
                         # Add item to be processed.
                         items_validated.append(item)
 
-                # Update DynamoDB
-                from boto3.dynamodb.types import TypeSerializer
-                ts = TypeSerializer()
-                responses = []
+                # Allocate a block of {schema}_id for the valid items.
+                if items_validated:
+                    item_id = item_ids.allocate_ids(data_table, schema_name + '_id', len(items_validated))
+                    for item in items_validated:
+                        item[schema_name + '_id'] = str(item_id)
+                        item_id += 1
+
+                # Reserve names of valid items, items with a name already in use are not created.
+                if items_validated:
+                    name_exists_ids = set()
+                    for item in item_names.reserve_names(data_table, schema_name, items_validated):
+                        item_name_exists.append(item[schema_name + '_name'])
+                        name_exists_ids.add(item[schema_name + '_id'])
+                    if name_exists_ids:
+                        items_validated = [item for item in items_validated
+                                           if item[schema_name + '_id'] not in name_exists_ids]
 
                 logger.debug('Invocation: %s, Validated items to process: ' + json.dumps(items_validated), logging_context)
 
                 # if there are valid items then process them only.
+                unprocessed_items = []
                 if items_validated:
-                    start_indx = 0
-
                     logger.info('Invocation: %s, Number of valid items to process: ' + str(len(items_validated)), logging_context)
-                    while True:
-                        itemlist = get_items(items_validated, start_indx, 25)
-                        table_content = []
-                        for item in itemlist:
-                            putrequest = {}
-                            putrequest['PutRequest'] = {'Item': ts.serialize(item)['M']}
-                            table_content.append(putrequest)
-                        resp = client_ddb.batch_write_item(
-                            RequestItems={data_table_name: table_content}
-                        )
-                        if len(resp['UnprocessedItems']) == 0:
-                            logger.debug('Invocation: %s, Successfully wrote ' + str(len(itemlist)) + ' items', logging_context)
-                        else:
-                            # Hit the provisioned write limit
-                            logger.info('Invocation: %s, Hit write limit, backing off then retrying', logging_context)
-                            sleep(5)
-
-                            # Items left over that haven't been inserted
-                            unprocessed_items = resp['UnprocessedItems']
-                            logger.debug('Invocation: %s, Resubmitting items', logging_context)
-                            # Loop until unprocessed items are written
-                            while len(unprocessed_items) > 0:
-                                resp = client_ddb.batch_write_item(
-                                    RequestItems=unprocessed_items
-                                )
-                                # If any items are still left over, add them to the
-                                # list to be written
-                                unprocessed_items = resp['UnprocessedItems']
-
-                                # If there are items left over, we could do with
-                                # sleeping some more
-                                if len(unprocessed_items) > 0:
-                                    sleep(5)
-                            break
-
-                        responses.append(resp)
-                        new_start_indx = start_indx + 25
-                        max_indx = len(items_validated) - 1
-                        if (max_indx >= new_start_indx):
-                            start_indx += 25
-                        else:
-                            break
+                    write_result = bulk_write.put_items(data_table_name, items_validated, schema_name + '_id', client_ddb)
+                    logger.info('Invocation: %s, Write metrics: ' + json.dumps(write_result.metrics), logging_context)
+
+                    if write_result.failed:
+                        # Items not written are reported and their names released.
+                        for item in items_validated:
+                            if item[schema_name + '_id'] in write_result.failed:
+                                unprocessed_items.append({item[schema_name + '_name']:
+                                                          write_result.failed[item[schema_name + '_id']]})
+                                item_names.release_name(schema_name, item[schema_name + '_name'],
+                                                        item[schema_name + '_id'])
+                        items_validated = [item for item in items_validated
+                                           if item[schema_name + '_id'] not in write_result.failed]
+
+                    item_changes.record_changes(schema_name, write_result.succeeded, 'create')
 
                 return_messages = {}
                 has_errors = False
@@ -241,64 +240,330 @@ def lambda_handler(event, context):
                     return_messages['existing_name'] = item_name_exists
                     has_errors = True
 
-                # Check responses for all chunks
-                unprocessed_items = []
-                for response in responses:
-                    if (response['ResponseMetadata']['HTTPStatusCode'] != 200):
-                        if 'UnprocessedItems' in response:
-                            if 'PutRequest' in response['UnprocessedItems']:
-                                unprocessed_items.append(response['UnprocessedItems']['PutRequest'])
-                                has_errors = True
-
                 # add unprocessed items to return messages.
                 if unprocessed_items:
                     return_messages['unprocessed_items'] = unprocessed_items
+                    has_errors = True
 
                 if has_errors:
                     logger.warning('Invocation: %s, ' + json.dumps({'newItems': items_validated, 'errors': return_messages}), logging_context)
-                    return {'headers': {**default_http_headers},
-                            'body': json.dumps({'newItems': items_validated, 'errors': return_messages})}
+                    return api_response.response({'newItems': items_validated, 'errors': return_messages})
                 else:
                     logger.info('Invocation: %s, All items successfully put in table.', logging_context)
                     logger.debug('Invocation: %s, ' + json.dumps({'newItems': items_validated}), logging_context)
-                    return {'headers': {**default_http_headers},
-                            'body': json.dumps({'newItems': items_validated})}
+                    return api_response.response({'newItems': items_validated})
             except Exception as e:
                 logger.error('Invocation: %s, Unhandled exception: ' + str(e), logging_context)
-                return {'headers': {**default_http_headers},
-                                    'statusCode': 500,
-                                    'body': json.dumps({'errors': ['Unhandled API Exception: check logs for detailed error message.']})}
+                return api_response.response(
+                    {'errors': ['Unhandled API Exception: check logs for detailed error message.']}, 500)
 
         else:
             logger.error('Invocation: %s, Authorisation failed: ' + json.dumps(authResponse), logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 401,
-                    'body': json.dumps({'errors': [authResponse]})}
-
-
-def get_items(items, start_indx, num_items):
-    result = []
-    max_indx = len(items) - 1
-    end_indx = start_indx + num_items
-    if end_indx > max_indx:
-        # Not enough items to get requested num_items.
-        end_indx = max_indx + 1
-    for i in range(start_indx, end_indx):
-        result.append(items[i])
-    return result
-
-
-def get_vacant_id(existing_itemlist, schema_name):
-    ids = []
-    for item in existing_itemlist:
-        ids.append(int(item[schema_name + '_id']))
-    ids.sort()
-    if ids:
-        # Get highest id from existing records
-        item_id = ids[-1]
-        # Increment by 1
-        item_id += 1
-    else:
-        # No existing record id allocated, start at 1
-        item_id = 1
-    return item_id
+            return api_response.response({'errors': [authResponse]}, 401)
+
+    elif event['httpMethod'] == 'PATCH':
+        return update_items(event, schema_name, schema, data_table, logging_context)
+
+    elif event['httpMethod'] == 'DELETE':
+        return delete_items(event, schema_name, schema, data_table, logging_context)
+
+
+def is_batch_get(event):
+    return event['httpMethod'] == 'POST' and event.get('resource', '').endswith('/batchget')
+
+
+def get_batch_get_request(event, schema):
+    # Items to read are given as a list of ids in the body with an optional list of attributes to return,
+    # {"ids": [...], "attributes": [...]}. Returns (ids, attributes, errors).
+    errors = []
+    attributes = None
+    try:
+        body = json.loads(event.get('body') or '')
+    except ValueError:
+        return None, None, ['malformed json input']
+    if not isinstance(body, dict) or not isinstance(body.get('ids'), list) or len(body['ids']) == 0:
+        return None, None, ['body must be an object with a non empty list of ids.']
+
+    ids = list(dict.fromkeys(str(item_id) for item_id in body['ids']))
+    if len(ids) > max_batch_get_ids:
+        errors.append('A maximum of ' + str(max_batch_get_ids) + ' ids can be requested.')
+
+    if 'attributes' in body:
+        if not isinstance(body['attributes'], list) or \
+                not all(isinstance(attribute, str) for attribute in body['attributes']):
+            errors.append('attributes must be a list of attribute names.')
+        else:
+            schema_attributes = item_list.get_schema_attributes(schema)
+            for attribute in body['attributes']:
+                if attribute not in schema_attributes:
+                    errors.append('Attribute: ' + attribute + ' is not defined in the ' + schema['schema_name'] +
+                                  ' schema.')
+            attributes = list(dict.fromkeys(body['attributes'])) or None
+
+    return ids, attributes, errors
+
+
+def batch_get_items(event, schema_name, schema, data_table, logging_context):
+    # Items by id in the order requested. Ids that do not exist are returned in missing, and ids that could not be
+    # read, after retries, in unprocessed.
+    ids, attributes, errors = get_batch_get_request(event, schema)
+    if errors:
+        logger.error('Invocation: %s, Invalid batch get request: ' + json.dumps(errors), logging_context)
+        return api_response.response({'errors': errors}, 400)
+
+    items, failed = bulk_read.get_items(data_table, schema_name + '_id', ids, attributes, consistent_read=False)
+    response = {
+        'items': [items[item_id] for item_id in ids if item_id in items],
+        'missing': [item_id for item_id in ids if item_id not in items and item_id not in failed]
+    }
+    if failed:
+        logger.error('Invocation: %s, Items not read: ' + json.dumps(failed), logging_context)
+        response['unprocessed'] = [item_id for item_id in ids if item_id in failed]
+    return api_response.response(response, event=event)
+
+
+def get_delete_request(event, schema):
+    # Items to delete are given as a list of ids in the body, {"ids": [...]}, or as attribute filters in the query
+    # string, e.g. ?wave_id=1. Returns (ids, list_request, errors), list_request holds the filters.
+    errors = []
+    ids = None
+    list_request = None
+    filters = None
+
+    if event.get('body'):
+        try:
+            body = json.loads(event['body'])
+        except ValueError:
+            return None, None, ['malformed json input']
+        if not isinstance(body, dict) or not isinstance(body.get('ids'), list) or len(body['ids']) == 0:
+            errors.append('body must be an object with a non empty list of ids.')
+        else:
+            ids = list(dict.fromkeys(str(item_id) for item_id in body['ids']))
+
+    if event.get('queryStringParameters'):
+        list_request, list_errors = item_list.get_list_request(event['queryStringParameters'], schema)
+        errors.extend(list_errors)
+        if list_request['paginated'] or list_request['attributes'] or 'since' in event['queryStringParameters']:
+            errors.append('Only attribute filters can be used to select items to delete.')
+        filters = list_request['filters']
+
+    if ids is None and not filters and not errors:
+        errors.append('ids or a filter is required to select items to delete.')
+    elif ids is not None and filters:
+        errors.append('ids and filters cannot be combined.')
+
+    return ids, list_request, errors
+
+
+def delete_items(event, schema_name, schema, data_table, logging_context):
+    # Bulk delete of items selected by id or by attribute filters, the result of each item is returned.
+    auth = MFAuth()
+    authResponse = auth.getUserResourceCreationPolicy(event, schema_name)
+    if authResponse['action'] != 'allow':
+        logger.error('Invocation: %s, Authorisation failed: ' + json.dumps(authResponse), logging_context)
+        return api_response.response({'errors': [authResponse]}, 401)
+
+    ids, list_request, errors = get_delete_request(event, schema)
+    if errors:
+        logger.error('Invocation: %s, Invalid delete request: ' + json.dumps(errors), logging_context)
+        return api_response.response({'errors': errors}, 400)
+
+    try:
+        # Names are read before the delete so their reservations can be released.
+        id_attribute = schema_name + '_id'
+        projection = [id_attribute, schema_name + '_name']
+        if ids is not None:
+            items = item_changes.get_items(data_table, id_attribute, ids, projection)
+        else:
+            items, _ = item_list.query_items(data_table, schema_name, list_request['filters'],
+                                             list_request['index_attributes'], projection_attributes=projection)
+            ids = [item[id_attribute] for item in items]
+        items_by_id = {item[id_attribute]: item for item in items}
+
+        write_result = bulk_write.delete_items(data_table.name, list(items_by_id.keys()), id_attribute)
+        logger.info('Invocation: %s, Delete metrics: ' + json.dumps(write_result.metrics), logging_context)
+
+        deleted = set(write_result.succeeded)
+        item_names.release_names(schema_name, [items_by_id[item_id] for item_id in deleted
+                                               if schema_name + '_name' in items_by_id[item_id]])
+        item_changes.record_changes(schema_name, write_result.succeeded, 'delete')
+
+        results = []
+        for item_id in ids:
+            if item_id in deleted:
+                results.append({'id': item_id, 'deleted': True})
+            elif item_id in write_result.failed:
+                results.append({'id': item_id, 'errors': [write_result.failed[item_id]]})
+            else:
+                results.append({'id': item_id, 'errors': [schema_name + ' Id: ' + item_id + ' does not exist']})
+
+        logger.info('Invocation: %s, Deleted ' + str(len(deleted)) + ' of ' + str(len(ids)) + ' items.',
+                    logging_context)
+        return api_response.response({'results': results})
+    except Exception as e:
+        logger.error('Invocation: %s, Unhandled exception: ' + str(e), logging_context)
+        return api_response.response(
+            {'errors': ['Unhandled API Exception: check logs for detailed error message.']}, 500)
+
+
+def get_update_request(body, schema_name):
+    # Checks the body of a bulk update is a list of {id, attributes}, returns the list of errors found.
+    if not isinstance(body, list) or len(body) == 0:
+        return ['body must be a list of {"id": ..., "attributes": {...}} updates.']
+
+    errors = []
+    ids = set()
+    for update in body:
+        if not isinstance(update, dict) or 'id' not in update or not isinstance(update.get('attributes'), dict) \
+                or len(update['attributes']) == 0:
+            errors.append('Each update requires an id and a non empty attributes object.')
+            continue
+        if str(update['id']) in ids:
+            errors.append(schema_name + '_id ' + str(update['id']) + ' is updated more than once.')
+        ids.add(str(update['id']))
+        if schema_name + '_id' in update['attributes']:
+            errors.append('You cannot modify ' + schema_name + '_id, it is managed by the system')
+        if any(name.startswith('_') for name in update['attributes']):
+            errors.append('You cannot modify system attributes, these are managed by the system')
+    return list(dict.fromkeys(errors))
+
+
+def get_conditional_required_errors(data_table, schema_name, compiled_schema, updates):
+    # Conditionally required attributes are checked against the stored item with the update applied, only the
+    # attributes used by the conditions are read. Returns {id: errors} for the updates that fail the check.
+    conditional_rules = [(name, conditions) for name, conditions in compiled_schema.required_rules
+                         if conditions is not None]
+    rule_attributes = set()
+    for name, conditions in conditional_rules:
+        rule_attributes.add(name)
+        rule_attributes.update(query['attribute'] for query in conditions.get('queries', []))
+    checked = [(result['id'], attributes) for result, attributes in updates if rule_attributes.intersection(attributes)]
+    if not checked:
+        return {}
+
+    stored_items, failed = bulk_read.get_items(data_table, schema_name + '_id', [item_id for item_id, _ in checked],
+                                               sorted(rule_attributes))
+    errors = {}
+    for item_id, attributes in checked:
+        if item_id in failed:
+            errors[item_id] = [failed[item_id]]
+            continue
+        if item_id not in stored_items:
+            # Reported as missing by the update.
+            continue
+        item = {name: value for name, value in {**stored_items[item_id], **attributes}.items()
+                if not item_updates.is_empty_value(value)}
+        item_errors = ['Attribute: ' + name + ' is required and not provided.' for name, conditions in conditional_rules
+                       if name not in item and
+                       item_validation.check_attribute_required_conditions(item, conditions)['required']]
+        if item_errors:
+            errors[item_id] = item_errors
+    return errors
+
+
+def update_items(event, schema_name, schema, data_table, logging_context):
+    # Bulk update of attributes, body is a list of {"id": [schema]_id, "attributes": {name: value}}. Attributes with
+    # an empty value are removed, other attributes of the items are not changed.
+    try:
+        body = json.loads(event['body'])
+    except Exception as e:
+        logger.error('Invocation: %s, ' + str(e), logging_context)
+        return api_response.response({'errors': ['malformed json input']}, 400)
+
+    errors = get_update_request(body, schema_name)
+    if errors:
+        logger.error('Invocation: %s, Invalid update request: ' + json.dumps(errors), logging_context)
+        return api_response.response({'errors': errors}, 400)
+
+    # Permissions are checked once for all attributes being updated.
+    attribute_names = item_validation.get_item_attribute_names([update['attributes'] for update in body])
+    auth = MFAuth()
+    authResponse = auth.getUserAttributePolicy({**event, 'body': json.dumps(dict.fromkeys(attribute_names))},
+                                               schema_name)
+    if authResponse['action'] != 'allow':
+        logger.error('Invocation: %s, Authorisation failed: ' + json.dumps(authResponse), logging_context)
+        return api_response.response({'errors': [authResponse]}, 401)
+
+    try:
+        compiled_schema = item_validation.get_compiled_schema(schema)
+        related_data = item_validation.get_relationship_data([update['attributes'] for update in body], schema)
+        always_required = set(name for name, conditions in compiled_schema.required_rules if conditions is None)
+
+        results = [{'id': str(update['id'])} for update in body]
+        valid_updates = []
+        for update, result in zip(body, results):
+            attributes = update['attributes']
+            item_errors = item_validation.validate_item_keys_and_values(
+                {name: value for name, value in attributes.items() if not item_updates.is_empty_value(value)},
+                compiled_schema, related_data)
+            for name in attributes:
+                if name in always_required and item_updates.is_empty_value(attributes[name]):
+                    item_errors.append('Attribute: ' + name + ' is required and not provided.')
+            if item_errors:
+                result['errors'] = item_errors
+                continue
+            valid_updates.append((result, attributes))
+
+        conditional_errors = get_conditional_required_errors(data_table, schema_name, compiled_schema,
+                                                             valid_updates)
+        updates = []
+        renamed_ids = set()
+        # Names reserved by this request, an item that already held its name keeps it if the update fails.
+        reserved_ids = set()
+        for result, attributes in valid_updates:
+            if result['id'] in conditional_errors:
+                result['errors'] = conditional_errors[result['id']]
+                continue
+
+            if schema_name + '_name' in attributes:
+                reserved, created = item_names.acquire_name(data_table, schema_name,
+                                                            attributes[schema_name + '_name'], result['id'])
+                if not reserved:
+                    result['errors'] = [schema_name + '_name: ' + attributes[schema_name + '_name'] +
+                                        ' already exist']
+                    continue
+                renamed_ids.add(result['id'])
+                if created:
+                    reserved_ids.add(result['id'])
+            updates.append((result, attributes))
+
+        # Update record audit.
+        audit = {}
+        if 'user' in authResponse:
+            audit['lastModifiedBy'] = authResponse['user']
+            audit['lastModifiedTimestamp'] = datetime.datetime.utcnow().isoformat()
+
+        updated_ids = []
+        # _item_type is set on every update so items written without it are listed again.
+        update_results = item_updates.update_items(data_table, schema_name + '_id',
+                                                   [(result['id'], item_list.set_item_type({**attributes}, schema_name))
+                                                    for result, attributes in updates],
+                                                   audit)
+        for (result, attributes), (old_values, error) in zip(updates, update_results):
+            if error is not None or old_values is None:
+                result['errors'] = [error if error is not None else
+                                    schema_name + ' Id: ' + result['id'] + ' does not exist']
+                # The new name is only held by items that were updated.
+                if result['id'] in reserved_ids:
+                    item_names.release_name(schema_name, attributes[schema_name + '_name'], result['id'])
+                continue
+
+            result['updated'] = True
+            updated_ids.append(result['id'])
+            old_name = old_values.get(schema_name + '_name')
+            if result['id'] in renamed_ids and old_name is not None and \
+                    item_names.get_name_key(schema_name, old_name) != \
+                    item_names.get_name_key(schema_name, attributes[schema_name + '_name']):
+                item_names.release_name(schema_name, old_name, result['id'])
+
+        if updated_ids:
+            item_changes.record_changes(schema_name, updated_ids, 'update')
+
+        logger.info('Invocation: %s, Updated ' + str(len(updated_ids)) + ' of ' + str(len(body)) + ' items.',
+                    logging_context)
+        return api_response.response({'results': results})
+    except Exception as e:
+        logger.error('Invocation: %s, Unhandled exception: ' + str(e), logging_context)
+        return api_response.response(
+            {'errors': ['Unhandled API Exception: check logs for detailed error message.']}, 500)
+
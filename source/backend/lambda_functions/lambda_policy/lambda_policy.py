@@ -21,6 +21,8 @@ import json
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 import logging
+import item_ids
+import permissions
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.INFO)
 logger = logging.getLogger()
@@ -163,15 +165,8 @@ def lambda_handler(event, context):
             if body['policy_name'] in item['policy_name']:
                 logger.error('Invocation: POST - policy_name: ' + body['policy_name'] + ' already exist.')
                 return {'headers': {**default_http_headers}, 'statusCode': 400, 'body': 'policy_name: ' + body['policy_name'] + ' already exist.'}
-        # Get vacant policy_id
-        ids = []
-        for item in itemlist['Items']:
-            ids.append(int(item['policy_id']))
-        ids.sort()
-        policy_id = 1
-        for id in ids:
-           if policy_id == id:
-               policy_id += 1
+        # Allocate policy_id
+        policy_id = item_ids.allocate_id(policy_table, 'policy_id')
 
         # Update policy item
         resp = policy_table.put_item(
@@ -181,6 +176,7 @@ def lambda_handler(event, context):
                 'entity_access': entity_access
             }
         )
+        permissions.update_policy_groups(str(policy_id))
 
         resp =  policy_table.get_item(Key={'policy_id': str(policy_id)})
         if 'Item' in resp:
@@ -21,6 +21,7 @@ import json
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 import logging
+import permissions
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=logging.INFO)
 logger = logging.getLogger()
@@ -196,6 +197,7 @@ def lambda_handler(event, context):
             }
 
         )
+        permissions.update_policy_groups(policy_id)
 
         logger.info('%s SUCCESSFUL', event['httpMethod'])
         return {'headers': {**default_http_headers},
@@ -216,6 +218,7 @@ def lambda_handler(event, context):
         if policy_id != "":
             delete_resp = policies_table.delete_item(Key={'policy_id': policy_id})
             if delete_resp['ResponseMetadata']['HTTPStatusCode'] == 200:
+                permissions.update_policy_groups(policy_id)
                 logger.info('%s policy_id: %s  was successfully deleted', event['httpMethod'], policy_id)
                 return {'headers': {**default_http_headers},
                         'statusCode': 200, 'body': "policy: " + policy_id + " was successfully deleted"}
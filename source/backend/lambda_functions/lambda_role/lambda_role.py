@@ -22,6 +22,8 @@ import uuid
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 import logging
+import item_ids
+import permissions
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=logging.INFO)
 logger = logging.getLogger()
@@ -104,15 +106,8 @@ def lambda_handler(event, context):
             logger.error('One or more policy_id in %s does not exist', body['policies'])
             return {'headers': {**default_http_headers},
                     'statusCode': 400, 'body': 'One or more policy_id in ' + str(body['policies']) + ' does not exist'}
-        # Get vacant role_id
-        ids = []
-        for item in itemlist['Items']:
-            ids.append(int(item['role_id']))
-        ids.sort()
-        role_id = 1
-        for id in ids:
-            if role_id == id:
-                role_id += 1
+        # Allocate role_id
+        role_id = item_ids.allocate_id(roles_table, 'role_id')
         resp = roles_table.put_item(
             Item={
                 'role_id': str(role_id),
@@ -121,6 +116,7 @@ def lambda_handler(event, context):
                 'groups': body['groups']
             }
         )
+        permissions.update_role_groups(body)
         logger.info('%s SUCCESSFUL', event['httpMethod'])
         return {'headers': {**default_http_headers},
                 'body': json.dumps(resp)}
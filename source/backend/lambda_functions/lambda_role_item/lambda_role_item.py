@@ -22,6 +22,7 @@ import uuid
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
 import logging
+import permissions
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=logging.INFO)
 logger = logging.getLogger()
@@ -99,6 +100,7 @@ def lambda_handler(event, context):
             return {'headers': {**default_http_headers},
                     'statusCode': 400,
                     'body': 'role Id: ' + str(event['pathParameters']['role_id']) + ' does not exist'}
+        previous_role = resp['Item']
 
         # Check if policy id exist
         policyids = []
@@ -133,6 +135,7 @@ def lambda_handler(event, context):
                 'groups': body['groups']
             }
         )
+        permissions.update_role_groups(previous_role, body)
         logger.info('%s SUCCESSFUL', event['httpMethod'])
         return {'headers': {**default_http_headers},
                 'body': json.dumps(resp)}
@@ -143,6 +146,7 @@ def lambda_handler(event, context):
         if 'Item' in resp:
             respdel = role_table.delete_item(Key={'role_id': event['pathParameters']['role_id']})
             if respdel['ResponseMetadata']['HTTPStatusCode'] == 200:
+                permissions.update_role_groups(resp['Item'])
                 logger.info('%s SUCCESSFUL', event['httpMethod'])
                 return {'headers': {**default_http_headers},
                         'statusCode': 200, 'body': "Role " + str(resp['Item']) + " was successfully deleted"}
@@ -17,21 +17,13 @@
 #########################################################################################
 
 import os
-import simplejson as json
+import json
 import boto3
 import datetime
 from boto3.dynamodb.conditions import Key, Attr
+import api_response
+import schema_versions
 
-if 'cors' in os.environ:
-    cors = os.environ['cors']
-else:
-    cors = '*'
-
-default_http_headers = {
-    'Access-Control-Allow-Origin': cors,
-    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
-    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
-}
 application = os.environ['application']
 environment = os.environ['environment']
 
@@ -42,13 +34,11 @@ schema_table = boto3.resource('dynamodb').Table(schema_table_name)
 def lambda_handler(event, context):
     if event['pathParameters'] is None or 'schema_name' not in event['pathParameters']:
         if event['httpMethod'] != 'GET':
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': 'schema name not provided.'}
+            return api_response.response('schema name not provided.', 400)
         else:
             #This is a request for the schema list, return array of schemas.
             schemas = get_schema_list()
-            return {'headers': {**default_http_headers},
-                    'body': json.dumps(schemas)}
+            return api_response.response(schemas)
 
     schema_name = event['pathParameters']['schema_name']
 
@@ -59,58 +49,47 @@ def lambda_handler(event, context):
         resp = schema_table.get_item(Key={'schema_name' : schema_name})
         if 'Item' in resp:
             item = resp['Item']
-            return {'headers': {**default_http_headers},
-                    'body': json.dumps(item)}
+            return api_response.response(item)
         else:
-            return {'headers': {**default_http_headers},
-                    'body': json.dumps([])}
+            return api_response.response([])
     elif event['httpMethod'] == 'DELETE':
-        resp = schema_table.update_item(
-            Item={
+        timestamp = datetime.datetime.utcnow().isoformat()
+        resp = schema_versions.write_schema(schema_table, schema_name, timestamp, item={
               'schema_name': schema_name,
               'schema_type': 'deleted-user',
               'schema_deleted': True,
-              'lastModifiedTimestamp': datetime.datetime.utcnow().isoformat()
+              'lastModifiedTimestamp': timestamp
             }
         )
-        if 'Item' in resp:
-            item = resp['Item']
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': schema_name + ' schema does not exists.'}
+        return api_response.response(resp)
 
     elif event['httpMethod'] == 'POST':
         try:
             body = json.loads(event['body'])
         except:
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': 'malformed json input'}
+            return api_response.response('malformed json input', 400)
 
         resp = schema_table.get_item(Key={'schema_name': schema_name})
         if 'Item' in resp:
             item = resp['Item']
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': schema_name + ' schema already exists.'}
+            return api_response.response(schema_name + ' schema already exists.', 400)
 
         if 'schema_name' not in body:
-            return {'headers': {**default_http_headers},
-                  'statusCode': 400, 'body': 'schema_name not provided.'}
+            return api_response.response('schema_name not provided.', 400)
 
         if 'attributes' not in body:
-            return {'headers': {**default_http_headers},
-                  'statusCode': 400, 'body': 'attributes not provided.'}
-
-        resp = schema_table.put_item(
+            return api_response.response('attributes not provided.', 400)
 
-            Item={
-                'schema_name': body.schema_name,
+        timestamp = datetime.datetime.utcnow().isoformat()
+        # The schema is created under the name in the path, which the existence check above used.
+        resp = schema_versions.write_schema(schema_table, schema_name, timestamp, item={
+                'schema_name': schema_name,
                 'schema_type': 'user',
-                'attributes' : body.attributes,
-                'lastModifiedTimestamp': datetime.datetime.utcnow().isoformat()
+                'attributes' : body['attributes'],
+                'lastModifiedTimestamp': timestamp
             }
-
         )
-        return {'headers': {**default_http_headers},
-                'body': json.dumps(resp)}
+        return api_response.response(resp)
 
     elif event['httpMethod'] == 'PUT':
         try:
@@ -118,8 +97,7 @@ def lambda_handler(event, context):
 
         except:
             print(event['body'])
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': 'malformed json input'}
+            return api_response.response('malformed json input', 400)
 
         if 'update_schema' in body: # Check if this is a main schema update and not attribute.
             updates = False
@@ -142,34 +120,24 @@ def lambda_handler(event, context):
 
             if updates:
                 try:
-                  resp = schema_table.update_item(
-                      Key={'schema_name': schema_name },
-                      UpdateExpression=update_expresssion_set + update_expresssion_remove,
-                      ExpressionAttributeValues=update_expression_values,
-                      ReturnValues='UPDATED_NEW'
+                  resp = schema_versions.write_schema(schema_table, schema_name, update_expression_values[':dt'],
+                      update={
+                          'Key': {'schema_name': schema_name},
+                          'UpdateExpression': update_expresssion_set + update_expresssion_remove,
+                          'ExpressionAttributeValues': update_expression_values
+                      }
                   )
                 except Exception as e:
                   print(e)
                   print(update_expresssion_set + update_expresssion_remove)
-                  return {'headers': {**default_http_headers},
-                          'statusCode': 400,
-                          'body': str(e)}
+                  return api_response.response(str(e), 400)
 
-                if 'Attributes' in resp:
-                    return {'headers': {**default_http_headers},
-                            'body': json.dumps(resp)}
-                else:
-                  return {'headers': {**default_http_headers},
-                          'statusCode': 400,
-                          'body': "Error updating schema."}
+                return api_response.response(resp)
             else:
-              return {'headers': {**default_http_headers},
-                      'body': 'No updates provided.'}
+              return api_response.response('No updates provided.')
 
         if schema_name + '_id' in body:
-          return {'headers': {**default_http_headers},
-                  'statusCode': 400,
-                  'body': "You cannot create " + schema_name + "_id schema, this is managed by the system"}
+          return api_response.response("You cannot create " + schema_name + "_id schema, this is managed by the system", 400)
 
         attributes = []
         names = []
@@ -182,38 +150,29 @@ def lambda_handler(event, context):
         if 'event' in body:
             if body['event'] == 'DELETE':
                if "name" not in body:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: name is required"}
+                    return api_response.response("Attribute Name: name is required", 400)
                for attr in attributes:
                    if attr['name'] == body['name']:
                        attributes.remove(attr)
             if body['event'] == 'PUT':
                 if "update" not in body:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: update is required"}
+                    return api_response.response("Attribute Name: update is required", 400)
                 if "name" not in body:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: name is required"}
+                    return api_response.response("Attribute Name: name is required", 400)
                 if body['update']['type'] == '':
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: 'Type' cannot be empty"}
+                    return api_response.response("Attribute Name: 'Type' cannot be empty", 400)
                 if body['update']['description'] == '':
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: 'Description' cannot be empty"}
+                    return api_response.response("Attribute Name: 'Description' cannot be empty", 400)
                 if body['update']['name'] == '':
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: 'Name' can not be empty"}
+                    return api_response.response("Attribute Name: 'Name' can not be empty", 400)
                 if body['update']['type'] == 'list':
                     if 'listvalue' in body['update']:
                         if body['update']['listvalue'] == '':
-                            return {'headers': {**default_http_headers},
-                                    'statusCode': 400, 'body': "Attribute Name: 'List Value' can not be empty"}
+                            return api_response.response("Attribute Name: 'List Value' can not be empty", 400)
                     else:
-                            return {'headers': {**default_http_headers},
-                                    'statusCode': 400, 'body': "Attribute Name: 'List Value' can not be empty"}
+                            return api_response.response("Attribute Name: 'List Value' can not be empty", 400)
                 if body['update']['name'] in names and body['name'] != body['update']['name']:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Name: " + body['update']['name'] + " already exist"}
+                    return api_response.response("Name: " + body['update']['name'] + " already exist", 400)
                 for attr in attributes:
                     if attr['name'] == body['name']:
                         if body['update']['type'] != 'list' and body['update']['type'] != 'relationship':
@@ -224,54 +183,41 @@ def lambda_handler(event, context):
                         attributes.insert(index, body['update'])
             if body['event'] == 'POST':
                 if "new" not in body:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: new is required"}
+                    return api_response.response("Attribute Name: new is required", 400)
                 if "name" not in body['new']:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: name is required"}
+                    return api_response.response("Attribute Name: name is required", 400)
                 if body['new']['name'] in names:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Name: " + body['new']['name'] + " already exists"}
+                    return api_response.response("Name: " + body['new']['name'] + " already exists", 400)
                 if body['new']['name'] == "":
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name can not be empty"}
+                    return api_response.response("Attribute Name can not be empty", 400)
                 if 'description' not in body['new']:
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': "Attribute Name: 'Description' cannot be empty"}
+                    return api_response.response("Attribute Name: 'Description' cannot be empty", 400)
                 else:
                     if body['new']['description'] == '':
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': "Attribute Name: 'Description' cannot be empty"}
+                        return api_response.response("Attribute Name: 'Description' cannot be empty", 400)
                 if 'type' not in body['new']:
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': "Attribute Name: 'Type' cannot be empty"}
+                        return api_response.response("Attribute Name: 'Type' cannot be empty", 400)
                 else:
                     if body['new']['type'] == '':
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': "Attribute Name: 'Type' cannot be empty"}
+                        return api_response.response("Attribute Name: 'Type' cannot be empty", 400)
                 if body['new']['type'] == 'list':
                     if 'listvalue' in body['new']:
                         if body['new']['listvalue'] == '':
-                            return {'headers': {**default_http_headers},
-                                    'statusCode': 400, 'body': "Attribute Name: 'List Value' can not be empty"}
+                            return api_response.response("Attribute Name: 'List Value' can not be empty", 400)
                     else:
-                            return {'headers': {**default_http_headers},
-                                    'statusCode': 400, 'body': "Attribute Name: 'List Value' can not be empty"}
+                            return api_response.response("Attribute Name: 'List Value' can not be empty", 400)
                 attributes.append(body['new'])
         else:
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': "Attribute Name: event is required"}
-        resp = schema_table.put_item(
-
-            Item={
+            return api_response.response("Attribute Name: event is required", 400)
+        timestamp = datetime.datetime.utcnow().isoformat()
+        resp = schema_versions.write_schema(schema_table, schema_name, timestamp, item={
                 'schema_name': schema_name,
                 'schema_type': 'user',
                 'attributes': attributes,
-                'lastModifiedTimestamp': datetime.datetime.utcnow().isoformat()
+                'lastModifiedTimestamp': timestamp
             }
         )
-        return {'headers': {**default_http_headers},
-                'body': json.dumps(resp)}
+        return api_response.response(resp)
 
 def get_schema_list():
     response = schema_table.scan(ConsistentRead=True)
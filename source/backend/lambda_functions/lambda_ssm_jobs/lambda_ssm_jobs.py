@@ -4,21 +4,12 @@ from datetime import datetime
 import os
 import uuid
 import logging
+import api_response
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.DEBUG)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-if 'cors' in os.environ:
-    cors = os.environ['cors']
-else:
-    cors = '*'
-
-default_http_headers = {
-    'Access-Control-Allow-Origin': cors,
-    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
-    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
-}
 application = os.environ['application']
 environment = os.environ['environment']
 
@@ -66,15 +57,13 @@ def lambda_handler(event, context):
 
         table.put_item(Item=SSMData)
 
-        return {'headers': {**default_http_headers},
-                'body': json.dumps("SSMId: " + SSMData['SSMId'])}
+        return api_response.response(json.dumps("SSMId: " + SSMData['SSMId']))
 
     elif event['httpMethod'] == 'GET':
         logger.info("Processing GET")
         response = table.scan()
         if response["Count"] == 0:
-            return {'headers': {**default_http_headers},
-                        'body': json.dumps([])}
+            return api_response.response([])
 
         SSMJobs = response['Items']
         while 'LastEvaluatedKey' in response:
@@ -94,16 +83,14 @@ def lambda_handler(event, context):
 
         logger.debug(SSMJobs)
 
-        return {'headers': {**default_http_headers},
-                'body': json.dumps(SSMJobs)}
+        return api_response.response(SSMJobs, event=event)
 
     elif event['httpMethod'] == 'DELETE':
         logger.info("Processing DELETE")
         SSMId = event['pathParameters']["jobid"]
         table.delete_item(Key={"SSMId": SSMId})
 
-        return {'headers': {**default_http_headers},
-                'body': SSMId + " deleted"}
+        return api_response.response(SSMId + " deleted")
 
 
 
@@ -13,30 +13,9 @@ logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=lo
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-if 'cors' in os.environ:
-    cors = os.environ['cors']
-else:
-    cors = '*'
-
-default_http_headers = {
-    'Access-Control-Allow-Origin': cors,
-    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
-    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
-}
-
 from policy import MFAuth
+import api_response
 from boto3.dynamodb.conditions import Key
-from decimal import Decimal
-
-
-class JsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return str(obj)
-        elif isinstance(obj, bytes):
-            return str(obj, encoding='utf-8')
-        return json.JSONEncoder.default(self, obj)
-
 
 bucketName = os.environ['scripts_bucket_name']
 application = os.environ['application']
@@ -210,8 +189,7 @@ def lambda_handler(event, context):
             db_response = get_all_default_scripts()
 
             if db_response["Count"] == 0:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(response)}
+                return api_response.response(response)
 
             response = sorted(db_response["Items"], key=lambda d: d['script_name'])
 
@@ -221,8 +199,7 @@ def lambda_handler(event, context):
                                              int(event['pathParameters']['version']))
 
             if 'Item' not in db_response:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(db_response)}
+                return api_response.response(db_response)
 
             if event['pathParameters']['action'] == 'download':
                 logger.info('Invocation: %s, download script requested.', logging_context)
@@ -266,8 +243,7 @@ def lambda_handler(event, context):
                                              int(event['pathParameters']['version']))
 
             if 'Item' not in db_response:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(response)}
+                return api_response.response(response)
 
             response.append(db_response["Item"])
 
@@ -277,13 +253,11 @@ def lambda_handler(event, context):
                          logging_context)
             db_response = get_scripts(event['pathParameters']['scriptid'])
             if db_response["Count"] == 0:
-                return {'headers': {**default_http_headers},
-                        'body': json.dumps(response)}
+                return api_response.response(response)
 
             response = db_response["Items"]
 
-        return {'headers': {**default_http_headers},
-                'body': json.dumps(response, cls=JsonEncoder)}
+        return api_response.response(response, decimal_as_str=True, event=event)
 
     elif event['httpMethod'] == 'POST':
         # Create uuid for this upload, this is required as if multiple of files are being loaded they share the same tmp directory before being cleared.
@@ -307,8 +281,7 @@ def lambda_handler(event, context):
             errorMsg = 'Zip file is not able to be decoded.'
             logger.error('Invocation: %s, ' + errorMsg,
                          logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': errorMsg}
+            return api_response.response(errorMsg, 400)
 
         # Convert binary as UTF-8 --> Binary file
         textFile = open(tempPath, "wb")
@@ -325,16 +298,14 @@ def lambda_handler(event, context):
                 errorMsg = f'Zip file uncompressed contents exceeds maximum size of {ZIP_MAX_SIZE / 1e+6}MBs.'
                 logger.error('Invocation: %s, ' + errorMsg,
                              logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': errorMsg}
+                return api_response.response(errorMsg, 400)
             zip.extractall("/tmp/" + packageUUID)
         except (IOError, zipfile.BadZipfile) as e:
             cleanup_temp(packageUUID)
             errorMsg = 'Invalid zip file.'
             logger.error('Invocation: %s, ' + errorMsg,
                          logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': errorMsg}
+            return api_response.response(errorMsg, 400)
 
         # Check if yaml file exist
         if os.path.isfile('/tmp/' + packageUUID + '/Package-Structure.yml'):
@@ -348,8 +319,7 @@ def lambda_handler(event, context):
             if 'script_name' in body:
                 if body['script_name'] == "" or body['script_name'] == None:
                     errorMsg = 'Script name provided cannot be empty.'
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': errorMsg}
+                    return api_response.response(errorMsg, 400)
                 else:
                     script_name = body['script_name']
             else:
@@ -357,8 +327,7 @@ def lambda_handler(event, context):
                     script_name = parsedYamlFile.get('Name')
                 else:
                     errorMsg = 'Either script_name in body or Name in Package-Structure.yaml is required.'
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': errorMsg}
+                    return api_response.response(errorMsg, 400)
 
             default_list = get_all_default_scripts()
 
@@ -371,8 +340,7 @@ def lambda_handler(event, context):
                 errorMsg = ""
                 if script_name in script_name_list:
                     errorMsg = 'Script name already defined in another package'
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': errorMsg}
+                    return api_response.response(errorMsg, 400)
 
             # Validate if dependencies exist in the package
             dependencies = parsedYamlFile.get("Dependencies")
@@ -388,8 +356,7 @@ def lambda_handler(event, context):
                     errorMsg = "The following dependencies do not exist in the package: " + " ".join(missingFiles)
                     logger.error('Invocation: %s, ' + errorMsg,
                                  logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': errorMsg}
+                    return api_response.response(errorMsg, 400)
 
             cleanup_temp(packageUUID)
 
@@ -454,16 +421,9 @@ def lambda_handler(event, context):
                 logger.error('Invocation: %s, ' + errorMsg,
                              logging_context)
 
-                return {'headers': {**default_http_headers},
-                        'statusCode': 409, 'body': errorMsg}
+                return api_response.response(errorMsg, 409)
 
-            return {
-                'headers': {
-                    **default_http_headers
-                },
-                'body': script_name + " package successfully uploaded with uuid: " + packageUUID,
-                'statusCode': 200
-            }
+            return api_response.response(script_name + " package successfully uploaded with uuid: " + packageUUID)
 
         else:
             cleanup_temp(packageUUID)
@@ -471,8 +431,7 @@ def lambda_handler(event, context):
             logger.error('Invocation: %s, ' + errorMsg,
                          logging_context)
 
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': errorMsg}
+            return api_response.response(errorMsg, 400)
 
     elif event['httpMethod'] == 'PUT':
         # Set variables
@@ -498,8 +457,7 @@ def lambda_handler(event, context):
                 errorMsg = 'Zip file is not able to be decoded.'
                 logger.error('Invocation: %s, ' + errorMsg,
                              logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': errorMsg}
+                return api_response.response(errorMsg, 400)
 
             # Convert binary as UTF-8 --> Binary file
             textFile = open(tempPath, "wb")
@@ -516,16 +474,14 @@ def lambda_handler(event, context):
                     errorMsg = f'Zip file uncompressed contents exceeds maximum size of {ZIP_MAX_SIZE / 1e+6}MBs.'
                     logger.error('Invocation: %s, ' + errorMsg,
                                  logging_context)
-                    return {'headers': {**default_http_headers},
-                            'statusCode': 400, 'body': errorMsg}
+                    return api_response.response(errorMsg, 400)
                 zip.extractall("/tmp/" + packageUUID)
             except (IOError, zipfile.BadZipfile) as e:
                 cleanup_temp(packageUUID)
                 errorMsg = 'Invalid zip file.'
                 logger.error('Invocation: %s, ' + errorMsg,
                              logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': errorMsg}
+                return api_response.response(errorMsg, 400)
 
             # Check if yaml file exist,
             if os.path.isfile('/tmp/' + packageUUID + '/Package-Structure.yml'):
@@ -539,8 +495,7 @@ def lambda_handler(event, context):
                 if 'script_name' in body:
                     if body['script_name'] == "" or body['script_name'] == None:
                         errorMsg = 'Script name provided cannot be empty.'
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': errorMsg}
+                        return api_response.response(errorMsg, 400)
                     else:
                         script_name = body['script_name']
                 else:
@@ -548,8 +503,7 @@ def lambda_handler(event, context):
                         script_name = parsedYamlFile.get('Name')
                     else:
                         errorMsg = 'Either script_name in body or Name in Package-Structure.yaml is required.'
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': errorMsg}
+                        return api_response.response(errorMsg, 400)
 
                 # Check if script name already used
                 def script_name_filter(script):
@@ -566,8 +520,7 @@ def lambda_handler(event, context):
                         errorMsg = 'Script name already defined in another package'
                         logger.error('Invocation: %s, ' + errorMsg,
                                      logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': errorMsg}
+                        return api_response.response(errorMsg, 400)
 
                 # Validate if dependencies exist in the package
                 dependencies = parsedYamlFile.get("Dependencies")
@@ -583,8 +536,7 @@ def lambda_handler(event, context):
                         errorMsg = "The following dependencies do not exist in the package: " + " ".join(missingFiles)
                         logger.error('Invocation: %s, ' + errorMsg,
                                      logging_context)
-                        return {'headers': {**default_http_headers},
-                                'statusCode': 400, 'body': errorMsg}
+                        return api_response.response(errorMsg, 400)
 
                 cleanup_temp(packageUUID)
 
@@ -641,13 +593,7 @@ def lambda_handler(event, context):
                 if '__make_default' in body and body['__make_default']:
                     make_default(event, packageUUID, scriptData, scriptData["version"])
 
-                return {
-                    'headers': {
-                        **default_http_headers
-                    },
-                    'body': script_name + " package successfully updated.",
-                    'statusCode': 200
-                }
+                return api_response.response(script_name + " package successfully updated.")
 
         elif body['action'] == 'update_default':
             logger.debug('Invocation: %s, updating default version of package. UUID:' +
@@ -666,26 +612,18 @@ def lambda_handler(event, context):
                 errorMsg = "The selected version does not exist in the package"
                 logger.error('Invocation: %s, ' + errorMsg,
                              logging_context)
-                return {'headers': {**default_http_headers},
-                        'statusCode': 400, 'body': errorMsg}
+                return api_response.response(errorMsg, 400)
 
             default_item = db_response["Item"]
 
             make_default(event, packageUUID, default_item, body['default'])
 
-            return {
-                'headers': {
-                    **default_http_headers
-                },
-                'body': "Default version changed to: " + str(body['default']),
-                'statusCode': 200
-            }
+            return api_response.response("Default version changed to: " + str(body['default']))
         else:
             errorMsg = 'Update action is not recognized'
             logger.error('Invocation: %s, ' + errorMsg,
                          logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': errorMsg}
+            return api_response.response(errorMsg, 400)
 
     elif event['httpMethod'] == 'DELETE':
         logger.debug('Invocation: %s, deleting package version. UUID:' +
@@ -698,11 +636,9 @@ def lambda_handler(event, context):
             with packages_table.batch_writer() as batch:
                 for item in scan['Items']:
                     batch.delete_item(Key={'package_uuid': item['package_uuid'], 'version': item['version']})
-            return {'headers': {**default_http_headers},
-                    'statusCode': 200, 'body': 'Package ' + packageUUID + " was successfully deleted"}
+            return api_response.response('Package ' + packageUUID + " was successfully deleted")
         else:
             errorMsg = 'Package ' + packageUUID + ' does not exist'
             logger.error('Invocation: %s, ' + errorMsg,
                          logging_context)
-            return {'headers': {**default_http_headers},
-                    'statusCode': 400, 'body': errorMsg}
+            return api_response.response(errorMsg, 400)
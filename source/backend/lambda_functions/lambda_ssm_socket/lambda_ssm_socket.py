@@ -2,11 +2,11 @@ import json
 import boto3
 import os
 import time
-import urllib
 import datetime
-from jose import jwk, jwt
+from jose import jwt
 from jose.utils import base64url_decode
 import logging
+import jwks
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level = logging.DEBUG)
 logger = logging.getLogger()
@@ -15,12 +15,6 @@ logger.setLevel(logging.INFO)
 region = os.environ['region']
 userpool_id = os.environ['userpool_id']
 app_client_id = os.environ['app_client_id']
-keys_url = 'https://cognito-idp.{}.amazonaws.com/{}/.well-known/jwks.json'.format(region, userpool_id)
-# instead of re-downloading the public keys every time
-# we download them only on cold start
-# https://aws.amazon.com/blogs/compute/container-reuse-in-lambda/
-response = urllib.request.urlopen(keys_url)
-keys = json.loads(response.read())['keys']
 
 application = os.environ["application"]
 environment = os.environ["environment"]
@@ -36,17 +30,11 @@ def verify_token(token):
     # get the kid from the headers prior to verification
     headers = jwt.get_unverified_headers(token)
     kid = headers['kid']
-    # search for the kid in the downloaded public keys
-    key_index = -1
-    for i in range(len(keys)):
-        if kid == keys[i]['kid']:
-            key_index = i
-            break
-    if key_index == -1:
+    # get the public key from the keys cached in the container, downloaded on a kid miss
+    public_key = jwks.get_public_key(region, userpool_id, kid)
+    if public_key is None:
         logger.error('Public key not found in jwks.json')
         return False
-    # construct the public key
-    public_key = jwk.construct(keys[key_index])
     # get the last two sections of the token,
     # message and signature (encoded in base64)
     message, encoded_signature = str(token).rsplit('.', 1)
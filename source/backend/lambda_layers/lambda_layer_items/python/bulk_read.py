@@ -0,0 +1,105 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Bulk reads by key from a DynamoDB table. Keys are split into BatchGetItem chunks of 100 which are read
+# concurrently. UnprocessedKeys and throttling errors are retried with the backoff used by bulk_write, and keys that
+# still cannot be read are reported with the error.
+
+import os
+import time
+import logging
+import concurrent.futures
+import botocore.exceptions
+import bulk_write
+import dynamodb_scan
+
+logger = logging.getLogger()
+
+# Maximum number of keys in a BatchGetItem call.
+max_batch_size = 100
+
+if 'bulk_read_workers' in os.environ:
+    max_workers = int(os.environ['bulk_read_workers'])
+else:
+    max_workers = 8
+
+
+def get_request(key_attribute, keys, projection_attributes=None, consistent_read=True):
+    request = {'Keys': [{key_attribute: key} for key in keys], 'ConsistentRead': consistent_read}
+    if projection_attributes:
+        # The key is needed to match the items returned to the keys requested.
+        if key_attribute not in projection_attributes:
+            projection_attributes = list(projection_attributes) + [key_attribute]
+        request.update(dynamodb_scan.get_projection_arguments(projection_attributes))
+    return request
+
+
+def read_batch(table, key_attribute, keys, projection_attributes=None, consistent_read=True):
+    # Reads a single chunk, returns (items read, {key: error}).
+    request = get_request(key_attribute, keys, projection_attributes, consistent_read)
+    items = []
+    attempt = 0
+    while request['Keys']:
+        if attempt > 0:
+            time.sleep(bulk_write.get_backoff_delay(attempt))
+        if attempt >= bulk_write.max_attempts:
+            error = 'Not read after ' + str(bulk_write.max_attempts) + ' attempts.'
+            return items, {key[key_attribute]: error for key in request['Keys']}
+
+        attempt += 1
+        try:
+            resp = table.meta.client.batch_get_item(RequestItems={table.name: request})
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in bulk_write.retryable_error_codes:
+                logger.debug('Batch get from %s throttled, retrying: %s', table.name, str(e))
+                continue
+            return items, {key[key_attribute]: str(e) for key in request['Keys']}
+
+        items.extend(resp['Responses'].get(table.name, []))
+        request = resp.get('UnprocessedKeys', {}).get(table.name, {'Keys': []})
+
+    return items, {}
+
+
+def get_items(table, key_attribute, keys, projection_attributes=None, consistent_read=True):
+    # Returns ({key: item} for the keys that exist, {key: error} for the keys that could not be read).
+    keys = list(dict.fromkeys(keys))
+    batches = [keys[i:i + max_batch_size] for i in range(0, len(keys), max_batch_size)]
+    items = {}
+    failed = {}
+    if len(batches) == 1:
+        results = [read_batch(table, key_attribute, batches[0], projection_attributes, consistent_read)]
+    elif batches:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(
+                lambda batch: read_batch(table, key_attribute, batch, projection_attributes, consistent_read),
+                batches))
+    else:
+        results = []
+
+    for batch_items, batch_failed in results:
+        for item in batch_items:
+            items[item[key_attribute]] = item
+        failed.update(batch_failed)
+
+    if projection_attributes and key_attribute not in projection_attributes:
+        for item in items.values():
+            del item[key_attribute]
+
+    logger.debug('Bulk read from %s: %s keys, %s items, %s failed', table.name, len(keys), len(items), len(failed))
+    return items, failed
@@ -0,0 +1,168 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Bulk writes to a DynamoDB table. Requests are split into BatchWriteItem chunks of 25 which are written
+# concurrently. UnprocessedItems and throttling errors are retried with exponential backoff and full jitter, and
+# the result of every item is reported by key.
+
+import os
+import time
+import random
+import logging
+import concurrent.futures
+import boto3
+import botocore.exceptions
+from boto3.dynamodb.types import TypeSerializer
+
+logger = logging.getLogger()
+
+serializer = TypeSerializer()
+
+# Maximum number of requests in a BatchWriteItem call.
+max_batch_size = 25
+
+if 'bulk_write_workers' in os.environ:
+    max_workers = int(os.environ['bulk_write_workers'])
+else:
+    max_workers = 8
+
+if 'bulk_write_max_attempts' in os.environ:
+    max_attempts = int(os.environ['bulk_write_max_attempts'])
+else:
+    max_attempts = 10
+
+# Backoff in seconds, the delay before retry n is a random value between 0 and min(max_delay, base_delay * 2^n).
+base_delay = 0.05
+max_delay = 5
+
+retryable_error_codes = ['ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded',
+                         'InternalServerError']
+
+
+class BulkWriteResult(object):
+    """Outcome of a bulk write. succeeded lists the keys written, failed maps each key not written to the error."""
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = {}
+        self.metrics = {
+            'items': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'batches': 0,
+            'requests': 0,
+            'retries': 0,
+            'seconds': 0.0,
+            'items_per_second': 0.0
+        }
+
+    def add_batch(self, batch_result):
+        succeeded, failed, requests, retries = batch_result
+        self.succeeded.extend(succeeded)
+        self.failed.update(failed)
+        self.metrics['batches'] += 1
+        self.metrics['requests'] += requests
+        self.metrics['retries'] += retries
+
+
+def get_backoff_delay(attempt):
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def get_request_key(write_request, key_attribute):
+    if 'PutRequest' in write_request:
+        attribute_value = write_request['PutRequest']['Item'][key_attribute]
+    else:
+        attribute_value = write_request['DeleteRequest']['Key'][key_attribute]
+    return list(attribute_value.values())[0]
+
+
+def write_batch(client, table_name, write_requests, key_attribute):
+    # Writes a single chunk, returns (keys written, {key: error}, number of calls, number of retries).
+    pending = write_requests
+    succeeded = []
+    requests = 0
+    attempt = 0
+    while pending:
+        if attempt > 0:
+            time.sleep(get_backoff_delay(attempt))
+        if attempt >= max_attempts:
+            error = 'Not written after ' + str(max_attempts) + ' attempts.'
+            return succeeded, {get_request_key(request, key_attribute): error for request in pending}, requests, \
+                attempt - 1
+
+        requests += 1
+        attempt += 1
+        try:
+            resp = client.batch_write_item(RequestItems={table_name: pending})
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in retryable_error_codes:
+                logger.debug('Batch write to %s throttled, retrying: %s', table_name, str(e))
+                continue
+            return succeeded, {get_request_key(request, key_attribute): str(e) for request in pending}, requests, \
+                attempt - 1
+
+        unprocessed = resp.get('UnprocessedItems', {}).get(table_name, [])
+        unprocessed_keys = set(get_request_key(request, key_attribute) for request in unprocessed)
+        for request in pending:
+            request_key = get_request_key(request, key_attribute)
+            if request_key not in unprocessed_keys:
+                succeeded.append(request_key)
+        pending = unprocessed
+
+    return succeeded, {}, requests, attempt - 1
+
+
+def batch_write(table_name, write_requests, key_attribute, client=None):
+    # Writes a list of low level PutRequest/DeleteRequest write requests, returns a BulkWriteResult.
+    if client is None:
+        client = boto3.client('dynamodb')
+
+    result = BulkWriteResult()
+    result.metrics['items'] = len(write_requests)
+    start = time.perf_counter()
+
+    batches = [write_requests[i:i + max_batch_size] for i in range(0, len(write_requests), max_batch_size)]
+    if len(batches) == 1:
+        result.add_batch(write_batch(client, table_name, batches[0], key_attribute))
+    elif batches:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            futures = [executor.submit(write_batch, client, table_name, batch, key_attribute) for batch in batches]
+            for future in futures:
+                result.add_batch(future.result())
+
+    result.metrics['succeeded'] = len(result.succeeded)
+    result.metrics['failed'] = len(result.failed)
+    result.metrics['seconds'] = round(time.perf_counter() - start, 3)
+    if result.metrics['seconds'] > 0:
+        result.metrics['items_per_second'] = round(result.metrics['succeeded'] / result.metrics['seconds'], 1)
+
+    logger.info('Bulk write to %s: %s', table_name, result.metrics)
+    return result
+
+
+def put_items(table_name, items, key_attribute, client=None):
+    # Writes items given as Python types, returns a BulkWriteResult keyed by key_attribute.
+    write_requests = [{'PutRequest': {'Item': serializer.serialize(item)['M']}} for item in items]
+    return batch_write(table_name, write_requests, key_attribute, client)
+
+
+def delete_items(table_name, keys, key_attribute, client=None):
+    # Deletes the items with key_attribute values keys, returns a BulkWriteResult.
+    write_requests = [{'DeleteRequest': {'Key': {key_attribute: serializer.serialize(key)}}} for key in keys]
+    return batch_write(table_name, write_requests, key_attribute, client)
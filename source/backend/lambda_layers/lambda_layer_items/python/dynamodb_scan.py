@@ -0,0 +1,161 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Full table scans of the factory data tables. Tables larger than scan_segment_size bytes are read as a parallel
+# scan using Segment/TotalSegments, one worker thread per segment up to scan_max_segments. Smaller tables, or
+# where the table size cannot be read, are scanned serially as before.
+
+import os
+import math
+import time
+import logging
+import concurrent.futures
+import botocore.exceptions
+
+logger = logging.getLogger()
+
+if 'scan_max_segments' in os.environ:
+    max_segments = int(os.environ['scan_max_segments'])
+else:
+    max_segments = 8
+
+if 'scan_segment_size' in os.environ:
+    segment_size_bytes = int(os.environ['scan_segment_size'])
+else:
+    segment_size_bytes = 4 * 1024 * 1024
+
+# Optional fixed number of segments, overrides the size based calculation.
+if 'scan_total_segments' in os.environ:
+    default_total_segments = int(os.environ['scan_total_segments'])
+else:
+    default_total_segments = None
+
+# DynamoDB only updates the table size about every 6 hours, so there is no need to describe the table each scan.
+table_size_ttl = 300
+
+# Maximum number of segments allowed by DynamoDB.
+max_total_segments = 1000000
+
+# table name -> (TableSizeBytes, monotonic time read)
+_table_sizes = {}
+
+
+def get_projection_arguments(projection_attributes):
+    # Attribute names are passed as placeholders as they may be DynamoDB reserved words.
+    expression_attribute_names = {}
+    for projection_attribute in projection_attributes:
+        expression_attribute_names['#p' + str(len(expression_attribute_names))] = projection_attribute
+
+    return {
+        'ProjectionExpression': ', '.join(expression_attribute_names.keys()),
+        'ExpressionAttributeNames': expression_attribute_names
+    }
+
+
+def get_table_size(table):
+    cached = _table_sizes.get(table.name)
+    if cached is not None and time.monotonic() - cached[1] < table_size_ttl:
+        return cached[0]
+
+    try:
+        table_size = table.meta.client.describe_table(TableName=table.name)['Table'].get('TableSizeBytes', 0)
+    except botocore.exceptions.ClientError as e:
+        logger.debug('Unable to describe table %s, scanning serially: %s', table.name, str(e))
+        table_size = None
+
+    _table_sizes[table.name] = (table_size, time.monotonic())
+    return table_size
+
+
+def get_total_segments(table, total_segments=None):
+    if total_segments is None:
+        total_segments = default_total_segments
+
+    if total_segments is None:
+        table_size = get_table_size(table)
+        if not table_size:
+            return 1
+        total_segments = min(max_segments, math.ceil(table_size / segment_size_bytes))
+
+    return max(1, min(int(total_segments), max_total_segments))
+
+
+def scan_page(client, scan_arguments, exclusive_start_key=None):
+    if exclusive_start_key is not None:
+        return client.scan(ExclusiveStartKey=exclusive_start_key, **scan_arguments)
+    return client.scan(**scan_arguments)
+
+
+def iter_scan_pages(table, projection_attributes=None, total_segments=None, consistent_read=True,
+                    **scan_arguments):
+    # Yields the items of each scan page as it is returned. Additional scan arguments, for example
+    # FilterExpression, are passed through to every scan request.
+    client = table.meta.client
+    scan_arguments['TableName'] = table.name
+    scan_arguments['ConsistentRead'] = consistent_read
+    if projection_attributes:
+        scan_arguments.update(get_projection_arguments(projection_attributes))
+
+    total_segments = get_total_segments(table, total_segments)
+
+    if total_segments == 1:
+        response = scan_page(client, scan_arguments)
+        yield response['Items']
+        while 'LastEvaluatedKey' in response:
+            logger.debug('Scan of %s continuing from %s', table.name, response['LastEvaluatedKey'])
+            response = scan_page(client, scan_arguments, response['LastEvaluatedKey'])
+            yield response['Items']
+        return
+
+    logger.debug('Scanning %s using %s segments', table.name, total_segments)
+
+    # segment -> ExclusiveStartKey of the next page, segments are removed once complete.
+    pending_segments = {segment: None for segment in range(total_segments)}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=total_segments) as executor:
+        while pending_segments:
+            # Each round requests the next page of every incomplete segment, so at most one page per segment is
+            # held in memory at any time.
+            futures = {}
+            for segment, exclusive_start_key in pending_segments.items():
+                segment_arguments = {**scan_arguments, 'Segment': segment, 'TotalSegments': total_segments}
+                future = executor.submit(scan_page, client, segment_arguments, exclusive_start_key)
+                futures[future] = segment
+
+            for future in concurrent.futures.as_completed(futures):
+                response = future.result()
+                segment = futures[future]
+                if 'LastEvaluatedKey' in response:
+                    pending_segments[segment] = response['LastEvaluatedKey']
+                else:
+                    del pending_segments[segment]
+                yield response['Items']
+
+
+def iter_scan_table(table, projection_attributes=None, total_segments=None, consistent_read=True,
+                    **scan_arguments):
+    # Streaming interface, yields items one at a time without holding the whole table in memory.
+    for items in iter_scan_pages(table, projection_attributes, total_segments, consistent_read, **scan_arguments):
+        for item in items:
+            yield item
+
+
+def scan_table(table, projection_attributes=None, total_segments=None, consistent_read=True, **scan_arguments):
+    scan_data = []
+    for items in iter_scan_pages(table, projection_attributes, total_segments, consistent_read, **scan_arguments):
+        scan_data.extend(items)
+    return scan_data
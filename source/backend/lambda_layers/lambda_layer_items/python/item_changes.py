@@ -0,0 +1,194 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Change log of the factory data tables, used to return the items changed since a point in time. Every create,
+# update and delete is recorded in the item changes table under the partition of its schema with the sort key
+# {timestamp}#{id}, so the changes since a timestamp are a single range query. Records expire after the retention
+# period, deletes are returned as tombstones until then.
+#
+# Recording a change also increments the change version of the schema, held in the versions partition of the same
+# table. Reads use the version as the ETag of their response, so a client whose copy is current is answered with a
+# 304 after a single GetItem.
+
+import os
+import json
+import time
+import datetime
+import hashlib
+import logging
+import boto3
+from boto3.dynamodb.conditions import Key
+import bulk_read
+import bulk_write
+
+logger = logging.getLogger()
+
+timestamp_format = '%Y-%m-%dT%H:%M:%S.%f'
+
+if 'change_retention_days' in os.environ:
+    change_retention_days = int(os.environ['change_retention_days'])
+else:
+    change_retention_days = 30
+
+# Changes are recorded after the item is written, so a change can become visible shortly after a later query
+# started. The timestamp returned to continue from is this many seconds before the query.
+since_overlap_seconds = 5
+
+# Partition of the change table holding the change version of each schema.
+versions_partition = '#versions'
+
+_changes_table = None
+
+
+def get_changes_table_name():
+    return '{}-{}-item-changes'.format(os.environ['application'], os.environ['environment'])
+
+
+def get_changes_table():
+    global _changes_table
+    if _changes_table is None:
+        _changes_table = boto3.resource('dynamodb').Table(get_changes_table_name())
+    return _changes_table
+
+
+def get_timestamp(dt=None):
+    if dt is None:
+        dt = datetime.datetime.utcnow()
+    return dt.strftime(timestamp_format)
+
+
+def parse_since(since):
+    # Returns the UTC timestamp string for an ISO 8601 since value, or None if it is not valid. Values without a
+    # time zone are UTC, as are the _history timestamps.
+    try:
+        dt = datetime.datetime.fromisoformat(since.strip().replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return get_timestamp(dt)
+
+
+def get_change_records(schema_name, item_ids, change, timestamp=None):
+    if timestamp is None:
+        timestamp = get_timestamp()
+    expires = int(time.time()) + change_retention_days * 86400
+    return [{'schema_name': schema_name, 'change_key': timestamp + '#' + str(item_id), 'item_id': str(item_id),
+             'change': change, 'expires': expires} for item_id in item_ids]
+
+
+def increment_version(schema_name):
+    get_changes_table().update_item(
+        Key={'schema_name': versions_partition, 'change_key': schema_name},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+
+
+def get_version(schema_name):
+    resp = get_changes_table().get_item(Key={'schema_name': versions_partition, 'change_key': schema_name},
+                                        ConsistentRead=True)
+    return int(resp.get('Item', {}).get('version', 0))
+
+
+def get_etag(schema_name, version, variant=None):
+    # variant identifies the resource read from the schema, e.g. the item id or the query string parameters.
+    etag = schema_name + '-' + str(version)
+    if variant:
+        etag += '-' + hashlib.sha1(json.dumps(variant, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return '"' + etag + '"'
+
+
+def is_not_modified(event, etag):
+    # True if the If-None-Match header of the request matches etag.
+    headers = event.get('headers') or {}
+    for header, value in headers.items():
+        if header.lower() == 'if-none-match' and value:
+            if value.strip() == '*':
+                return True
+            return etag in [tag.strip().replace('W/', '', 1) for tag in value.split(',')]
+    return False
+
+
+def record_change(schema_name, item_id, change):
+    # change is one of create, update or delete.
+    get_changes_table().put_item(Item=get_change_records(schema_name, [item_id], change)[0])
+    increment_version(schema_name)
+
+
+def record_changes(schema_name, item_ids, change):
+    if item_ids:
+        write_result = bulk_write.put_items(get_changes_table_name(),
+                                            get_change_records(schema_name, item_ids, change), 'change_key')
+        if write_result.failed:
+            logger.error('Failed to record %s changes to %s items: %s', change, schema_name,
+                         list(write_result.failed.values())[0])
+        increment_version(schema_name)
+
+
+def is_within_retention(since):
+    oldest = datetime.datetime.utcnow() - datetime.timedelta(days=change_retention_days)
+    return since >= get_timestamp(oldest)
+
+
+def get_changes(schema_name, since):
+    # Returns {item_id: change} of the last change to each item after since.
+    changes = {}
+    query_arguments = {
+        'KeyConditionExpression': Key('schema_name').eq(schema_name) & Key('change_key').gt(since + '#~'),
+        'ProjectionExpression': 'item_id, #change',
+        'ExpressionAttributeNames': {'#change': 'change'}
+    }
+    while True:
+        resp = get_changes_table().query(**query_arguments)
+        for record in resp['Items']:
+            changes[record['item_id']] = record['change']
+        if 'LastEvaluatedKey' not in resp:
+            return changes
+        query_arguments['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+
+def get_items(data_table, id_attribute, item_ids, projection_attributes=None):
+    # Returns the items with the ids given that exist, in no particular order, including the id.
+    if projection_attributes and id_attribute not in projection_attributes:
+        projection_attributes = list(projection_attributes) + [id_attribute]
+    items, failed = bulk_read.get_items(data_table, id_attribute, item_ids, projection_attributes)
+    if failed:
+        # Items not read cannot be told apart from deleted items.
+        raise RuntimeError('Unable to read ' + str(len(failed)) + ' items from ' + data_table.name + ': ' +
+                           next(iter(failed.values())))
+    return list(items.values())
+
+
+def get_delta(data_table, schema_name, since, projection_attributes=None):
+    # Returns the response body for the changes to a schema after since. items holds the current version of items
+    # created or modified, deleted the ids of items deleted, and since the timestamp to request the next delta from.
+    next_since = get_timestamp(datetime.datetime.utcnow() - datetime.timedelta(seconds=since_overlap_seconds))
+    changes = get_changes(schema_name, since)
+    id_attribute = schema_name + '_id'
+
+    items = get_items(data_table, id_attribute, changes.keys(), projection_attributes)
+    existing_ids = set(item[id_attribute] for item in items)
+    if projection_attributes and id_attribute not in projection_attributes:
+        for item in items:
+            del item[id_attribute]
+    items.sort(key=lambda item: item.get(schema_name + '_name', ''))
+
+    deleted = sorted(item_id for item_id, change in changes.items()
+                     if change == 'delete' and item_id not in existing_ids)
+    return {'items': items, 'deleted': deleted, 'since': next_since}
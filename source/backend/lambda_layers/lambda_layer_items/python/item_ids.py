@@ -0,0 +1,90 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Allocation of numeric string ids for the factory tables. The ids table holds the last id allocated for each table,
+# blocks of ids are reserved with a single UpdateItem ADD so concurrent requests never receive the same id.
+# A counter is seeded from the highest id in its table the first time it is used.
+
+import os
+import logging
+import boto3
+import botocore.exceptions
+import dynamodb_scan
+
+logger = logging.getLogger()
+
+_ids_table = None
+
+
+def get_ids_table():
+    global _ids_table
+    if _ids_table is None:
+        ids_table_name = '{}-{}-ids'.format(os.environ['application'], os.environ['environment'])
+        _ids_table = boto3.resource('dynamodb').Table(ids_table_name)
+    return _ids_table
+
+
+def get_max_id(table, id_attribute):
+    # Highest integer id in table, ids that are not integers are ignored.
+    max_id = 0
+    for item in dynamodb_scan.iter_scan_table(table, [id_attribute]):
+        try:
+            max_id = max(max_id, int(item[id_attribute]))
+        except (KeyError, ValueError):
+            continue
+    return max_id
+
+
+def seed_counter(table, id_attribute):
+    # Creates the counter for table starting from the highest existing id. If another request seeds the counter
+    # first its value is kept.
+    max_id = get_max_id(table, id_attribute)
+    try:
+        get_ids_table().put_item(
+            Item={'counter_name': table.name, 'last_id': max_id},
+            ConditionExpression='attribute_not_exists(counter_name)'
+        )
+        logger.info('Seeded id counter for %s from %s.', table.name, max_id)
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def allocate_ids(table, id_attribute, count=1):
+    # Reserves count consecutive ids for table and returns the first as an int.
+    if count < 1:
+        raise ValueError('count must be at least 1.')
+
+    for attempt in range(2):
+        try:
+            resp = get_ids_table().update_item(
+                Key={'counter_name': table.name},
+                UpdateExpression='ADD last_id :count',
+                ConditionExpression='attribute_exists(counter_name)',
+                ExpressionAttributeValues={':count': count},
+                ReturnValues='UPDATED_NEW'
+            )
+            return int(resp['Attributes']['last_id']) - count + 1
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException' or attempt > 0:
+                raise
+        seed_counter(table, id_attribute)
+
+
+def allocate_id(table, id_attribute):
+    return str(allocate_ids(table, id_attribute))
@@ -0,0 +1,123 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Lookups of items by the value of a relationship attribute, e.g. the apps of a wave. Where the data table has an
+# active {attribute}-index GSI the index is queried, otherwise the table is scanned with a filter. Indexes are added
+# with UpdateTable rather than in the CloudFormation template, as CloudFormation can only add one index to a table
+# per stack update, and DynamoDB backfills the index while the table remains available.
+
+import time
+import logging
+import botocore.exceptions
+from boto3.dynamodb.conditions import Key, Attr
+import dynamodb_scan
+
+logger = logging.getLogger()
+
+# Index status is read from DescribeTable at most once per index_status_ttl seconds per warm container.
+index_status_ttl = 300
+
+# (table name, index name) -> (IndexStatus or None if the index does not exist, monotonic time read)
+_index_status = {}
+
+
+def get_index_name(attribute_name):
+    return attribute_name + '-index'
+
+
+def get_index_status(table, index_name):
+    cached = _index_status.get((table.name, index_name))
+    if cached is not None and time.monotonic() - cached[1] < index_status_ttl:
+        return cached[0]
+
+    try:
+        description = table.meta.client.describe_table(TableName=table.name)['Table']
+    except botocore.exceptions.ClientError as e:
+        logger.debug('Unable to describe table %s: %s', table.name, str(e))
+        description = {}
+
+    statuses = {index['IndexName']: index.get('IndexStatus', 'ACTIVE')
+                for index in description.get('GlobalSecondaryIndexes', [])}
+    now = time.monotonic()
+    for name, status in statuses.items():
+        _index_status[(table.name, name)] = (status, now)
+    _index_status[(table.name, index_name)] = (statuses.get(index_name), now)
+    return statuses.get(index_name)
+
+
+def is_index_active(table, index_name):
+    return get_index_status(table, index_name) == 'ACTIVE'
+
+
+def query_index(table, index_name, attribute_name, value, projection_attributes=None):
+    query_arguments = {
+        'IndexName': index_name,
+        'KeyConditionExpression': Key(attribute_name).eq(value)
+    }
+    if projection_attributes:
+        query_arguments.update(dynamodb_scan.get_projection_arguments(projection_attributes))
+
+    items = []
+    while True:
+        response = table.query(**query_arguments)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        query_arguments['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def query_by_attribute(table, attribute_name, value, projection_attributes=None, index_name=None):
+    # Returns the items of table where attribute_name equals value, in no particular order.
+    if index_name is None:
+        index_name = get_index_name(attribute_name)
+    if is_index_active(table, index_name):
+        return query_index(table, index_name, attribute_name, value, projection_attributes)
+
+    logger.debug('No active index %s on %s, scanning with a filter.', index_name, table.name)
+    return dynamodb_scan.scan_table(table, projection_attributes, consistent_read=False,
+                                    FilterExpression=Attr(attribute_name).eq(value))
+
+
+def create_index(table, attribute_name):
+    # Starts creating the {attribute}-index GSI on table. Returns True if the index exists or is being created, False
+    # if it cannot be created now, for example while another index of the table is being created.
+    index_name = get_index_name(attribute_name)
+    if get_index_status(table, index_name) is not None:
+        return True
+
+    try:
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=[{'AttributeName': attribute_name, 'AttributeType': 'S'}],
+            GlobalSecondaryIndexUpdates=[{
+                'Create': {
+                    'IndexName': index_name,
+                    'KeySchema': [{'AttributeName': attribute_name, 'KeyType': 'HASH'}],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            }]
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ['LimitExceededException', 'ResourceInUseException']:
+            logger.warning('Index %s on %s cannot be created now: %s', index_name, table.name, str(e))
+            return False
+        raise
+
+    logger.info('Creating index %s on %s.', index_name, table.name)
+    _index_status[(table.name, index_name)] = ('CREATING', time.monotonic())
+    return True
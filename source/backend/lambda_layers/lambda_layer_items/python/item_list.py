@@ -0,0 +1,327 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Paginated, filtered and projected listing of the factory data tables. Every data item carries the attribute
+# _item_type set to its schema name, which is the partition key of the {schema}_name-index GSI on each data table.
+# Querying that index returns the items of a schema in name order, one page at a time. Filters on attributes the
+# schema declares as indexed query the {attribute}-index GSI instead, see item_indexes.
+#
+# All items of a table share the same _item_type value, so the name index holds them in a single partition and
+# writes to a data table are limited to the write throughput of one GSI partition, about 1000 write units per second
+# (one unit per KB of item written). Writes beyond that are throttled on the table as well as the index. Bulk
+# writes, bulk_write.put_items and the import jobs, retry throttled items with backoff, so large imports slow down
+# to that rate rather than fail. Every writer of a data table must set _item_type with set_item_type, items without
+# it are missing from listings until backfill_item_type runs on the next stack update.
+
+import json
+import base64
+import binascii
+import logging
+from boto3.dynamodb.conditions import Key, Attr
+import dynamodb_scan
+import item_indexes
+
+logger = logging.getLogger()
+
+item_type_attribute = '_item_type'
+
+# Query string parameters used by the list request, any other parameter is an attribute filter.
+list_parameters = ['limit', 'next_token', 'attributes', 'since']
+
+default_list_limit = 100
+max_list_limit = 1000
+
+# Attribute types where the stored value is a list and filters match any of the values.
+multivalue_attribute_types = ['multivalue-string']
+
+
+def get_name_index_name(schema_name):
+    return schema_name + '_name-index'
+
+
+def set_item_type(item, schema_name):
+    item[item_type_attribute] = schema_name
+    return item
+
+
+def get_index_key_attributes(schema_name):
+    return [schema_name + '_id', item_type_attribute, schema_name + '_name']
+
+
+def encode_next_token(last_evaluated_key):
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode('utf-8')).decode('utf-8')
+
+
+def get_token_index_attribute(last_evaluated_key, schema_name):
+    # Returns the attribute of the index an attribute index query key is from, or None for a name index key.
+    attributes = [key for key in last_evaluated_key if key != schema_name + '_id']
+    if len(last_evaluated_key) == 2 and len(attributes) == 1 and attributes[0] != item_type_attribute:
+        return attributes[0]
+    return None
+
+
+def decode_next_token(next_token, schema_name, index_filters=None):
+    # Returns the ExclusiveStartKey encoded in next_token, or None if the token is not valid for this schema. Tokens
+    # from an attribute index query are only valid with the same filter, index_filters is {attribute: value} of the
+    # indexed attribute filters of the request.
+    try:
+        last_evaluated_key = json.loads(base64.urlsafe_b64decode(next_token.encode('utf-8')))
+    except (ValueError, binascii.Error):
+        return None
+
+    if not isinstance(last_evaluated_key, dict) or \
+            not all(isinstance(value, str) for value in last_evaluated_key.values()):
+        return None
+
+    if sorted(last_evaluated_key.keys()) == sorted(get_index_key_attributes(schema_name)) and \
+            last_evaluated_key[item_type_attribute] == schema_name:
+        return last_evaluated_key
+
+    index_attribute = get_token_index_attribute(last_evaluated_key, schema_name)
+    if index_attribute is not None and schema_name + '_id' in last_evaluated_key and index_filters and \
+            index_filters.get(index_attribute) == last_evaluated_key[index_attribute]:
+        return last_evaluated_key
+
+    return None
+
+
+def get_schema_attributes(schema):
+    schema_attributes = {schema['schema_name'] + '_id': {'name': schema['schema_name'] + '_id', 'type': 'string'}}
+    for attribute in schema['attributes']:
+        if attribute['name'] not in schema_attributes:
+            schema_attributes[attribute['name']] = attribute
+    return schema_attributes
+
+
+def get_filter_value(attribute, value):
+    if attribute['type'] == 'checkbox':
+        return value.lower() == 'true'
+    return value
+
+
+def is_multivalue_attribute(attribute):
+    return attribute['type'] in multivalue_attribute_types or \
+        ('listMultiSelect' in attribute and attribute['listMultiSelect'])
+
+
+def get_indexed_attributes(schema):
+    # Attributes declared with "indexed": true in the schema. Only single value string attributes can be the key of
+    # an index, as the indexes are created with a string partition key.
+    return [attribute['name'] for attribute in schema['attributes']
+            if attribute.get('indexed') and attribute['type'] != 'checkbox' and not is_multivalue_attribute(attribute)]
+
+
+def get_list_request(query_string_parameters, schema):
+    # Parses the list query string parameters. Returns the list request and a list of errors, the request is only
+    # valid if no errors are returned.
+    schema_name = schema['schema_name']
+    schema_attributes = get_schema_attributes(schema)
+    errors = []
+    list_request = {
+        'paginated': 'limit' in query_string_parameters or 'next_token' in query_string_parameters,
+        'limit': None,
+        'exclusive_start_key': None,
+        'attributes': None,
+        'filters': [],
+        'index_attributes': []
+    }
+
+    indexed_attributes = get_indexed_attributes(schema)
+    index_filters = {parameter: value for parameter, value in query_string_parameters.items()
+                     if parameter not in list_parameters and parameter in indexed_attributes}
+
+    if list_request['paginated']:
+        list_request['limit'] = default_list_limit
+
+    if 'limit' in query_string_parameters:
+        try:
+            limit = int(query_string_parameters['limit'])
+            if limit < 1 or limit > max_list_limit:
+                raise ValueError()
+            list_request['limit'] = limit
+        except ValueError:
+            errors.append('limit must be a number between 1 and ' + str(max_list_limit) + '.')
+
+    if 'next_token' in query_string_parameters:
+        list_request['exclusive_start_key'] = decode_next_token(query_string_parameters['next_token'], schema_name,
+                                                              index_filters)
+        if list_request['exclusive_start_key'] is None:
+            errors.append('next_token is not valid.')
+
+    if 'attributes' in query_string_parameters:
+        attributes = [attribute.strip() for attribute in query_string_parameters['attributes'].split(',')
+                      if attribute.strip() != '']
+        for attribute in attributes:
+            if attribute not in schema_attributes:
+                errors.append('Attribute: ' + attribute + ' is not defined in the ' + schema_name + ' schema.')
+        if attributes:
+            list_request['attributes'] = list(dict.fromkeys(attributes))
+
+    for parameter, value in query_string_parameters.items():
+        if parameter in list_parameters:
+            continue
+        if parameter not in schema_attributes:
+            errors.append('Filter attribute: ' + parameter + ' is not defined in the ' + schema_name + ' schema.')
+            continue
+        attribute = schema_attributes[parameter]
+        list_request['filters'].append((parameter, get_filter_value(attribute, value),
+                                        is_multivalue_attribute(attribute)))
+        if parameter in index_filters:
+            list_request['index_attributes'].append(parameter)
+
+    return list_request, errors
+
+
+def get_filter_expression(filters):
+    filter_expression = None
+    for attribute_name, value, multivalue in filters:
+        if multivalue:
+            condition = Attr(attribute_name).contains(value)
+        else:
+            condition = Attr(attribute_name).eq(value)
+        filter_expression = condition if filter_expression is None else filter_expression & condition
+    return filter_expression
+
+
+def query_name_index(data_table, schema_name, limit=None, exclusive_start_key=None, filters=None,
+                     projection_attributes=None):
+    # Returns up to limit items in name order starting after exclusive_start_key, and the key to continue from, or
+    # None if there are no more items. Without a limit all items are returned.
+    query_arguments = {
+        'IndexName': get_name_index_name(schema_name),
+        'KeyConditionExpression': Key(item_type_attribute).eq(schema_name)
+    }
+    return query_index_pages(data_table, query_arguments, get_index_key_attributes(schema_name), limit,
+                             exclusive_start_key, filters, projection_attributes)
+
+
+def query_attribute_index(data_table, schema_name, attribute_name, value, limit=None, exclusive_start_key=None,
+                          filters=None, projection_attributes=None):
+    # As query_name_index, reading only the items where attribute_name equals value from the {attribute}-index.
+    # Items are returned in index order, not name order.
+    query_arguments = {
+        'IndexName': item_indexes.get_index_name(attribute_name),
+        'KeyConditionExpression': Key(attribute_name).eq(value)
+    }
+    return query_index_pages(data_table, query_arguments, [schema_name + '_id', attribute_name], limit,
+                             exclusive_start_key, filters, projection_attributes)
+
+
+def query_index_pages(data_table, query_arguments, key_attributes, limit=None, exclusive_start_key=None,
+                      filters=None, projection_attributes=None):
+    if filters:
+        query_arguments['FilterExpression'] = get_filter_expression(filters)
+    if projection_attributes:
+        # The index key attributes are needed to continue from the last item returned.
+        query_attributes = list(projection_attributes) + \
+            [key for key in key_attributes if key not in projection_attributes]
+        query_arguments.update(dynamodb_scan.get_projection_arguments(query_attributes))
+
+    items = []
+    last_evaluated_key = exclusive_start_key
+    while True:
+        if last_evaluated_key is not None:
+            query_arguments['ExclusiveStartKey'] = last_evaluated_key
+        # Limit applies before the filter, so filtered queries read full pages and stop part way through a page.
+        if limit is not None and not filters:
+            query_arguments['Limit'] = limit - len(items)
+
+        response = data_table.query(**query_arguments)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+
+        if limit is not None and len(items) + len(response['Items']) >= limit:
+            page_items = response['Items'][:limit - len(items)]
+            items.extend(page_items)
+            if len(page_items) < len(response['Items']):
+                last_evaluated_key = {key: page_items[-1][key] for key in key_attributes}
+            break
+
+        items.extend(response['Items'])
+        if last_evaluated_key is None:
+            break
+
+    if projection_attributes:
+        for item in items:
+            for key in key_attributes:
+                if key not in projection_attributes:
+                    item.pop(key, None)
+
+    return items, last_evaluated_key
+
+
+def get_query_index_attribute(data_table, schema_name, index_attributes, exclusive_start_key=None):
+    # The indexed attribute filter to query the attribute index of, or None to query the name index. A request
+    # continuing from a previous page uses the index the page was read from.
+    if exclusive_start_key is not None:
+        return get_token_index_attribute(exclusive_start_key, schema_name)
+    for attribute_name in index_attributes or []:
+        if item_indexes.is_index_active(data_table, item_indexes.get_index_name(attribute_name)):
+            return attribute_name
+    return None
+
+
+def query_items(data_table, schema_name, filters=None, index_attributes=None, limit=None, exclusive_start_key=None,
+                projection_attributes=None):
+    # Returns the items matching filters as query_name_index. Where one of the index_attributes filters has an active
+    # index that index is queried, otherwise the filters are applied to the name index query.
+    index_attribute = get_query_index_attribute(data_table, schema_name, index_attributes, exclusive_start_key)
+    if index_attribute is None:
+        return query_name_index(data_table, schema_name, limit, exclusive_start_key, filters, projection_attributes)
+
+    value = next(value for attribute_name, value, _ in filters if attribute_name == index_attribute)
+    other_filters = [item_filter for item_filter in filters if item_filter[0] != index_attribute]
+    return query_attribute_index(data_table, schema_name, index_attribute, value, limit, exclusive_start_key,
+                                 other_filters, projection_attributes)
+
+
+def list_items(data_table, list_request, schema_name):
+    # Returns the response body for a list request.
+    items, last_evaluated_key = query_items(data_table, schema_name,
+                                            list_request['filters'],
+                                            list_request['index_attributes'],
+                                            list_request['limit'],
+                                            list_request['exclusive_start_key'],
+                                            list_request['attributes'])
+    if not list_request['paginated']:
+        # Attribute index results are not in name order.
+        if list_request['index_attributes']:
+            items = sorted(items, key=lambda item: item.get(schema_name + '_name', ''))
+        return items
+
+    response = {'items': items}
+    if last_evaluated_key is not None:
+        response['next_token'] = encode_next_token(last_evaluated_key)
+    return response
+
+
+def backfill_item_type(data_table, schema_name):
+    # Sets _item_type on items created before the name index was added, returns the number of items updated.
+    id_attribute = schema_name + '_id'
+    updated = 0
+    for item in dynamodb_scan.iter_scan_table(data_table, [id_attribute], consistent_read=False,
+                                              FilterExpression=Attr(item_type_attribute).not_exists()):
+        data_table.update_item(
+            Key={id_attribute: item[id_attribute]},
+            UpdateExpression='SET #item_type = :item_type',
+            ConditionExpression='attribute_exists(#id)',
+            ExpressionAttributeNames={'#item_type': item_type_attribute, '#id': id_attribute},
+            ExpressionAttributeValues={':item_type': schema_name}
+        )
+        updated += 1
+    logger.info('Set %s on %s items in %s.', item_type_attribute, updated, data_table.name)
+    return updated
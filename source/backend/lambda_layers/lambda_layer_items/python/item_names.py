@@ -0,0 +1,178 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# {schema}_name uniqueness. Each name in use is reserved in the names table under the key {schema}#{lowercase name}
+# with the {schema}_id of the item that holds it. Reservations are conditional puts, so only one of two concurrent
+# requests creating or renaming to the same name succeeds.
+
+import os
+import time
+import logging
+import concurrent.futures
+import boto3
+import botocore.exceptions
+import dynamodb_scan
+
+logger = logging.getLogger()
+
+# Number of concurrent reservations made or released for bulk creates and deletes.
+max_reservation_workers = 10
+
+# Reservations are made before the item is written, a reservation is only treated as stale if it is older than the
+# longest a Lambda invocation can run.
+stale_reservation_age = 900
+
+_names_table = None
+
+
+def get_names_table():
+    global _names_table
+    if _names_table is None:
+        names_table_name = '{}-{}-names'.format(os.environ['application'], os.environ['environment'])
+        _names_table = boto3.resource('dynamodb').Table(names_table_name)
+    return _names_table
+
+
+def get_name_key(schema_name, name):
+    return schema_name + '#' + str(name).lower()
+
+
+def is_condition_failure(e):
+    return e.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def is_reservation_current(data_table, schema_name, name, item_id):
+    # Reservations can be left behind by items removed outside of the API, these no longer hold the name.
+    resp = data_table.get_item(
+        Key={schema_name + '_id': item_id},
+        ProjectionExpression='#name',
+        ExpressionAttributeNames={'#name': schema_name + '_name'},
+        ConsistentRead=True
+    )
+    return 'Item' in resp and get_name_key(schema_name, resp['Item'].get(schema_name + '_name', '')) == \
+        get_name_key(schema_name, name)
+
+
+def acquire_name(data_table, schema_name, name, item_id):
+    # Returns (reserved, created), reserved is True if name is now reserved for item_id and False if it is held by
+    # another item, created is False where item_id already held the reservation. Only reservations created by the
+    # caller should be released when its write fails.
+    names_table = get_names_table()
+    name_key = get_name_key(schema_name, name)
+    try:
+        resp = names_table.put_item(
+            Item={'name_key': name_key, 'item_id': item_id, 'reserved': int(time.time())},
+            ConditionExpression='attribute_not_exists(name_key) OR item_id = :item_id',
+            ExpressionAttributeValues={':item_id': item_id},
+            ReturnValues='ALL_OLD'
+        )
+        return True, not resp.get('Attributes')
+    except botocore.exceptions.ClientError as e:
+        if not is_condition_failure(e):
+            raise
+
+    resp = names_table.get_item(Key={'name_key': name_key}, ConsistentRead=True)
+    if 'Item' not in resp:
+        # Released since the put, try once more.
+        return acquire_name(data_table, schema_name, name, item_id)
+
+    owner_id = resp['Item']['item_id']
+    if time.time() - int(resp['Item'].get('reserved', 0)) < stale_reservation_age or \
+            is_reservation_current(data_table, schema_name, name, owner_id):
+        return False, False
+
+    logger.info('Replacing stale reservation of %s held by %s', name_key, owner_id)
+    try:
+        names_table.put_item(
+            Item={'name_key': name_key, 'item_id': item_id, 'reserved': int(time.time())},
+            ConditionExpression='item_id = :owner_id',
+            ExpressionAttributeValues={':owner_id': owner_id}
+        )
+        return True, True
+    except botocore.exceptions.ClientError as e:
+        if is_condition_failure(e):
+            return False, False
+        raise
+
+
+def reserve_name(data_table, schema_name, name, item_id):
+    # Returns True if name is now reserved for item_id, False if it is held by another item.
+    return acquire_name(data_table, schema_name, name, item_id)[0]
+
+
+def reserve_names(data_table, schema_name, items):
+    # Reserves the names of items, which must already have {schema}_id set. Returns the items whose name is
+    # held by another item.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_reservation_workers) as executor:
+        futures = [executor.submit(reserve_name, data_table, schema_name, item[schema_name + '_name'],
+                                   item[schema_name + '_id'])
+                   for item in items]
+        return [item for item, future in zip(items, futures) if not future.result()]
+
+
+def get_name_owner(schema_name, name):
+    # Returns the {schema}_id holding name, or None if the name is not reserved.
+    resp = get_names_table().get_item(Key={'name_key': get_name_key(schema_name, name)}, ConsistentRead=True)
+    if 'Item' not in resp:
+        return None
+    return resp['Item']['item_id']
+
+
+def release_name(schema_name, name, item_id):
+    # Removes the reservation of name if it is held by item_id.
+    try:
+        get_names_table().delete_item(
+            Key={'name_key': get_name_key(schema_name, name)},
+            ConditionExpression='item_id = :item_id',
+            ExpressionAttributeValues={':item_id': item_id}
+        )
+    except botocore.exceptions.ClientError as e:
+        if not is_condition_failure(e):
+            raise
+
+
+def release_names(schema_name, items):
+    # Releases the names held by items, which must have {schema}_id and {schema}_name set.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_reservation_workers) as executor:
+        futures = [executor.submit(release_name, schema_name, item[schema_name + '_name'], item[schema_name + '_id'])
+                   for item in items]
+        for future in futures:
+            future.result()
+
+
+def backfill_names(data_table, schema_name, names_table=None):
+    # Reserves the names of items created before the names table was added, returns the number of names reserved.
+    # Where existing items already share a name the first one found keeps the reservation.
+    if names_table is None:
+        names_table = get_names_table()
+    reserved = 0
+    for item in dynamodb_scan.iter_scan_table(data_table, [schema_name + '_id', schema_name + '_name']):
+        if schema_name + '_name' not in item:
+            continue
+        try:
+            names_table.put_item(
+                Item={'name_key': get_name_key(schema_name, item[schema_name + '_name']),
+                      'item_id': item[schema_name + '_id'], 'reserved': 0},
+                ConditionExpression='attribute_not_exists(name_key)'
+            )
+            reserved += 1
+        except botocore.exceptions.ClientError as e:
+            if not is_condition_failure(e):
+                raise
+    logger.info('Reserved %s names for %s.', reserved, data_table.name)
+    return reserved
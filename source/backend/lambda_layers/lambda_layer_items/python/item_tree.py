@@ -0,0 +1,97 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# The wave -> application -> server hierarchy. The apps of a wave are read from the wave_id-index of the apps table
+# and the servers of each app from the app_id-index of the servers table, so resolving a wave reads only the items
+# in that wave.
+
+import os
+import logging
+import concurrent.futures
+import boto3
+import item_indexes
+
+logger = logging.getLogger()
+
+# Number of concurrent app_id-index queries.
+max_query_workers = 10
+
+# Servers can be grouped by target account and region (aws_accountid and aws_region of the app) and by OS family.
+group_by_options = ['account', 'os']
+
+
+def get_data_table(schema_name):
+    return boto3.resource('dynamodb').Table(
+        '{}-{}-{}s'.format(os.environ['application'], os.environ['environment'], schema_name))
+
+
+def get_wave_apps(wave_id, apps_table=None):
+    # Apps in the wave sorted by app_name.
+    if apps_table is None:
+        apps_table = get_data_table('app')
+    apps = item_indexes.query_by_attribute(apps_table, 'wave_id', str(wave_id))
+    return sorted(apps, key=lambda app: app.get('app_name', ''))
+
+
+def get_app_servers(app_ids, servers_table=None):
+    # Returns {app_id: servers of the app sorted by server_name}.
+    if servers_table is None:
+        servers_table = get_data_table('server')
+    app_ids = list(dict.fromkeys(app_ids))
+    if not app_ids:
+        return {}
+
+    def get_servers(app_id):
+        servers = item_indexes.query_by_attribute(servers_table, 'app_id', app_id)
+        return sorted(servers, key=lambda server: server.get('server_name', ''))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_query_workers, len(app_ids))) as executor:
+        return dict(zip(app_ids, executor.map(get_servers, app_ids)))
+
+
+def get_wave_tree(wave_id, apps_table=None, servers_table=None):
+    # Apps in the wave sorted by name, each with its servers under the key servers.
+    apps = get_wave_apps(wave_id, apps_table)
+    app_servers = get_app_servers([app['app_id'] for app in apps], servers_table)
+    for app in apps:
+        app['servers'] = app_servers.get(app['app_id'], [])
+    return apps
+
+
+def get_group_values(app, server, group_by):
+    values = {}
+    if 'account' in group_by:
+        values['aws_accountid'] = str(app.get('aws_accountid', '')).strip()
+        values['aws_region'] = str(app.get('aws_region', '')).lower().strip()
+    if 'os' in group_by:
+        values['os_family'] = str(server.get('server_os_family', '')).lower().strip()
+    return values
+
+
+def group_servers(apps, group_by):
+    # Groups the servers of the apps of a tree by target account and region and/or OS family. Returns a list of
+    # groups in the order first seen, each holding its group key values and the servers in the group.
+    groups = {}
+    for app in apps:
+        for server in app['servers']:
+            values = get_group_values(app, server, group_by)
+            group_key = tuple(values.values())
+            if group_key not in groups:
+                groups[group_key] = {**values, 'servers': []}
+            groups[group_key]['servers'].append(server)
+    return list(groups.values())
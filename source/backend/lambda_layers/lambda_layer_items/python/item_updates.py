@@ -0,0 +1,162 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Attribute level updates of items. Only the attributes changed are sent, as SET and REMOVE actions of a single
+# UpdateItem, so write cost does not depend on the size of the item and attributes not in the update are never
+# overwritten. Every update sets a new _version on the item, an opaque string that updates can be conditioned on to
+# detect concurrent writers. It is a string rather than a counter so items stay free of DynamoDB number values.
+
+import os
+import uuid
+import logging
+import concurrent.futures
+import botocore.exceptions
+
+logger = logging.getLogger()
+
+if 'item_update_workers' in os.environ:
+    max_workers = int(os.environ['item_update_workers'])
+else:
+    max_workers = 10
+
+version_attribute = '_version'
+
+
+def is_empty_value(value):
+    # Values the API treats as clearing an attribute.
+    return value == '' or value is None or (isinstance(value, list) and len(value) == 1 and value[0] == '')
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_version(item):
+    # Items not updated since versioning was added have the empty version.
+    return item.get(version_attribute, '')
+
+
+def get_expected_version(event):
+    # Version given in the If-Match header of the request, or None if not provided.
+    headers = event.get('headers') or {}
+    for header, value in headers.items():
+        if header.lower() == 'if-match' and value:
+            return value.strip().replace('W/', '', 1).strip('"')
+    return None
+
+
+def get_update_arguments(key, attributes, version, audit=None, new_history=False, expected_version=None):
+    # UpdateItem arguments for key setting attributes and the new version, attributes with an empty value are
+    # removed. audit is a dict of _history entries to set, these are written inside the existing _history map, or as
+    # a new _history map if new_history is set. If expected_version is given the update only succeeds if the item is
+    # at that version.
+    set_actions = []
+    remove_actions = []
+    names = {}
+    values = {}
+
+    for index, (name, value) in enumerate(attributes.items()):
+        names['#a' + str(index)] = name
+        if is_empty_value(value):
+            remove_actions.append('#a' + str(index))
+        else:
+            values[':v' + str(index)] = value
+            set_actions.append('#a' + str(index) + ' = :v' + str(index))
+
+    if audit and new_history:
+        names['#history'] = '_history'
+        values[':history'] = dict(audit)
+        set_actions.append('#history = :history')
+    elif audit:
+        names['#history'] = '_history'
+        for index, (name, value) in enumerate(audit.items()):
+            names['#h' + str(index)] = name
+            values[':h' + str(index)] = value
+            set_actions.append('#history.#h' + str(index) + ' = :h' + str(index))
+
+    names['#version'] = version_attribute
+    values[':version'] = version
+    set_actions.append('#version = :version')
+
+    update_expression = 'SET ' + ', '.join(set_actions)
+    if remove_actions:
+        update_expression += ' REMOVE ' + ', '.join(remove_actions)
+
+    key_attribute = list(key.keys())[0]
+    names['#key'] = key_attribute
+    arguments = {
+        'Key': key,
+        'UpdateExpression': update_expression,
+        'ConditionExpression': 'attribute_exists(#key)',
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+        'ReturnValues': 'UPDATED_OLD'
+    }
+    if expected_version == '':
+        arguments['ConditionExpression'] += ' AND attribute_not_exists(#version)'
+    elif expected_version is not None:
+        arguments['ConditionExpression'] += ' AND #version = :expected_version'
+        values[':expected_version'] = expected_version
+    if audit and new_history:
+        arguments['ConditionExpression'] += ' AND attribute_not_exists(#history)'
+    elif audit:
+        arguments['ConditionExpression'] += ' AND attribute_type(#history, :history_type)'
+        arguments['ExpressionAttributeValues'][':history_type'] = 'M'
+
+    return arguments
+
+
+def update_item(table, key, attributes, version, audit=None, expected_version=None):
+    # Returns the previous values of the attributes updated, or None if there is no item with key or it is not at
+    # expected_version.
+    arguments = get_update_arguments(key, attributes, version, audit, expected_version=expected_version)
+    try:
+        return table.update_item(**arguments).get('Attributes', {})
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        if not audit:
+            return None
+
+    # Items written outside the API can be missing _history, the audit is then set as a new map.
+    arguments = get_update_arguments(key, attributes, version, audit, new_history=True,
+                                     expected_version=expected_version)
+    try:
+        return table.update_item(**arguments).get('Attributes', {})
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+
+
+def update_items(table, key_attribute, updates, audit=None):
+    # Applies updates, a list of (key value, attributes), concurrently. Returns a list in the same order holding
+    # (previous values, error) for each update, previous values is None where the item does not exist.
+    def run_update(key_value, attributes):
+        try:
+            return update_item(table, {key_attribute: key_value}, attributes, new_version(), audit), None
+        except botocore.exceptions.ClientError as e:
+            logger.error('Update of %s %s failed: %s', key_attribute, key_value, str(e))
+            return None, e.response['Error'].get('Message', str(e))
+
+    if len(updates) == 1:
+        return [run_update(*updates[0])]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(updates)))) as executor:
+        futures = [executor.submit(run_update, key_value, attributes) for key_value, attributes in updates]
+        return [future.result() for future in futures]
@@ -1,6 +1,7 @@
 import os
 import boto3
 import re
+import dynamodb_scan
 
 application = os.environ['application']
 environment = os.environ['environment']
@@ -130,32 +131,92 @@ def check_attribute_required_conditions(item, conditions):
     return {'required': return_required, 'hidden': return_hidden}
 
 
+class CompiledSchema(object):
+    """Schema prepared for validating many items. Attribute lookup is by name, validation regexes are compiled
+    and list values are held as sets, so that the per item cost does not depend on the number of attributes in the
+    schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.schema_name = schema.get('schema_name')
+        self.version = schema.get('lastModifiedTimestamp', '')
+        self.attributes = {}
+        self.regex_patterns = {}
+        self.list_values = {}
+
+        for attribute in schema['attributes']:
+            if attribute['name'] in self.attributes:
+                # First definition of an attribute name is used, as per schema order.
+                continue
+            self.attributes[attribute['name']] = attribute
+
+            if attribute['type'] == 'list' and 'listvalue' in attribute:
+                self.list_values[attribute['name']] = frozenset(attribute['listvalue'].split(','))
+            elif attribute['type'] != 'relationship' and 'validation_regex' in attribute \
+                and attribute['validation_regex'] != '':
+                try:
+                    self.regex_patterns[attribute['name']] = re.compile(attribute['validation_regex'])
+                except re.error:
+                    # Leave to validate_value so the error is raised only if the attribute is used.
+                    pass
+
+        if self.schema_name:
+            self.required_attributes = get_required_attributes(schema, True)
+        else:
+            self.required_attributes = []
+
+        # List of (attribute name, conditions), conditions are None where the attribute is always required.
+        self.required_rules = []
+        for attribute in self.required_attributes:
+            if 'required' in attribute and attribute['required']:
+                self.required_rules.append((attribute['name'], None))
+            elif 'conditions' in attribute:
+                self.required_rules.append((attribute['name'], attribute['conditions']))
+
+
+# Compiled schemas kept between invocations, keyed by schema name and version.
+_compiled_schemas = {}
+
+
+def get_compiled_schema(schema):
+    if isinstance(schema, CompiledSchema):
+        return schema
+
+    cache_key = (schema.get('schema_name'), schema.get('lastModifiedTimestamp', ''))
+    compiled_schema = _compiled_schemas.get(cache_key)
+    if compiled_schema is None or compiled_schema.schema is not schema:
+        compiled_schema = CompiledSchema(schema)
+        _compiled_schemas[cache_key] = compiled_schema
+
+    return compiled_schema
+
+
 def check_valid_item_create(item, schema, related_items=None):
     invalid_attributes = []
 
-    required_attributes = get_required_attributes(schema, True)
+    compiled_schema = get_compiled_schema(schema)
 
-    for attribute in required_attributes:
-        if 'required' in attribute and attribute['required']:
+    for attribute_name, conditions in compiled_schema.required_rules:
+        if conditions is None:
             # Attribute is required.
-            if attribute['name'] in item:
-                if not (item[attribute['name']] != '' and item[attribute['name']] is not None):
-                    invalid_attributes.append("Attribute: " + attribute['name'] + " is required and not provided.")
+            if attribute_name in item:
+                if not (item[attribute_name] != '' and item[attribute_name] is not None):
+                    invalid_attributes.append("Attribute: " + attribute_name + " is required and not provided.")
             else:
                 # key not in item, missing required attribute.
-                invalid_attributes.append("Attribute: " + attribute['name'] + " is required and not provided.")
-        elif 'conditions' in attribute:
-            conditions_check_result = check_attribute_required_conditions(item, attribute['conditions'])
+                invalid_attributes.append("Attribute: " + attribute_name + " is required and not provided.")
+        else:
+            conditions_check_result = check_attribute_required_conditions(item, conditions)
             if conditions_check_result['required']:
-                if not (attribute['name'] in item and item[attribute['name']] != '' and item[
-                    attribute['name']] is not None):
-                    invalid_attributes.append("Attribute: " + attribute['name'] + " is required and not provided.")
+                if not (attribute_name in item and item[attribute_name] != '' and item[
+                    attribute_name] is not None):
+                    invalid_attributes.append("Attribute: " + attribute_name + " is required and not provided.")
 
     if len(invalid_attributes) > 0:
         return invalid_attributes
 
     # check that values are correct.
-    validation_errors = validate_item_keys_and_values(item, schema['attributes'], related_items)
+    validation_errors = validate_item_keys_and_values(item, compiled_schema, related_items)
 
     validation_errors.extend(invalid_attributes)
 
@@ -165,10 +226,11 @@ def check_valid_item_create(item, schema, related_items=None):
         return None
 
 
-def validate_value(attribute, value):
+def validate_value(attribute, value, pattern=None):
     std_error = "Error in validation, please check entered value.";
     error = None
-    pattern = re.compile(attribute['validation_regex'])
+    if pattern is None:
+        pattern = re.compile(attribute['validation_regex'])
     if not pattern.match(value):
         # Validation error.
         if 'validation_regex_msg' in attribute:
@@ -179,12 +241,13 @@ def validate_value(attribute, value):
     return error
 
 
-def get_related_items(related_schema_names):
+def get_related_items(related_schema_names, related_schema_keys=None):
+    # related_schema_keys optionally provides {schema name: rel_keys} so that only those attributes are loaded.
     related_items = {}
 
     for related_schema_name in related_schema_names:
         # Check that item is set.
-        if not related_schema_name:
+        if not related_schema_name or related_schema_name in related_items:
             continue
 
         if related_schema_name == 'application':
@@ -194,8 +257,13 @@ def get_related_items(related_schema_names):
 
         related_table_name = '{}-{}-{}s'.format(application, environment, table_name)
 
+        projection_attributes = None
+        if related_schema_keys and related_schema_name in related_schema_keys:
+            projection_attributes = related_schema_keys[related_schema_name]
+
         related_table = boto3.resource('dynamodb').Table(related_table_name)
-        related_table_items = scan_dynamodb_data_table(related_table)  # get all items from related table.
+        # get all items from related table.
+        related_table_items = scan_dynamodb_data_table(related_table, projection_attributes)
         related_items[related_schema_name] = related_table_items
 
     return related_items
@@ -237,7 +305,44 @@ def get_relationship_schema_names(relationship_attributes):
     return relationship_schema_names
 
 
-# Based on the items provided it returns any related data items to be used to validate relationships.
+# Provides the rel_key attributes referenced for each related schema, {rel_entity: [rel_key, ...]}.
+def get_relationship_schema_keys(relationship_attributes):
+    relationship_schema_keys = {}
+    for relationship_attribute in relationship_attributes:
+        if 'rel_entity' not in relationship_attribute or 'rel_key' not in relationship_attribute:
+            continue
+
+        rel_keys = relationship_schema_keys.setdefault(relationship_attribute['rel_entity'], [])
+        if relationship_attribute['rel_key'] not in rel_keys:
+            rel_keys.append(relationship_attribute['rel_key'])
+
+    return relationship_schema_keys
+
+
+# Builds the relationship index {rel_entity: {rel_key: set of values}} from related items loaded per schema.
+def get_relationship_index(related_data, relationship_attributes):
+    relationship_index = {}
+    for relationship_attribute in relationship_attributes:
+        if 'rel_entity' not in relationship_attribute or 'rel_key' not in relationship_attribute:
+            continue
+
+        rel_entity = relationship_attribute['rel_entity']
+        rel_key = relationship_attribute['rel_key']
+        if rel_entity not in related_data:
+            continue
+
+        entity_index = relationship_index.setdefault(rel_entity, {})
+        if rel_key not in entity_index:
+            entity_index[rel_key] = get_related_record_key_set(related_data[rel_entity], rel_key)
+
+    return relationship_index
+
+
+def get_related_record_key_set(related_items, rel_key):
+    return set(related_item[rel_key] for related_item in related_items if rel_key in related_item)
+
+
+# Based on the items provided it returns the relationship index used to validate relationships.
 def get_relationship_data(items, schema):
     # Get duplicated list of attributes being uploaded.
     attribute_names = get_item_attribute_names(items)
@@ -248,13 +353,32 @@ def get_relationship_data(items, schema):
     # extract schema names from related attributes.
     relationship_schema_names = get_relationship_schema_names(relationship_attributes)
 
-    # Get all data for the schema list provided.
-    related_data = get_related_items(relationship_schema_names)
+    # Get the related keys for the schema list provided, each related table is only loaded once.
+    related_data = get_related_items(relationship_schema_names,
+                                     get_relationship_schema_keys(relationship_attributes))
+
+    return get_relationship_index(related_data, relationship_attributes)
+
+
+# Returns the set of rel_key values for the related schema of the attribute. If not present in the relationship
+# index the related table is loaded once and added to the index, so it is reused for all following items.
+def get_related_record_keys(attribute, relationship_index=None):
+    rel_entity = attribute['rel_entity']
+    rel_key = attribute['rel_key']
 
-    return related_data
+    if relationship_index is not None and rel_key in relationship_index.get(rel_entity, {}):
+        return relationship_index[rel_entity][rel_key]
 
+    related_items = get_related_items([rel_entity], {rel_entity: [rel_key]}).get(rel_entity, [])
+    related_record_keys = get_related_record_key_set(related_items, rel_key)
 
-def validate_item_related_record(attribute, value, preloaded_related_items=None):
+    if relationship_index is not None:
+        relationship_index.setdefault(rel_entity, {})[rel_key] = related_record_keys
+
+    return related_record_keys
+
+
+def validate_item_related_record(attribute, value, preloaded_related_keys=None):
     if attribute['type'] != 'relationship':
         return None  # Not a relationship attribute, return success.
 
@@ -262,29 +386,17 @@ def validate_item_related_record(attribute, value, preloaded_related_items=None)
         # invalid relationship attribute.
         return [attribute['name'] + ': Invalid relationship attribute schema or key missing.']
     else:
-        if preloaded_related_items:
-            # Preloaded items provided.
-            related_items = preloaded_related_items
+        if preloaded_related_keys is not None:
+            # Preloaded keys provided.
+            related_record_keys = preloaded_related_keys
         else:
-            # No preloaded item provided, load from DDB table.
-            table_name = attribute['rel_entity']
-            if table_name == 'application':
-                table_name = 'app'
-
-            related_table_name = '{}-{}-{}s'.format(application, environment, table_name)
-
-            related_table = boto3.resource('dynamodb').Table(related_table_name)
-            related_items = scan_dynamodb_data_table(related_table)  # get all items from related table.
+            # No preloaded keys provided, load from DDB table.
+            related_record_keys = get_related_record_keys(attribute)
 
         if 'listMultiSelect' in attribute and attribute['listMultiSelect']:
-            related_records_found = []
             related_records_not_found = []
-            for related_item in related_items:
-                if related_item[attribute['rel_key']] in value:
-                    related_records_found.append(related_item[attribute['rel_key']])
-
             for record_id in value:
-                if record_id not in related_records_found:
+                if record_id not in related_record_keys:
                     related_records_not_found.append(record_id)
 
             if len(related_records_not_found) > 0:
@@ -295,97 +407,79 @@ def validate_item_related_record(attribute, value, preloaded_related_items=None)
                 #  All related IDs found.
                 return None
         else:
-            related_record_found = False
-            for related_item in related_items:
-                if related_item[attribute['rel_key']] == str(value):
-                    related_record_found = True
-
-            if not related_record_found:
+            if str(value) not in related_record_keys:
                 message = attribute['name'] + ':' + value + ' related record does not exist using key ' + \
                           attribute['rel_key']
                 return [message]
             else:
                 return None
 
-    # return [attribute['name'] + ': Unsupported relationship schema ' + attribute['rel_entity']]  # invalid relationship attribute.
-
 
 def validate_item_keys_and_values(item, attributes, related_items=None):
+    # attributes can be a CompiledSchema or the list of attributes from a schema, related_items is the relationship
+    # index returned by get_relationship_data.
+    if isinstance(attributes, CompiledSchema):
+        compiled_schema = attributes
+    else:
+        compiled_schema = CompiledSchema({'attributes': attributes})
+
     errors = []
-    std_error = "Error in validation, please check entered value."
     for key in item.keys():
-        check = False
         if key.startswith('_'):
             #  Ignore system keys.
             continue
-        for attribute in attributes:
-            if key == attribute['name']:
-                check = True
-                if attribute['type'] == 'list' and 'listvalue' in attribute:
-                    listvalue = attribute['listvalue'].split(',')
-                    if 'listMultiSelect' in attribute and attribute['listMultiSelect'] == True:
-                        for item in item[key]:
-                            if item not in listvalue:
-                                message = "Attribute " + key + "'s value does not match any of the allowed values '" + \
-                                          attribute['listvalue'] + "' defined in the schema"
-                                errors.append(message)
-                    else:
-                        if item[key] != '':
-                            if item[key] not in listvalue:
-                                message = "Attribute " + key + "'s value does not match any of the allowed values '" + \
-                                          attribute[
-                                              'listvalue'] + "' defined in the schema"
-                                errors.append(message)
-                elif attribute['type'] == 'relationship':
-                    if related_items and attribute['rel_entity'] in related_items.keys():
-                        related_record_validation = validate_item_related_record(attribute, item[key],
-                                                                                 related_items[attribute['rel_entity']])
-                    else:
-                        # relationship items not preloaded, validate will have to fetch them.
-                        related_record_validation = validate_item_related_record(attribute, item[key])
 
-                    if related_record_validation != None:
-                        errors.append(related_record_validation)
-                else:
-                    if 'validation_regex' in attribute and attribute['validation_regex'] != '' and item[key] != '' and \
-                        item[
-                            key] is not None:
-                        if attribute['type'] == 'multivalue-string':
-                            valid_regex = True
-                            for value in item[key]:
-                                value_validation_result = validate_value(attribute, value)
-                                if value_validation_result != None:
-                                    valid_regex = False
-                            if not valid_regex:
-                                errors.append(value_validation_result)
-                        else:
-                            value_validation_result = validate_value(attribute, item[key])
-                            if value_validation_result != None:
-                                errors.append(value_validation_result)
-                break  # Exit loop as key matched to attribute no need to check other attributes.
-
-        if check == False:
+        attribute = compiled_schema.attributes.get(key)
+        if attribute is None:
             message = "Attribute: " + key + " is not defined in the schema."
             errors.append(message)
+            continue
 
-    return errors
-
-
-def scan_dynamodb_data_table(data_table):
-    response = data_table.scan(ConsistentRead=True)
-    scan_data = response['Items']
-    while 'LastEvaluatedKey' in response:
-        print("Last Evaluate key is   " + str(response['LastEvaluatedKey']))
-        response = data_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'], ConsistentRead=True)
-        scan_data.extend(response['Items'])
-    return scan_data
+        if key in compiled_schema.list_values:
+            listvalue = compiled_schema.list_values[key]
+            if 'listMultiSelect' in attribute and attribute['listMultiSelect'] == True:
+                for value in item[key]:
+                    if value not in listvalue:
+                        message = "Attribute " + key + "'s value does not match any of the allowed values '" + \
+                                  attribute['listvalue'] + "' defined in the schema"
+                        errors.append(message)
+            else:
+                if item[key] != '':
+                    if item[key] not in listvalue:
+                        message = "Attribute " + key + "'s value does not match any of the allowed values '" + \
+                                  attribute[
+                                      'listvalue'] + "' defined in the schema"
+                        errors.append(message)
+        elif attribute['type'] == 'relationship':
+            if 'rel_entity' in attribute and 'rel_key' in attribute:
+                # Keys not already in the relationship index are loaded and added to it.
+                if related_items is None:
+                    related_items = {}
+                related_record_validation = validate_item_related_record(
+                    attribute, item[key], get_related_record_keys(attribute, related_items))
+            else:
+                related_record_validation = validate_item_related_record(attribute, item[key])
+
+            if related_record_validation != None:
+                errors.append(related_record_validation)
+        elif 'validation_regex' in attribute and attribute['validation_regex'] != '' and item[key] != '' and \
+            item[key] is not None:
+            pattern = compiled_schema.regex_patterns.get(key)
+            if attribute['type'] == 'multivalue-string':
+                valid_regex = True
+                for value in item[key]:
+                    value_validation_result = validate_value(attribute, value, pattern)
+                    if value_validation_result != None:
+                        valid_regex = False
+                if not valid_regex:
+                    errors.append(value_validation_result)
+            else:
+                value_validation_result = validate_value(attribute, item[key], pattern)
+                if value_validation_result != None:
+                    errors.append(value_validation_result)
 
+    return errors
 
-def does_item_exist(new_item_key, new_item_value, current_items):
-    # Search current_items for key and value that match.
-    for item in current_items:
-        if new_item_key in item and item[new_item_key] == new_item_value:
-            return True
 
-    # Item not found in current_items.
-    return False
+def scan_dynamodb_data_table(data_table, projection_attributes=None):
+    return dynamodb_scan.scan_table(data_table, projection_attributes)
@@ -0,0 +1,110 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Schema resolution shared by the item Lambdas. Schemas are read with get_item by schema_name and kept in the
+# container between invocations. A cached schema is trusted for schema_cache_ttl seconds, after which only its
+# lastModifiedTimestamp is re-read and the full item is fetched again only if that timestamp has changed.
+
+import os
+import time
+import boto3
+import logging
+
+logger = logging.getLogger()
+
+application = os.environ['application']
+environment = os.environ['environment']
+
+schema_table_name = '{}-{}-schema'.format(application, environment)
+
+if 'schema_cache_ttl' in os.environ:
+    schema_cache_ttl = float(os.environ['schema_cache_ttl'])
+else:
+    schema_cache_ttl = 10
+
+# schema_name -> {'schema': schema item, 'version': lastModifiedTimestamp, 'checked': monotonic time of last check}
+_schema_cache = {}
+_schema_table = None
+
+
+def get_schema_table():
+    global _schema_table
+    if _schema_table is None:
+        _schema_table = boto3.resource('dynamodb').Table(schema_table_name)
+    return _schema_table
+
+
+def get_schema_version(schema):
+    # Default schemas are loaded without a lastModifiedTimestamp, these are treated as version ''.
+    if schema and 'lastModifiedTimestamp' in schema:
+        return schema['lastModifiedTimestamp']
+    return ''
+
+
+def get_schema(schema_name, max_age=None):
+    # Returns the schema item for schema_name or None if it does not exist. The returned item is shared between
+    # invocations and must not be modified by the caller. max_age overrides schema_cache_ttl, passing 0 forces the
+    # version to be re-checked against the table, which write paths use so validation never runs on a stale schema.
+    if max_age is None:
+        max_age = schema_cache_ttl
+
+    now = time.monotonic()
+    cached = _schema_cache.get(schema_name)
+
+    if cached is not None:
+        if now - cached['checked'] < max_age:
+            return cached['schema']
+
+        # Cache entry expired, check if the schema has changed since it was loaded.
+        resp = get_schema_table().get_item(
+            Key={'schema_name': schema_name},
+            ProjectionExpression='schema_name, lastModifiedTimestamp',
+            ConsistentRead=True
+        )
+        if 'Item' not in resp:
+            logger.debug('Schema %s no longer exists, removing from cache.', schema_name)
+            _schema_cache.pop(schema_name, None)
+            return None
+
+        if get_schema_version(resp['Item']) == cached['version']:
+            cached['checked'] = now
+            return cached['schema']
+
+        logger.debug('Schema %s has been modified, reloading.', schema_name)
+
+    resp = get_schema_table().get_item(Key={'schema_name': schema_name}, ConsistentRead=True)
+    if 'Item' not in resp:
+        _schema_cache.pop(schema_name, None)
+        return None
+
+    schema = resp['Item']
+    _schema_cache[schema_name] = {
+        'schema': schema,
+        'version': get_schema_version(schema),
+        'checked': now
+    }
+
+    return schema
+
+
+def invalidate(schema_name=None):
+    # Removes a single schema or all schemas from the cache.
+    if schema_name is None:
+        _schema_cache.clear()
+    else:
+        _schema_cache.pop(schema_name, None)
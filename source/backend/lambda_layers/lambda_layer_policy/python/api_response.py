@@ -0,0 +1,157 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# API Gateway proxy responses. Bodies are encoded with the stdlib C JSON encoder, values it cannot encode natively
+# (Decimal numbers read from DynamoDB, bytes and datetimes) are converted by a default hook, which is only called for
+# those values so plain string items are encoded at full speed.
+#
+# Large bodies are compressed with gzip or deflate when the client accepts it. API Gateway only returns a base64
+# encoded proxy response body to the client as binary when the first media type of the request Accept header is a
+# binary media type of the API, so compression is requested by sending Accept: application/vnd.cmf.compressed+json,
+# which the APIs declare as binary. Request bodies are sent as application/json and are not affected.
+
+import os
+import json
+import gzip
+import zlib
+import base64
+import datetime
+from decimal import Decimal
+
+if 'cors' in os.environ:
+    cors = os.environ['cors']
+else:
+    cors = '*'
+
+default_http_headers = {
+    'Access-Control-Allow-Origin': cors,
+    'Strict-Transport-Security': 'max-age=63072000; includeSubDomains; preload',
+    'Content-Security-Policy' : "base-uri 'self'; upgrade-insecure-requests; default-src 'none'; object-src 'none'; connect-src none; img-src 'self' data:; script-src blob: 'self'; style-src 'self'; font-src 'self' data:; form-action 'self';"
+}
+
+compressed_media_type = 'application/vnd.cmf.compressed+json'
+
+# Encodings in order of preference.
+supported_encodings = ['gzip', 'deflate']
+
+# Bodies smaller than compression_min_size bytes are sent uncompressed, compression_level is the zlib level 1-9.
+compression_min_size = int(os.environ.get('compression_min_size', 4096))
+compression_level = int(os.environ.get('compression_level', 6))
+
+
+def encode_default(value):
+    # Whole Decimals are encoded as integers and others as floats.
+    if isinstance(value, Decimal):
+        if value.is_finite() and value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError('Object of type ' + type(value).__name__ + ' is not JSON serializable')
+
+
+def encode_default_decimal_str(value):
+    # Decimals encoded as strings, the format returned by the script APIs.
+    if isinstance(value, Decimal):
+        return str(value)
+    return encode_default(value)
+
+
+# Response bodies are built fresh for each request and never contain reference cycles, so the circular reference
+# check is skipped.
+_encoder = json.JSONEncoder(default=encode_default, check_circular=False)
+_decimal_str_encoder = json.JSONEncoder(default=encode_default_decimal_str, check_circular=False)
+
+
+def dumps(value, decimal_as_str=False):
+    if decimal_as_str:
+        return _decimal_str_encoder.encode(value)
+    return _encoder.encode(value)
+
+
+def get_header(event, name):
+    # Header names are case insensitive and event headers is None when the request has none.
+    headers = event.get('headers') or {}
+    if name in headers:
+        return headers[name]
+    name = name.lower()
+    for header_name, value in headers.items():
+        if header_name.lower() == name:
+            return value
+    return None
+
+
+def get_response_encoding(event):
+    # The preferred supported encoding in the request Accept-Encoding header, None if the response should not be
+    # compressed.
+    accept = get_header(event, 'Accept')
+    if not accept or accept.split(',')[0].split(';')[0].strip().lower() != compressed_media_type:
+        return None
+
+    accepted = {}
+    for value in (get_header(event, 'Accept-Encoding') or '').split(','):
+        encoding, _, parameters = value.partition(';')
+        quality = 1.0
+        parameter_name, _, parameter_value = parameters.partition('=')
+        if parameter_name.strip().lower() == 'q':
+            try:
+                quality = float(parameter_value)
+            except ValueError:
+                quality = 0.0
+        accepted[encoding.strip().lower()] = quality
+
+    for encoding in supported_encodings:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, level=None):
+    if level is None:
+        level = compression_level
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    # HTTP deflate is the zlib format.
+    return zlib.compress(body, level)
+
+
+def response(body, status_code=200, headers=None, decimal_as_str=False, event=None):
+    # Proxy integration response, body is returned as is if already a string, otherwise encoded as JSON. When the
+    # request event is given, bodies of at least compression_min_size bytes are compressed if the client accepts it.
+    if headers:
+        response_headers = {**default_http_headers, **headers}
+    else:
+        response_headers = {**default_http_headers}
+    if not isinstance(body, str):
+        body = dumps(body, decimal_as_str)
+
+    if event is not None and len(body) >= compression_min_size:
+        encoding = get_response_encoding(event)
+        if encoding is not None:
+            response_headers['Content-Type'] = 'application/json'
+            response_headers['Content-Encoding'] = encoding
+            response_headers['Vary'] = 'Accept, Accept-Encoding'
+            return {'headers': response_headers, 'statusCode': status_code, 'isBase64Encoded': True,
+                    'body': base64.b64encode(compress(body.encode('utf-8'), encoding)).decode('ascii')}
+
+    return {'headers': response_headers, 'statusCode': status_code, 'body': body}
+
@@ -0,0 +1,119 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Cognito user pool JSON web keys, used to verify the signature of ID tokens.
+#
+# The keys of each user pool are held by kid in the container between invocations. They are downloaded again when a
+# token is signed with a kid that is not known, which happens when the user pool rotates its keys, or once
+# jwks_cache_ttl seconds have passed. Downloads are made at most once every jwks_refresh_interval seconds, so tokens
+# with unknown kids cannot cause a download per request, and the last keys downloaded are kept if a download fails.
+# Public keys constructed from the JSON web keys are cached with them.
+
+import os
+import json
+import time
+import logging
+import urllib.request
+from jose import jwk
+
+logger = logging.getLogger()
+
+if 'jwks_cache_ttl' in os.environ:
+    jwks_cache_ttl = float(os.environ['jwks_cache_ttl'])
+else:
+    jwks_cache_ttl = 3600
+
+if 'jwks_refresh_interval' in os.environ:
+    jwks_refresh_interval = float(os.environ['jwks_refresh_interval'])
+else:
+    jwks_refresh_interval = 60
+
+jwks_fetch_timeout = 5
+
+# Keys URL -> {'keys': kid -> JSON web key, 'public_keys': kid -> constructed key,
+# 'fetched': monotonic time of the last download, 'attempted': monotonic time of the last download attempt}.
+_cache = {}
+
+
+def get_keys_url(aws_region, aws_user_pool):
+    return 'https://cognito-idp.{}.amazonaws.com/{}/.well-known/jwks.json'.format(aws_region, aws_user_pool)
+
+
+def fetch_keys(url):
+    # The only network access of the module, patched by tests.
+    with urllib.request.urlopen(url, timeout=jwks_fetch_timeout) as response:
+        return json.loads(response.read())['keys']
+
+
+def refresh(url, entry, now):
+    # Downloads the keys unless the last attempt was less than jwks_refresh_interval seconds ago, returns True if
+    # the keys have been replaced.
+    if entry['attempted'] is not None and now - entry['attempted'] < jwks_refresh_interval:
+        logger.debug('JWKS refresh of %s skipped, last attempt %.0f seconds ago.', url, now - entry['attempted'])
+        return False
+
+    entry['attempted'] = now
+    try:
+        keys = fetch_keys(url)
+    except Exception as e:
+        logger.error('Unable to download JWKS from %s: %s', url, str(e))
+        return False
+
+    entry['keys'] = {key['kid']: key for key in keys if 'kid' in key}
+    entry['public_keys'] = {kid: public_key for kid, public_key in entry['public_keys'].items()
+                            if kid in entry['keys']}
+    entry['fetched'] = now
+    logger.info('Downloaded %d JSON web keys from %s.', len(entry['keys']), url)
+    return True
+
+
+def get_entry(url, kid=None):
+    entry = _cache.get(url)
+    if entry is None:
+        entry = {'keys': {}, 'public_keys': {}, 'fetched': None, 'attempted': None}
+        _cache[url] = entry
+
+    now = time.monotonic()
+    if entry['fetched'] is None or now - entry['fetched'] >= jwks_cache_ttl or \
+            (kid is not None and kid not in entry['keys']):
+        refresh(url, entry, now)
+    return entry
+
+
+def get_keys(aws_region, aws_user_pool):
+    # JSON web keys of the user pool by kid.
+    return get_entry(get_keys_url(aws_region, aws_user_pool))['keys']
+
+
+def get_key(aws_region, aws_user_pool, kid):
+    # JSON web key with the kid, None if the user pool has no such key.
+    return get_entry(get_keys_url(aws_region, aws_user_pool), kid)['keys'].get(kid)
+
+
+def get_public_key(aws_region, aws_user_pool, kid):
+    # Public key with the kid, constructed once per key, None if the user pool has no such key.
+    entry = get_entry(get_keys_url(aws_region, aws_user_pool), kid)
+    public_key = entry['public_keys'].get(kid)
+    if public_key is None and kid in entry['keys']:
+        public_key = jwk.construct(entry['keys'][kid])
+        entry['public_keys'][kid] = public_key
+    return public_key
+
+
+def clear():
+    _cache.clear()
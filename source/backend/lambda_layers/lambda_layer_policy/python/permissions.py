@@ -0,0 +1,299 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Effective permissions of a set of Cognito groups, resolved from the roles and policies tables as
+# {schema_name: {'create': bool, 'update': bool, 'delete': bool, 'attributes': frozenset of attribute names}}.
+#
+# The permissions of each Cognito group are materialized in the permissions table, one item per group, and kept up to
+# date by the role, role item, policy and policy attribute handlers which recompute the groups affected by each write.
+# Requests read the items of the user's groups with a single batch_get_item and the merged result is kept in the
+# container for permissions_cache_ttl seconds. Until the table has been built, which is recorded by the version item,
+# permissions are resolved by scanning the roles and policies tables. The permissions table name starts with the
+# roles table name, so functions that can read the roles table can read it.
+
+import os
+import re
+import time
+import random
+import logging
+import boto3
+import botocore.exceptions
+
+logger = logging.getLogger()
+
+if 'permissions_cache_ttl' in os.environ:
+    permissions_cache_ttl = float(os.environ['permissions_cache_ttl'])
+else:
+    permissions_cache_ttl = 10
+
+# Key of the version item in the permissions table. Cognito group names cannot contain spaces, so it never clashes
+# with a group.
+version_key = '#permissions version'
+
+access_types = ['create', 'update', 'delete']
+
+# batch_get_item accepts at most 100 keys per request.
+batch_get_size = 100
+
+# Reads of the permissions table are retried with the capped exponential backoff of bulk_write, which is in the items
+# layer. The delay before retry n is a random value between 0 and min(max_delay, base_delay * 2^n), after max_attempts
+# the permissions are resolved from the roles and policies tables.
+max_attempts = 5
+base_delay = 0.05
+max_delay = 1
+
+retryable_error_codes = ['ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded',
+                         'InternalServerError']
+
+# Group set key -> {'permissions': resolved permissions, 'checked': monotonic time they were read}.
+_cache = {}
+_tables = {}
+
+
+def get_table_name(name):
+    return '{}-{}-{}'.format(os.environ['application'], os.environ['environment'], name)
+
+
+def get_table(name):
+    if name not in _tables:
+        _tables[name] = boto3.resource('dynamodb').Table(get_table_name(name))
+    return _tables[name]
+
+
+def scan_table(table):
+    resp = table.scan()
+    items = resp['Items']
+    while 'LastEvaluatedKey' in resp:
+        resp = table.scan(ExclusiveStartKey=resp['LastEvaluatedKey'])
+        items.extend(resp['Items'])
+    return items
+
+
+def increment_version():
+    # Records that the permissions table has been built and changed.
+    get_table('roles-permissions').update_item(
+        Key={'group_name': version_key},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+    invalidate()
+
+
+def invalidate():
+    _cache.clear()
+
+
+def get_group_names(groups):
+    # cognito:groups is passed on by API Gateway as a string, either a single name or a list such as "[admin, read]",
+    # lists are accepted for direct invocations.
+    if isinstance(groups, str):
+        groups = re.split(r'[\s,]+', groups.strip('[] '))
+    return sorted(set(group for group in groups if group))
+
+
+def get_groups_key(groups):
+    return tuple(get_group_names(groups))
+
+
+def get_role_group_names(role):
+    return [group['group_name'] for group in role.get('groups', []) if 'group_name' in group]
+
+
+def is_member(role, group_names):
+    return any(group_name in group_names for group_name in get_role_group_names(role))
+
+
+def resolve_permissions(roles, policies, group_names):
+    policy_ids = set()
+    for role in roles:
+        if is_member(role, group_names):
+            policy_ids.update(policy['policy_id'] for policy in role.get('policies', []))
+
+    resolved = {}
+    for policy in policies:
+        if policy['policy_id'] not in policy_ids:
+            continue
+        for entity in policy.get('entity_access', []):
+            if 'schema_name' not in entity:
+                continue
+            schema_permissions = resolved.setdefault(entity['schema_name'],
+                                                     {'create': False, 'update': False, 'delete': False,
+                                                      'attributes': set()})
+            for access_type in access_types:
+                if entity.get(access_type) == True:
+                    schema_permissions[access_type] = True
+            schema_permissions['attributes'].update(attribute['attr_name']
+                                                    for attribute in entity.get('attributes', []))
+
+    for schema_permissions in resolved.values():
+        schema_permissions['attributes'] = frozenset(schema_permissions['attributes'])
+    return resolved
+
+
+def merge_permissions(group_permissions):
+    # Union of the permissions of several groups, as stored in the permissions table.
+    merged = {}
+    for permissions in group_permissions:
+        for schema_name, schema_permissions in permissions.items():
+            merged_schema = merged.setdefault(schema_name, {'create': False, 'update': False, 'delete': False,
+                                                            'attributes': set()})
+            for access_type in access_types:
+                if schema_permissions.get(access_type) == True:
+                    merged_schema[access_type] = True
+            merged_schema['attributes'].update(schema_permissions.get('attributes', []))
+
+    for schema_permissions in merged.values():
+        schema_permissions['attributes'] = frozenset(schema_permissions['attributes'])
+    return merged
+
+
+def to_item_permissions(resolved):
+    # Permissions table format, attribute names as a sorted list as DynamoDB sets cannot be empty.
+    return {schema_name: {**schema_permissions, 'attributes': sorted(schema_permissions['attributes'])}
+            for schema_name, schema_permissions in resolved.items()}
+
+
+def compute_view(roles, policies):
+    # Permissions of every group assigned to a role, as stored in the permissions table.
+    group_names = set()
+    for role in roles:
+        group_names.update(get_role_group_names(role))
+    return {group_name: to_item_permissions(resolve_permissions(roles, policies, [group_name]))
+            for group_name in group_names}
+
+
+def write_groups(group_names, roles, policies):
+    table = get_table('roles-permissions')
+    view = compute_view(roles, policies)
+    for group_name in group_names:
+        if group_name == version_key:
+            continue
+        if group_name in view:
+            table.put_item(Item={'group_name': group_name, 'permissions': view[group_name]})
+        else:
+            table.delete_item(Key={'group_name': group_name})
+    increment_version()
+
+
+def update_role_groups(*roles):
+    # Called after a role write with the role items before and after it.
+    group_names = set()
+    for role in roles:
+        if role:
+            group_names.update(get_role_group_names(role))
+    logger.info('Updating permissions of groups: %s', sorted(group_names))
+    write_groups(group_names, scan_table(get_table('roles')), scan_table(get_table('policies')))
+
+
+def update_policy_groups(policy_id):
+    # Called after a policy write, updates the groups of the roles the policy is assigned to.
+    roles = scan_table(get_table('roles'))
+    group_names = set()
+    for role in roles:
+        if any(policy['policy_id'] == policy_id for policy in role.get('policies', [])):
+            group_names.update(get_role_group_names(role))
+    logger.info('Updating permissions of groups: %s', sorted(group_names))
+    write_groups(group_names, roles, scan_table(get_table('policies')))
+
+
+def rebuild():
+    # Recomputes the whole permissions table, removing the items of groups no longer assigned to a role.
+    group_names = set(item['group_name'] for item in scan_table(get_table('roles-permissions')))
+    roles = scan_table(get_table('roles'))
+    for role in roles:
+        group_names.update(get_role_group_names(role))
+    logger.info('Rebuilding permissions of groups: %s', sorted(group_names))
+    write_groups(group_names, roles, scan_table(get_table('policies')))
+
+
+def check_consistency():
+    # Differences between the permissions table and a full recomputation from the roles and policies tables,
+    # as {group_name: {'stored': stored permissions or None, 'expected': computed permissions or None}}.
+    stored = {item['group_name']: item.get('permissions', {})
+              for item in scan_table(get_table('roles-permissions')) if item['group_name'] != version_key}
+    expected = compute_view(scan_table(get_table('roles')), scan_table(get_table('policies')))
+
+    differences = {}
+    for group_name in set(stored) | set(expected):
+        stored_permissions = stored.get(group_name)
+        expected_permissions = expected.get(group_name)
+        if stored_permissions is not None and expected_permissions is not None:
+            if merge_permissions([stored_permissions]) == merge_permissions([expected_permissions]):
+                continue
+        differences[group_name] = {'stored': stored_permissions, 'expected': expected_permissions}
+    return differences
+
+
+def get_backoff_delay(attempt):
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def read_view(group_names):
+    # Permissions of the groups from the permissions table, None if it has not been built or cannot be read.
+    table_name = get_table_name('roles-permissions')
+    keys = [{'group_name': group_name} for group_name in group_names] + [{'group_name': version_key}]
+    items = []
+    dynamodb = boto3.resource('dynamodb')
+    for i in range(0, len(keys), batch_get_size):
+        request = {table_name: {'Keys': keys[i:i + batch_get_size]}}
+        attempt = 0
+        while request:
+            if attempt > 0:
+                time.sleep(get_backoff_delay(attempt))
+            if attempt >= max_attempts:
+                logger.warning('Permissions table not read after %s attempts.', max_attempts)
+                return None
+
+            attempt += 1
+            try:
+                resp = dynamodb.batch_get_item(RequestItems=request)
+            except botocore.exceptions.ClientError as e:
+                if e.response['Error']['Code'] in retryable_error_codes:
+                    logger.debug('Permissions table read throttled, retrying: %s', str(e))
+                    continue
+                logger.warning('Unable to read the permissions table: %s', str(e))
+                return None
+            items.extend(resp['Responses'].get(table_name, []))
+            request = resp.get('UnprocessedKeys')
+
+    if not any(item['group_name'] == version_key for item in items):
+        logger.warning('The permissions table has not been built.')
+        return None
+    return merge_permissions(item.get('permissions', {}) for item in items if item['group_name'] != version_key)
+
+
+def get_permissions(groups, max_age=None):
+    # Permissions of the groups, the returned dict is shared between invocations and must not be modified.
+    if max_age is None:
+        max_age = permissions_cache_ttl
+
+    now = time.monotonic()
+    key = get_groups_key(groups)
+    cached = _cache.get(key)
+    if cached is not None and now - cached['checked'] < max_age:
+        return cached['permissions']
+
+    resolved = read_view(key)
+    if resolved is None:
+        resolved = resolve_permissions(scan_table(get_table('roles')), scan_table(get_table('policies')), key)
+    _cache[key] = {'permissions': resolved, 'checked': now}
+    return resolved
+
+
+def get_schema_permissions(groups, schema_name):
+    return get_permissions(groups).get(schema_name, {})
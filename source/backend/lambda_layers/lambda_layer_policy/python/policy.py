@@ -21,18 +21,34 @@ import os
 import boto3
 import re
 import sys
-import requests
+import time
+import hashlib
+from collections import OrderedDict
 
-import simplejson as json
+import json
 
 from jose import jwt, JWTError
 from boto3.dynamodb.conditions import Key, Attr
 import logging
+import permissions
+import jwks
 
 logging.basicConfig(format='%(asctime)s | %(levelname)s | %(message)s', level=logging.INFO)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Verified ID token claims by token hash, least recently used first, kept until the token expires.
+if 'claims_cache_size' in os.environ:
+    claims_cache_size = int(os.environ['claims_cache_size'])
+else:
+    claims_cache_size = 1000
+
+_claims_cache = OrderedDict()
+
+# Resource types of the admin and login APIs, which require membership of the admin group.
+admin_api_types = ['admin', 'login']
+admin_group_name = 'admin'
+
 
 class HttpVerb:
     GET = "GET"
@@ -196,15 +212,6 @@ class AuthPolicy(object):
 class MFAuth(object):
 
     def __init__(self):
-
-        application = os.environ['application']
-        environment = os.environ['environment']
-
-        roles_table_name = '{}-{}-roles'.format(application, environment)
-        policy_table_name = '{}-{}-policies'.format(application, environment)
-
-        self.role_table = boto3.resource('dynamodb').Table(roles_table_name)
-        self.policy_table = boto3.resource('dynamodb').Table(policy_table_name)
         self.region = os.environ['region']
 
     def get_claims(self, aws_region, aws_user_pool, token, audience=None):
@@ -217,9 +224,9 @@ class MFAuth(object):
 
         verify_url = self.pool_url(aws_region, aws_user_pool)
 
-        keys = self.aws_key_dict(aws_region, aws_user_pool)
-
-        key = keys.get(kid)
+        key = jwks.get_public_key(aws_region, aws_user_pool, kid)
+        if key is None:
+            raise JWTError('Public key not found in jwks.json')
 
         kargs = {"issuer": verify_url}
         if audience is not None:
@@ -246,13 +253,35 @@ class MFAuth(object):
                 format(aws_region, aws_user_pool)
         )
 
+    def get_cached_claims(self, aws_region, aws_user_pool, token, audience=None):
+        """ Claims of the token, verified once and cached by token hash
+        until the token expires.
+        """
+        key = hashlib.sha256('{} {} {} {}'.format(aws_region, aws_user_pool, audience, token).encode('utf-8')).digest()
+        claims = _claims_cache.get(key)
+        if claims is not None:
+            if claims.get('exp', 0) > time.time():
+                _claims_cache.move_to_end(key)
+                return claims
+            del _claims_cache[key]
+
+        claims = self.get_claims(aws_region, aws_user_pool, token, audience)
+        if claims_cache_size > 0:
+            _claims_cache[key] = claims
+            while len(_claims_cache) > claims_cache_size:
+                _claims_cache.popitem(last=False)
+        return claims
+
     def getAdminResourcePolicy(self, event):
         region = os.environ['region']
         userpool = os.environ['userpool']
         clientid = os.environ['clientid']
+        # When API Gateway caches authorizer results, the policy must cover every method the user may call, not only
+        # the one being authorized.
+        wildcard_policy = os.environ.get('wildcard_policy', 'false').lower() == 'true'
 
         token = event['authorizationToken']
-        claims = self.get_claims(region, userpool, token, clientid)
+        claims = self.get_cached_claims(region, userpool, token, clientid)
         if claims.get('token_use') != 'id':
             raise ValueError('Not an ID Token')
         arn = event['methodArn'].split(':')
@@ -277,37 +306,23 @@ class MFAuth(object):
 
         path = "/" + "/".join(apigatwayArn[3:])
 
-        if (apitype == 'admin'):
-            logger.info('Admin API Access')
+        if apitype in admin_api_types:
+            api_name = apitype.capitalize()
+            logger.info('%s API Access', api_name)
             if group is not None:
-                check = False
-                for g in group:
-                    if 'admin' in g:
-                        check = True
-                if check == False:
-                    logger.info('Denying Admin API Access, %s', email)
+                if admin_group_name not in permissions.get_group_names(group):
+                    logger.info('Denying %s API Access: %s', api_name, email)
                     policy.denyAllMethods()
+                elif wildcard_policy:
+                    # The admin and login resources are separate RestApis, the cached policy only applies to this one.
+                    logger.info('Allowing all %s API methods, %s', api_name, email)
+                    policy.allowMethod(HttpVerb.ALL, '/' + apitype)
+                    policy.allowMethod(HttpVerb.ALL, '/' + apitype + '/*')
                 else:
-                    logger.info('Allowing Admin API Access, %s', email)
+                    logger.info('Allowing %s API Access, %s', api_name, email)
                     policy.allowMethod(method, path)
             else:
-                logger.info('Denying Admin API, as user is not a member of any Cognito groups: %s', email)
-                policy.denyAllMethods()
-        if (apitype == 'login'):
-            logger.info('Login API Access')
-            if group is not None:
-                check = False
-                for g in group:
-                    if 'admin' in g:
-                        check = True
-                if check == False:
-                    logger.info('Denying Login API Access: %s', email)
-                    policy.denyAllMethods()
-                else:
-                    logger.info('Allowing Login API Access, %s', email)
-                    policy.allowMethod(method, path)
-            else:
-                logger.info('Denying Login API, as user is not a member of any Cognito groups: %s', email)
+                logger.info('Denying %s API, as user is not a member of any Cognito groups: %s', api_name, email)
                 policy.denyAllMethods()
 
         # Finally, build the policy
@@ -317,15 +332,8 @@ class MFAuth(object):
 
     def aws_key_dict(self, aws_region, aws_user_pool):
 
-        aws_data = requests.get(
-            self.pool_url(aws_region, aws_user_pool) + '/.well-known/jwks.json'
-        )
-        aws_jwt = json.loads(aws_data.text)
-        result = {}
-        for item in aws_jwt['keys']:
-            result[item['kid']] = item
-
-        return result
+        # JSON web keys of the user pool by kid, from the container cache.
+        return jwks.get_keys(aws_region, aws_user_pool)
 
     def getUserResourceCreationPolicy(self, event, schema_name):
 
@@ -351,60 +359,13 @@ class MFAuth(object):
                 'cause': "User is not assigned to any group. Access denied.",
             }
         groupidentity = event['requestContext']['authorizer']['claims']['cognito:groups']
-        # hard coding the staging_id
-        policy_id = '1'
-        rolelist = self.role_table.scan()
-
-        userPolicyList = []
-        logger.debug(rolelist['Items'])
-        logger.debug(groupidentity)
-        for item in rolelist['Items']:
-            for group in item['groups']:
-                if (group['group_name'] in groupidentity):
-                    for policy in item['policies']:
-                        if policy['policy_id'] not in userPolicyList:
-                            userPolicyList.append(policy['policy_id'])
         user = {
             'userRef': event['requestContext']['authorizer']['claims']['cognito:username'],
             'email': event['requestContext']['authorizer']['claims']['email']
         }
+        logger.debug(groupidentity)
 
-        logger.debug('User policies: %s', userPolicyList)
-
-        policies = self.policy_table.scan()
-        allow_access = False
-
-        for policy in policies['Items']:
-            for userPolicy in userPolicyList:
-                if policy['policy_id'] == userPolicy:
-                    # Found policy match.
-                    if 'entity_access' in policy:
-                        for schema in policy['entity_access']:
-                            if 'schema_name' in schema and schema_name == schema['schema_name']:
-                                # Schema is matching, check access level.
-                                if event['httpMethod'] == 'PUT':
-                                    if 'update' in schema:
-                                        if schema['update'] == True:
-                                            allow_access = True
-                                            break
-                                if event['httpMethod'] == 'POST':
-                                    if 'create' in schema:
-                                        if schema['create'] == True:
-                                            allow_access = True
-                                            break
-                                if event['httpMethod'] == 'DELETE':
-                                    if 'delete' in schema:
-                                        if schema['delete'] == True:
-                                            allow_access = True
-                                            break
-                        if allow_access:
-                            break
-            if allow_access:
-                # Policy located, no need to check others, exit loop.
-                break
-
-        # Update access type string for return message.
-
+        # Access type required by the request method, also used in the return message.
         allow_access_type = 'unknown'
         if event['httpMethod'] == 'PUT':
             allow_access_type = 'update'
@@ -413,6 +374,9 @@ class MFAuth(object):
         if event['httpMethod'] == 'DELETE':
             allow_access_type = 'delete'
 
+        schema_permissions = permissions.get_schema_permissions(groupidentity, schema_name)
+        allow_access = schema_permissions.get(allow_access_type, False)
+
         if allow_access:
             logger.info('%s: User has permission to ' + allow_access_type + ' the resource type ' + schema_name + '.',
                         event['requestContext']['authorizer']['claims']['cognito:username'])
@@ -493,32 +457,13 @@ class MFAuth(object):
         }
 
         groupidentity = event['requestContext']['authorizer']['claims']['cognito:groups']
-        userPolicyList = []
         accessAllowedAttrList = []
         accessDeniedAttrList = []
-        userAllowedAttributes = []
 
-        rolelist = self.role_table.scan()
         logger.debug('Cognito User email: %s', event['requestContext']['authorizer']['claims']['email'])
         logger.info('Cognito Username: ' + event['requestContext']['authorizer']['claims']['cognito:username'])
-        logger.debug('All Roles: %s', rolelist['Items'])
-        for item in rolelist['Items']:
-            for group in item['groups']:
-                if (group['group_name'] in groupidentity):
-                    for policy in item['policies']:
-                        if policy['policy_id'] not in userPolicyList:
-                            userPolicyList.append(policy['policy_id'])
-
-        policyList = self.policy_table.scan()
-
-        for policy in policyList['Items']:
-            if 'entity_access' in policy and policy['policy_id'] in userPolicyList:
-                for entity in policy['entity_access']:
-                    if 'attributes' in entity and entity['schema_name'] == schema_name:
-                        # Found schema in entity access list.
-                        for attr in entity['attributes']:
-                            userAllowedAttributes.append(attr['attr_name'])
-                        break  # No need to look further as found schema.
+        userAllowedAttributes = permissions.get_schema_permissions(groupidentity, schema_name).get('attributes',
+                                                                                                   frozenset())
 
         logger.debug('%s Attributes requested: %s', event['requestContext']['authorizer']['claims']['cognito:username'],
                      attrList)
@@ -0,0 +1,135 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Registry of schema versions, a single item of the schema versions table holding the lastModifiedTimestamp of every
+# schema, the time of the last schema change and a version number incremented by every schema write, used as the
+# ETag of the notifications API. Each write updates the item with a single UpdateItem, so concurrent writes to
+# different schemas are all recorded. Schema writes go through write_schema, which writes the schema item and updates
+# the registry in one transaction, so the version can never be left behind by a schema change.
+
+import os
+import datetime
+import logging
+import boto3
+import botocore.exceptions
+
+logger = logging.getLogger()
+
+registry_key = {'registry_name': 'schemas'}
+
+# Reported for schemas loaded without a lastModifiedTimestamp and before the first schema change.
+default_timestamp = datetime.datetime(2020, 1, 1).isoformat()
+
+_table = None
+
+
+def get_table():
+    global _table
+    if _table is None:
+        _table = boto3.resource('dynamodb').Table(
+            '{}-{}-schema-versions'.format(os.environ['application'], os.environ['environment']))
+    return _table
+
+
+def get_registry_update(schema_name, timestamp, create=False):
+    # UpdateItem arguments recording timestamp as the version of schema_name, create sets the versions map on the first
+    # schema write.
+    values = {':timestamp': timestamp, ':one': 1}
+    if create:
+        return {'UpdateExpression': 'SET versions = :versions, lastChangeDate = :timestamp ADD version :one',
+                'ConditionExpression': 'attribute_not_exists(versions)',
+                'ExpressionAttributeValues': {**values, ':versions': {schema_name: timestamp}}}
+    return {'UpdateExpression': 'SET versions.#schema = :timestamp, lastChangeDate = :timestamp ADD version :one',
+            'ConditionExpression': 'attribute_exists(versions)',
+            'ExpressionAttributeNames': {'#schema': schema_name},
+            'ExpressionAttributeValues': values}
+
+
+def record_version(schema_name, timestamp):
+    # Records timestamp as the version of schema_name without a schema write.
+    for _ in range(2):
+        # Another write can create the versions map between the two attempts, which then fail in turn.
+        for create in [False, True]:
+            try:
+                get_table().update_item(Key=registry_key, **get_registry_update(schema_name, timestamp, create))
+                return
+            except botocore.exceptions.ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+
+def is_registry_condition_failure(e):
+    # The transaction was cancelled only because the registry condition failed, reasons are in TransactItems order.
+    reasons = e.response.get('CancellationReasons', [])
+    return e.response['Error']['Code'] == 'TransactionCanceledException' and len(reasons) == 2 and \
+        reasons[0].get('Code') == 'None' and reasons[1].get('Code') == 'ConditionalCheckFailed'
+
+
+def write_schema(schema_table, schema_name, timestamp, item=None, update=None):
+    # Writes the schema item and records timestamp as its version in one transaction, returns the TransactWriteItems
+    # response. item is a schema item to put, otherwise update holds the Key, UpdateExpression and expression arguments
+    # of an update of the schema item.
+    if item is not None:
+        schema_write = {'Put': {'TableName': schema_table.name, 'Item': item}}
+    else:
+        schema_write = {'Update': {'TableName': schema_table.name, **update}}
+
+    # The client of a resource serializes attribute values, so they are given as Python values as for the Table.
+    client = get_table().meta.client
+    for _ in range(2):
+        for create in [False, True]:
+            registry_write = {'Update': {'TableName': get_table().name, 'Key': registry_key,
+                                         **get_registry_update(schema_name, timestamp, create)}}
+            try:
+                return client.transact_write_items(TransactItems=[schema_write, registry_write])
+            except botocore.exceptions.ClientError as e:
+                if not is_registry_condition_failure(e):
+                    raise
+    raise RuntimeError('Unable to record the version of schema ' + schema_name)
+
+
+def rebuild(schemas):
+    # Replaces the versions with those of the schema items, used when the default schemas are loaded or updated.
+    versions = {schema['schema_name']: schema.get('lastModifiedTimestamp', default_timestamp) for schema in schemas}
+    get_table().update_item(
+        Key=registry_key,
+        UpdateExpression='SET versions = :versions, lastChangeDate = :timestamp ADD version :one',
+        ExpressionAttributeValues={':versions': versions, ':timestamp': max(versions.values(), default=default_timestamp),
+                                   ':one': 1}
+    )
+
+
+def get_registry():
+    # The registry item, or an empty registry before the first schema write.
+    resp = get_table().get_item(Key=registry_key)
+    return resp.get('Item', {'versions': {}, 'lastChangeDate': default_timestamp, 'version': 0})
+
+
+def get_etag(registry):
+    return '"{}"'.format(int(registry.get('version', 0)))
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match is a list of entity tags or *, weak tags match too.
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(','):
+        value = value.strip()
+        if value == '*' or value.replace('W/', '', 1) == etag:
+            return True
+    return False
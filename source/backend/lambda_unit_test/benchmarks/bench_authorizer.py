@@ -0,0 +1,127 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Measures the latency of the admin API authorizer, MFAuth.getAdminResourcePolicy, for requests from a set of users
+# with the JWKS download mocked out:
+#   no caches       the JWKS and verified claims caches are cleared before each request, the behaviour before the
+#                   caches apart from the JWKS download itself
+#   JWKS cache      the JWT signature is verified on each request with a cached public key
+#   claims cache    repeated tokens are served from the verified claims cache
+# It also counts the authorizer invocations needed for a user session calling several admin endpoints when
+# API Gateway caches authorizer results, with policies for the requested method only and with wildcard policies.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_authorizer.py [requests] [users]
+
+import os
+import sys
+import time
+import fnmatch
+import statistics
+from unittest import mock
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest', 'userpool': 'us-east-1_pool', 'clientid': 'client'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_policy/python/')
+
+import rsa
+from jose import jwk, jwt
+
+import jwks
+import policy
+
+method_arn = 'arn:aws:execute-api:us-east-1:111122223333:abcdef1234/prod/{}/admin/{}'
+endpoints = [('GET', 'users'), ('GET', 'groups'), ('POST', 'role'), ('PUT', 'role/1'), ('GET', 'policy'),
+             ('PUT', 'policy/2'), ('GET', 'schema'), ('PUT', 'schema/app')]
+
+
+def create_tokens(users):
+    public_key, private_key = rsa.newkeys(2048)
+    public_jwk = {**jwk.construct(public_key.save_pkcs1().decode('utf-8'), 'RS256').to_dict(), 'kid': 'kid1'}
+    tokens = []
+    for i in range(users):
+        claims = {'sub': 'user{}'.format(i), 'aud': 'client', 'token_use': 'id', 'email': 'user@example.com',
+                  'cognito:groups': ['admin'], 'exp': int(time.time()) + 3600,
+                  'iss': 'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_pool'}
+        tokens.append(jwt.encode(claims, private_key.save_pkcs1().decode('utf-8'), algorithm='RS256',
+                                 headers={'kid': 'kid1'}))
+    return public_jwk, tokens
+
+
+def time_requests(tokens, requests, clear_jwks, clear_claims):
+    jwks.clear()
+    policy._claims_cache.clear()
+    timings = []
+    for i in range(requests):
+        method, path = endpoints[i % len(endpoints)]
+        event = {'authorizationToken': tokens[i % len(tokens)], 'methodArn': method_arn.format(method, path)}
+        if clear_jwks:
+            jwks.clear()
+        if clear_claims:
+            policy._claims_cache.clear()
+        start = time.perf_counter()
+        policy.MFAuth().getAdminResourcePolicy(event)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def count_invocations(token, wildcard):
+    # Authorizer invocations for a session calling each endpoint once, with API Gateway caching the result by token.
+    cached_policy = None
+    invocations = 0
+    for method, path in endpoints:
+        resource_arn = method_arn.format(method, path)
+        # Policy resource ARNs use * as a wildcard, as fnmatch does.
+        if cached_policy is not None and any(
+                fnmatch.fnmatchcase(resource_arn, resource)
+                for statement in cached_policy['policyDocument']['Statement'] if statement['Effect'] == 'Allow'
+                for resource in statement['Resource']):
+            continue
+        with mock.patch.dict(os.environ, {'wildcard_policy': 'true' if wildcard else 'false'}):
+            cached_policy = policy.MFAuth().getAdminResourcePolicy({'authorizationToken': token,
+                                                                    'methodArn': resource_arn})
+        invocations += 1
+    return invocations
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    public_jwk, tokens = create_tokens(users)
+    with mock.patch.object(jwks, 'fetch_keys', return_value=[public_jwk]):
+        print('{} requests from {} users, JWKS download mocked'.format(requests, users))
+        print('{:<16}{:>14}{:>14}{:>14}'.format('cache', 'median ms', 'p99 ms', 'requests/s'))
+        for name, clear_jwks, clear_claims in [('no caches', True, True), ('JWKS cache', False, True),
+                                               ('claims cache', False, False)]:
+            timings = sorted(time_requests(tokens, requests, clear_jwks, clear_claims))
+            print('{:<16}{:>14.3f}{:>14.3f}{:>14.0f}'.format(name, statistics.median(timings) * 1000,
+                                                              timings[int(len(timings) * 0.99) - 1] * 1000,
+                                                              len(timings) / sum(timings)))
+        print()
+        print('Authorizer invocations for a session calling {} admin endpoints with cached results:'.format(
+            len(endpoints)))
+        print('  method policy:   {}'.format(count_invocations(tokens[0], False)))
+        print('  wildcard policy: {}'.format(count_invocations(tokens[0], True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Compares the wall clock time of creating servers with sequential BatchWriteItem calls, as lambda_items POST did
+# previously, and with the concurrent chunks of bulk_write.
+#
+# moto answers in process, so each BatchWriteItem request is delayed by a simulated service latency (a fixed round
+# trip plus a per item write time) and a fraction of every request is returned as UnprocessedItems to exercise the
+# retries. Timings show the effect of overlapping requests, not real DynamoDB throughput.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_bulk_write.py [items] [unprocessed fraction] [workers ...]
+
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest', 'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_items/python/')
+
+import boto3
+import botocore.client
+from moto import mock_dynamodb
+
+import bulk_write
+
+SERVERS_TABLE = 'cmf-unittest-servers'
+
+# Simulated BatchWriteItem latency, seconds per request and per item written.
+REQUEST_LATENCY = 0.02
+ITEM_LATENCY = 0.0005
+
+unprocessed_fraction = 0.0
+write_requests = 0
+_make_api_call = botocore.client.BaseClient._make_api_call
+
+
+def latency_make_api_call(self, operation_name, api_params):
+    global write_requests
+    if operation_name != 'BatchWriteItem':
+        return _make_api_call(self, operation_name, api_params)
+
+    write_requests += 1
+    table_name, requests = list(api_params['RequestItems'].items())[0]
+    held = int(len(requests) * unprocessed_fraction)
+    processed = requests[:len(requests) - held]
+    response = _make_api_call(self, operation_name, {'RequestItems': {table_name: processed}})
+    if held:
+        response['UnprocessedItems'] = {table_name: requests[len(requests) - held:]}
+    time.sleep(REQUEST_LATENCY + ITEM_LATENCY * len(processed))
+    return response
+
+
+botocore.client.BaseClient._make_api_call = latency_make_api_call
+
+
+def setup_table():
+    client = boto3.client('dynamodb')
+    client.create_table(TableName=SERVERS_TABLE, BillingMode='PAY_PER_REQUEST',
+                        KeySchema=[{'AttributeName': 'server_id', 'KeyType': 'HASH'}],
+                        AttributeDefinitions=[{'AttributeName': 'server_id', 'AttributeType': 'S'}])
+    return client
+
+
+def get_servers(count):
+    return [{'server_id': str(i), 'server_name': 'server' + str(i), 'app_id': str(i % 50),
+             'server_os_family': 'linux', 'server_fqdn': 'server{}.example.com'.format(i)} for i in range(count)]
+
+
+def main():
+    global unprocessed_fraction, write_requests
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    unprocessed_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    worker_counts = [int(arg) for arg in sys.argv[3:]] or [1, 4, 8, 16]
+
+    logging.getLogger().setLevel(logging.ERROR)
+    with mock_dynamodb():
+        client = setup_table()
+        servers = get_servers(items)
+
+        print('Write of {} items, {:.0%} of each request unprocessed'.format(items, unprocessed_fraction))
+        print('{:<10}{:>10}{:>10}{:>10}{:>12}{:>14}'.format('workers', 'requests', 'retries', 'written', 'seconds',
+                                                            'items/second'))
+        for workers in worker_counts:
+            write_requests = 0
+            bulk_write.max_workers = workers
+            result = bulk_write.put_items(SERVERS_TABLE, servers, 'server_id', client)
+            print('{:<10}{:>10}{:>10}{:>10}{:>12.3f}{:>14.1f}'.format(workers, write_requests,
+                                                                      result.metrics['retries'],
+                                                                      result.metrics['succeeded'],
+                                                                      result.metrics['seconds'],
+                                                                      result.metrics['items_per_second']))
+
+
+if __name__ == '__main__':
+    main()
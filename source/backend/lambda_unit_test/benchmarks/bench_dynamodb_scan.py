@@ -0,0 +1,129 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Compares the wall clock time of a full servers table scan using the serial scan and the parallel segmented scan
+# in dynamodb_scan.
+#
+# moto answers in process and ignores Segment/TotalSegments, so each Scan request is delayed by a simulated service
+# latency (a fixed round trip plus a per item read time) and segmented requests are answered by splitting the
+# table items between the segments. Timings show the effect of overlapping requests, not real DynamoDB throughput.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_dynamodb_scan.py [items] [page size] [segments ...]
+
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest', 'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_items/python/')
+
+import boto3
+import botocore.client
+from moto import mock_dynamodb
+
+import dynamodb_scan
+
+SERVERS_TABLE = 'cmf-unittest-servers'
+
+# Simulated Scan latency, seconds per request and per item returned.
+REQUEST_LATENCY = 0.02
+ITEM_LATENCY = 0.0001
+
+scan_requests = 0
+_table_items = {}
+_make_api_call = botocore.client.BaseClient._make_api_call
+
+
+def segment_scan(client, api_params):
+    table_name = api_params['TableName']
+    if table_name not in _table_items:
+        all_items_params = {key: value for key, value in api_params.items()
+                            if key not in ('Segment', 'TotalSegments', 'ExclusiveStartKey', 'Limit')}
+        _table_items[table_name] = _make_api_call(client, 'Scan', all_items_params)['Items']
+
+    segment_items = _table_items[table_name][api_params['Segment']::api_params['TotalSegments']]
+    start = 0
+    if 'ExclusiveStartKey' in api_params:
+        start_key = api_params['ExclusiveStartKey']['server_id']
+        start = [item['server_id'] for item in segment_items].index(start_key) + 1
+
+    page = segment_items[start:start + api_params.get('Limit', len(segment_items))]
+    response = {'Items': page, 'Count': len(page)}
+    if start + len(page) < len(segment_items):
+        response['LastEvaluatedKey'] = {'server_id': page[-1]['server_id']}
+    return response
+
+
+def latency_make_api_call(self, operation_name, api_params):
+    global scan_requests
+    if operation_name != 'Scan':
+        return _make_api_call(self, operation_name, api_params)
+
+    scan_requests += 1
+    if 'TotalSegments' in api_params:
+        response = segment_scan(self, api_params)
+    else:
+        response = _make_api_call(self, operation_name, api_params)
+    time.sleep(REQUEST_LATENCY + ITEM_LATENCY * len(response['Items']))
+    return response
+
+
+botocore.client.BaseClient._make_api_call = latency_make_api_call
+
+
+def setup_table(items):
+    client = boto3.client('dynamodb')
+    client.create_table(TableName=SERVERS_TABLE, BillingMode='PAY_PER_REQUEST',
+                        KeySchema=[{'AttributeName': 'server_id', 'KeyType': 'HASH'}],
+                        AttributeDefinitions=[{'AttributeName': 'server_id', 'AttributeType': 'S'}])
+    table = boto3.resource('dynamodb').Table(SERVERS_TABLE)
+    with table.batch_writer() as batch:
+        for i in range(items):
+            batch.put_item(Item={'server_id': str(i), 'server_name': 'server' + str(i), 'app_id': str(i % 50),
+                                 'server_os_family': 'linux', 'server_fqdn': 'server{}.example.com'.format(i)})
+    return table
+
+
+def main():
+    global scan_requests
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    segment_counts = [int(arg) for arg in sys.argv[3:]] or [1, 2, 4, 8]
+
+    logging.getLogger().setLevel(logging.ERROR)
+    with mock_dynamodb():
+        table = setup_table(items)
+
+        print('Scan of {} items, {} items per page'.format(items, page_size))
+        print('{:<10}{:>10}{:>10}{:>12}'.format('segments', 'requests', 'items', 'seconds'))
+        for total_segments in segment_counts:
+            scan_requests = 0
+            start = time.perf_counter()
+            scan_data = dynamodb_scan.scan_table(table, total_segments=total_segments, Limit=page_size)
+            elapsed = time.perf_counter() - start
+            print('{:<10}{:>10}{:>10}{:>12.3f}'.format(total_segments, scan_requests, len(scan_data), elapsed))
+
+
+if __name__ == '__main__':
+    main()
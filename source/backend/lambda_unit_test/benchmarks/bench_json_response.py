@@ -0,0 +1,119 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Compares the time to encode a list of server items as a response body with the encoders used by the handlers
+# before api_response (json.dumps in lambda_items, simplejson in lambda_schema and policy, the JsonEncoder class of
+# lambda_ssm_scripts) and with api_response.dumps. Items are encoded once with string values only, as created
+# through the API, and once with Decimal numbers, as read from DynamoDB after an import of numeric attributes.
+# Speed is shown relative to the first encoder able to encode the items, json.dumps fails on Decimal values.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_json_response.py [items] [repeats]
+
+import os
+import sys
+import json
+import time
+import statistics
+from decimal import Decimal
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_policy/python/')
+
+import simplejson
+
+import api_response
+
+
+class JsonEncoder(json.JSONEncoder):
+    # The encoder lambda_ssm_scripts defined before api_response.
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        elif isinstance(obj, bytes):
+            return str(obj, encoding='utf-8')
+        return json.JSONEncoder.default(self, obj)
+
+
+def get_servers(count, numeric):
+    servers = []
+    for i in range(count):
+        server = {
+            'server_id': str(i), 'server_name': 'server{:05d}'.format(i), 'app_id': str(i % 500),
+            'server_fqdn': 'server{:05d}.corp.example.com'.format(i), 'server_os_family': 'linux',
+            'server_os_version': 'Red Hat Enterprise Linux 8.6', 'server_environment': 'prod',
+            'server_tier': 'app', 'r_type': 'Rehost', 'subnet_IDs': ['subnet-0a1b2c3d4e5f' + str(i % 8)],
+            'securitygroup_IDs': ['sg-0123456789abcdef0', 'sg-0fedcba9876543210'],
+            'instanceType': 'm5.large', 'tenancy': 'Shared', 'tags': [{'key': 'CostCenter', 'value': '1234'}],
+            '_history': {'createdBy': {'userRef': 'user', 'email': 'user@example.com'},
+                         'createdTimestamp': '2022-11-01T10:00:00.000000'},
+            '_version': 'e3b0c44298fc1c149afbf4c8996fb924'
+        }
+        if numeric:
+            server.update({'cpu_count': Decimal(4), 'memory_gb': Decimal('15.5'),
+                           'disk_gb': Decimal(i % 1000 + 100), 'utilisation': Decimal('0.372')})
+        servers.append(server)
+    return servers
+
+
+encoders = [
+    ('json.dumps', lambda items: json.dumps(items)),
+    ('simplejson.dumps', lambda items: simplejson.dumps(items)),
+    ('JsonEncoder', lambda items: json.dumps(items, cls=JsonEncoder)),
+    ('api_response.dumps', lambda items: api_response.dumps(items)),
+]
+
+
+def time_encoder(encoder, items, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = encoder(items)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for numeric in [False, True]:
+        servers = get_servers(items, numeric)
+        print('{} servers, {} values, median of {} runs'.format(items, 'Decimal' if numeric else 'string only',
+                                                               repeats))
+        print('{:<22}{:>12}{:>12}{:>10}'.format('encoder', 'seconds', 'MB/second', 'relative'))
+        baseline = None
+        for name, encoder in encoders:
+            try:
+                seconds, length = time_encoder(encoder, servers, repeats)
+            except TypeError:
+                print('{:<22}{:>12}'.format(name, 'fails'))
+                continue
+            if baseline is None:
+                baseline = seconds
+            print('{:<22}{:>12.4f}{:>12.1f}{:>10.2f}'.format(name, seconds, length / seconds / 1000000,
+                                                            baseline / seconds))
+        print()
+
+
+if __name__ == '__main__':
+    main()
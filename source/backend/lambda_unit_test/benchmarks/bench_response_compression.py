@@ -0,0 +1,113 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Measures the CPU cost of compressing response bodies with api_response at each encoding and level against the bytes
+# saved, for a server list, a list of SSM jobs with their full output and a list of scripts. The base64 column is the
+# size of the Lambda response body, which counts towards the 6 MB Lambda response limit, the compressed column what
+# API Gateway sends to the client.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_response_compression.py [servers] [jobs] [repeats]
+
+import os
+import sys
+import time
+import base64
+import random
+import statistics
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_policy/python/')
+
+import api_response
+
+levels = [1, 6, 9]
+
+
+def get_servers(count):
+    return [{'server_id': str(i), 'server_name': 'server{:05d}'.format(i), 'app_id': str(i % 500),
+             'server_fqdn': 'server{:05d}.corp.example.com'.format(i), 'server_os_family': random.choice(
+                 ['linux', 'windows']), 'server_os_version': 'Red Hat Enterprise Linux 8.6',
+             'server_environment': random.choice(['prod', 'dev', 'test']), 'server_tier': 'app', 'r_type': 'Rehost',
+             'subnet_IDs': ['subnet-{:017x}'.format(random.getrandbits(68))],
+             'securitygroup_IDs': ['sg-{:017x}'.format(random.getrandbits(68))], 'instanceType': 'm5.large',
+             '_history': {'createdBy': {'userRef': 'user', 'email': 'user@example.com'},
+                          'createdTimestamp': '2022-11-01T10:00:00.000000'},
+             '_version': '{:032x}'.format(random.getrandbits(128))} for i in range(count)]
+
+
+def get_jobs(count):
+    jobs = []
+    for i in range(count):
+        output = ''.join('{} server{:05d}.corp.example.com: {}\n'.format(
+            '2022-11-01 10:{:02d}:{:02d}'.format(line // 60 % 60, line % 60), random.randrange(20000),
+            random.choice(['Connected to server', 'Agent installed successfully', 'Copying file 4 of 12',
+                           'Service started', 'ERROR: Unable to reach endpoint, retrying']))
+            for line in range(400))
+        jobs.append({'SSMId': 'job-' + str(i), 'uuid': '{:032x}'.format(random.getrandbits(128)),
+                     'status': 'COMPLETE', 'script': {'script_name': '0-Check-MGN-Prerequisites'},
+                     'outputLastMessage': 'Job complete', 'output': output,
+                     '_history': {'createdTimestamp': '2022-11-01T10:00:00.000000',
+                                  'completedTimestamp': '2022-11-01T10:20:00.000000'}})
+    return jobs
+
+
+def get_scripts(count):
+    return [{'package_uuid': '{:032x}'.format(random.getrandbits(128)), 'script_name': 'script-' + str(i),
+             'version': str(i % 4 + 1), 'default': '1', 'script_description': 'Installs and verifies the agent.',
+             'script_masterfile': 'main.py', 'script_update_url': 'N/A',
+             'script_arguments': [{'name': 'Waveid', 'description': 'Name of wave.', 'type': 'relationship',
+                                   'rel_entity': 'wave', 'rel_key': 'wave_id', 'rel_display_attribute': 'wave_name'}]}
+            for i in range(count)]
+
+
+def time_compress(body, encoding, level, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        compressed = api_response.compress(body, encoding, level)
+        encoded = base64.b64encode(compressed)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(compressed), len(encoded)
+
+
+def main():
+    servers = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    random.seed(1)
+    payloads = [('servers', get_servers(servers)), ('ssm jobs', get_jobs(jobs)), ('scripts', get_scripts(50))]
+    print('{:<10}{:<9}{:>6}{:>12}{:>12}{:>12}{:>8}{:>10}{:>14}'.format(
+        'payload', 'encoding', 'level', 'body KB', 'compr. KB', 'base64 KB', 'ratio', 'ms', 'KB saved/ms'))
+    for name, payload in payloads:
+        body = api_response.dumps(payload).encode('utf-8')
+        for encoding in api_response.supported_encodings:
+            for level in levels:
+                seconds, compressed, encoded = time_compress(body, encoding, level, repeats)
+                print('{:<10}{:<9}{:>6}{:>12.1f}{:>12.1f}{:>12.1f}{:>8.2f}{:>10.2f}{:>14.1f}'.format(
+                    name, encoding, level, len(body) / 1024, compressed / 1024, encoded / 1024,
+                    len(body) / compressed, seconds * 1000, (len(body) - compressed) / 1024 / (seconds * 1000)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Counts DynamoDB calls made against the schema table per item API request, comparing the previous
+# scan based schema lookup with schema_cache.
+#
+# Usage: python lambda_unit_test/benchmarks/bench_schema_cache.py [requests] [custom schemas]
+
+import os
+import sys
+import io
+import json
+import logging
+import contextlib
+import collections
+from pathlib import Path
+
+os.environ.update({'AWS_DEFAULT_REGION': 'us-east-1', 'region': 'us-east-1', 'application': 'cmf',
+                   'environment': 'unittest', 'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing'})
+
+package_root_directory = Path(__file__).resolve().parents[2]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_items/python/')
+
+import boto3
+import botocore.client
+from moto import mock_dynamodb
+
+SCHEMA_TABLE = 'cmf-unittest-schema'
+
+calls = collections.Counter()
+_make_api_call = botocore.client.BaseClient._make_api_call
+
+
+def counting_make_api_call(self, operation_name, api_params):
+    if self.meta.service_model.service_name == 'dynamodb':
+        calls[(operation_name, api_params.get('TableName', ''))] += 1
+    return _make_api_call(self, operation_name, api_params)
+
+
+botocore.client.BaseClient._make_api_call = counting_make_api_call
+
+
+def create_table(client, name, key):
+    client.create_table(TableName=name, BillingMode='PAY_PER_REQUEST',
+                        KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                        AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}])
+
+
+def setup_tables(custom_schemas):
+    client = boto3.client('dynamodb')
+    create_table(client, SCHEMA_TABLE, 'schema_name')
+    create_table(client, 'cmf-unittest-apps', 'app_id')
+    create_table(client, 'cmf-unittest-roles', 'role_id')
+    create_table(client, 'cmf-unittest-policies', 'policy_id')
+
+    attributes = [{'M': {'name': {'S': 'app_id'}, 'type': {'S': 'string'}}},
+                  {'M': {'name': {'S': 'app_name'}, 'type': {'S': 'string'}}}]
+    attributes.extend({'M': {'name': {'S': 'attr_' + str(i)}, 'type': {'S': 'string'}}} for i in range(150))
+    client.put_item(TableName=SCHEMA_TABLE, Item={'schema_name': {'S': 'app'}, 'schema_type': {'S': 'user'},
+                                                  'attributes': {'L': attributes}})
+    for i in range(custom_schemas):
+        client.put_item(TableName=SCHEMA_TABLE, Item={'schema_name': {'S': 'custom' + str(i)},
+                                                      'schema_type': {'S': 'user'},
+                                                      'attributes': {'L': attributes}})
+
+    client.put_item(TableName='cmf-unittest-apps', Item={'app_id': {'S': '1'}, 'app_name': {'S': 'app 1'}})
+    client.put_item(TableName='cmf-unittest-roles',
+                    Item={'role_id': {'S': '1'}, 'role_name': {'S': 'FactoryAdmin'},
+                          'groups': {'L': [{'M': {'group_name': {'S': 'admin'}}}]},
+                          'policies': {'L': [{'M': {'policy_id': {'S': '1'}}}]}})
+    client.put_item(TableName='cmf-unittest-policies',
+                    Item={'policy_id': {'S': '1'}, 'policy_name': {'S': 'Administrator'},
+                          'entity_access': {'L': [{'M': {
+                              'schema_name': {'S': 'application'}, 'create': {'BOOL': True},
+                              'update': {'BOOL': True}, 'delete': {'BOOL': True}, 'read': {'BOOL': True},
+                              'attributes': {'L': [{'M': {'attr_name': {'S': 'app_name'}}}]}}}]}})
+
+
+def legacy_get_schema(schema_name):
+    # Schema lookup as performed before schema_cache, one full table scan per lookup.
+    schema_table = boto3.resource('dynamodb').Table(SCHEMA_TABLE)
+    for data_schema in schema_table.scan()['Items']:
+        if data_schema['schema_name'] == schema_name:
+            return data_schema
+    return None
+
+
+def schema_calls():
+    return sum(count for (operation, table), count in calls.items() if table == SCHEMA_TABLE)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    custom_schemas = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    claims = {'cognito:groups': 'admin', 'cognito:username': 'username', 'email': 'username@email.com'}
+    scenarios = [
+        ('items GET', 'lambda_items', 1,
+         {'httpMethod': 'GET', 'pathParameters': {'schema': 'app'}}),
+        ('item GET', 'lambda_item', 1,
+         {'httpMethod': 'GET', 'pathParameters': {'schema': 'app', 'id': '1'}}),
+        ('item PUT', 'lambda_item', 2,
+         {'httpMethod': 'PUT', 'pathParameters': {'schema': 'app', 'id': '1'},
+          'body': json.dumps({'app_name': 'app 1'}), 'requestContext': {'authorizer': {'claims': claims}}}),
+    ]
+
+    with mock_dynamodb():
+        setup_tables(custom_schemas)
+        from lambda_functions.lambda_items import lambda_items
+        from lambda_functions.lambda_item import lambda_item
+        handlers = {'lambda_items': lambda_items, 'lambda_item': lambda_item}
+        logging.getLogger().setLevel(logging.ERROR)
+
+        print('Schema table calls per request ({} requests, {} schemas)'.format(requests, custom_schemas + 1))
+        print('{:<12}{:>10}{:>10}'.format('request', 'before', 'after'))
+        for name, handler, legacy_lookups, event in scenarios:
+            calls.clear()
+            for _ in range(requests):
+                for _ in range(legacy_lookups):
+                    legacy_get_schema('app')
+            before = schema_calls() / requests
+
+            calls.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(requests):
+                    handlers[handler].lambda_handler(event, None)
+            after = schema_calls() / requests
+
+            print('{:<12}{:>10.2f}{:>10.2f}'.format(name, before, after))
+
+
+if __name__ == '__main__':
+    main()
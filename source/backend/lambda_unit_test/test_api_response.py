@@ -0,0 +1,99 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+import unittest
+import json
+import datetime
+import gzip
+import zlib
+import base64
+import logging
+from decimal import Decimal
+from unittest import TestCase
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+
+import api_response
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+class ApiResponseTest(TestCase):
+
+    def test_dumps(self):
+        log.info("Testing api_response encodes Decimal, bytes and datetime values")
+        value = {'cpu_count': Decimal('4'), 'memory_gb': Decimal('15.5'), 'disk_gb': Decimal('1E+2'),
+                 'script_file': b'UEsDBA==', 'created': datetime.datetime(2022, 11, 1, 10, 0, 0),
+                 'tags': {'b', 'a'}}
+        self.assertEqual(json.loads(api_response.dumps(value)),
+                         {'cpu_count': 4, 'memory_gb': 15.5, 'disk_gb': 100, 'script_file': 'UEsDBA==',
+                          'created': '2022-11-01T10:00:00', 'tags': ['a', 'b']})
+        self.assertEqual(json.loads(api_response.dumps(value, decimal_as_str=True))['memory_gb'], '15.5')
+        # Values without Decimals are encoded exactly as json.dumps does.
+        self.assertEqual(api_response.dumps([{'app_id': '1', 'app_name': 'app'}]),
+                         json.dumps([{'app_id': '1', 'app_name': 'app'}]))
+        with self.assertRaises(TypeError):
+            api_response.dumps({'value': object()})
+
+    def test_response(self):
+        log.info("Testing api_response builds proxy responses")
+        response = api_response.response({'errors': ['invalid']}, 400, {'ETag': '"1"'})
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(response['body'], '{"errors": ["invalid"]}')
+        self.assertEqual(response['headers'], {**api_response.default_http_headers, 'ETag': '"1"'})
+        # String bodies are returned as is.
+        response = api_response.response('Item was successfully deleted.')
+        self.assertEqual(response, {'headers': api_response.default_http_headers, 'statusCode': 200,
+                                    'body': 'Item was successfully deleted.'})
+        self.assertIsNot(response['headers'], api_response.default_http_headers)
+
+    def test_response_compressed(self):
+        log.info("Testing api_response compresses large bodies for clients accepting it")
+        items = [{'server_id': str(i), 'server_name': 'server' + str(i)} for i in range(1000)]
+        event = {'headers': {'accept': api_response.compressed_media_type, 'accept-encoding': 'gzip, deflate, br'}}
+        response = api_response.response(items, event=event)
+        self.assertTrue(response['isBase64Encoded'])
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(base64.b64decode(response['body']))), items)
+
+        event['headers']['accept-encoding'] = 'gzip;q=0, deflate'
+        response = api_response.response(items, event=event)
+        self.assertEqual(response['headers']['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(base64.b64decode(response['body']))), items)
+
+        # Small bodies, clients not accepting a supported encoding and clients not requesting the compressed media
+        # type, which API Gateway would return as base64 text, are not compressed.
+        self.assertEqual(api_response.response(items[:2], event=event)['body'], json.dumps(items[:2]))
+        for headers in [{'Accept': api_response.compressed_media_type, 'Accept-Encoding': 'br'},
+                        {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}, None]:
+            response = api_response.response(items, event={'headers': headers})
+            self.assertNotIn('isBase64Encoded', response)
+            self.assertNotIn('Content-Encoding', response['headers'])
+            self.assertEqual(response['body'], json.dumps(items))
@@ -0,0 +1,146 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+import boto3
+import logging
+import os
+import threading
+import botocore.exceptions
+from types import SimpleNamespace
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import bulk_write
+import bulk_read
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+class ThrottledReadClient(object):
+    # Returns the last unprocessed keys of every call as UnprocessedKeys, keys in always_fail are never read.
+    def __init__(self, items, unprocessed=1, always_fail=(), error_code=None):
+        self.items = items
+        self.unprocessed = unprocessed
+        self.always_fail = always_fail
+        self.error_code = error_code
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def batch_get_item(self, RequestItems):
+        with self.lock:
+            self.calls += 1
+        if self.error_code:
+            raise botocore.exceptions.ClientError({'Error': {'Code': self.error_code, 'Message': 'error'}},
+                                                  'BatchGetItem')
+        table_name, request = list(RequestItems.items())[0]
+        if len(request['Keys']) > bulk_read.max_batch_size:
+            raise ValueError('Too many keys in batch.')
+        unprocessed = [key for key in request['Keys'] if key['server_id'] in self.always_fail]
+        processed = [key for key in request['Keys'] if key not in unprocessed]
+        held = min(self.unprocessed, len(processed) - 1)
+        if held > 0:
+            unprocessed.extend(processed[-held:])
+            processed = processed[:-held]
+        response = {'Responses': {table_name: [self.items[key['server_id']] for key in processed
+                                               if key['server_id'] in self.items]}}
+        if unprocessed:
+            response['UnprocessedKeys'] = {table_name: {**request, 'Keys': unprocessed}}
+        return response
+
+
+def get_table(client):
+    return SimpleNamespace(name='cmf-unittest-servers', meta=SimpleNamespace(client=client))
+
+
+@mock.patch.object(bulk_write, 'base_delay', 0)
+class BulkReadRetryTest(TestCase):
+    def setUp(self):
+        self.items = {str(i): {'server_id': str(i), 'server_name': 'server' + str(i)} for i in range(250)}
+
+    def test_get_items_retries_unprocessed(self):
+        log.info("Testing unprocessed keys are retried until every chunk is read")
+        client = ThrottledReadClient(self.items, unprocessed=3)
+        ids = [str(i) for i in range(260)]
+        items, failed = bulk_read.get_items(get_table(client), 'server_id', ids)
+        self.assertEqual(sorted(items.keys(), key=int), [str(i) for i in range(250)])
+        self.assertEqual(failed, {})
+        self.assertGreater(client.calls, 3)
+
+    def test_get_items_reports_failed(self):
+        log.info("Testing keys never processed or failing with an error are reported")
+        client = ThrottledReadClient(self.items, unprocessed=0, always_fail=('7',))
+        items, failed = bulk_read.get_items(get_table(client), 'server_id', ['1', '7'])
+        self.assertEqual(list(items.keys()), ['1'])
+        self.assertEqual(list(failed.keys()), ['7'])
+        self.assertEqual(client.calls, bulk_write.max_attempts)
+
+        client = ThrottledReadClient(self.items, error_code='ValidationException')
+        items, failed = bulk_read.get_items(get_table(client), 'server_id', ['1', '2'])
+        self.assertEqual(items, {})
+        self.assertIn('ValidationException', failed['2'])
+        self.assertEqual(client.calls, 1)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class BulkReadTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+        items = [{'server_id': str(i), 'server_name': 'server' + str(i), 'server_os_family': 'linux'}
+                 for i in range(150)]
+        bulk_write.put_items(self.servers_table_name, items, 'server_id', self.client)
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.servers_table_name)
+
+    def test_get_items_projection(self):
+        log.info("Testing items are read in concurrent chunks with a projection")
+        table = boto3.resource('dynamodb').Table(self.servers_table_name)
+        items, failed = bulk_read.get_items(table, 'server_id', [str(i) for i in range(40, 160)] + ['141'],
+                                            ['server_name'])
+        self.assertEqual(failed, {})
+        self.assertEqual(sorted(items.keys(), key=int), [str(i) for i in range(40, 150)])
+        self.assertEqual(items['141'], {'server_name': 'server141'})
@@ -0,0 +1,149 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+import threading
+import botocore.exceptions
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import bulk_write
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+class ThrottledWriteClient(object):
+    # Returns the last unprocessed requests of every call as UnprocessedItems, keys in always_fail are never written.
+    def __init__(self, unprocessed=1, always_fail=(), error_code=None):
+        self.unprocessed = unprocessed
+        self.always_fail = always_fail
+        self.error_code = error_code
+        self.written = []
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems):
+        with self.lock:
+            self.calls += 1
+        if self.error_code:
+            raise botocore.exceptions.ClientError({'Error': {'Code': self.error_code, 'Message': 'error'}},
+                                                  'BatchWriteItem')
+        table_name, write_requests = list(RequestItems.items())[0]
+        self.assertLimit(write_requests)
+        unprocessed = [request for request in write_requests
+                       if request['PutRequest']['Item']['server_id']['S'] in self.always_fail]
+        processed = [request for request in write_requests if request not in unprocessed]
+        held = min(self.unprocessed, len(processed) - 1)
+        if held > 0:
+            unprocessed.extend(processed[-held:])
+            processed = processed[:-held]
+        with self.lock:
+            self.written.extend(request['PutRequest']['Item']['server_id']['S'] for request in processed)
+        return {'UnprocessedItems': {table_name: unprocessed} if unprocessed else {}}
+
+    def assertLimit(self, write_requests):
+        if len(write_requests) > bulk_write.max_batch_size:
+            raise ValueError('Too many items in batch.')
+
+
+@mock.patch.object(bulk_write, 'base_delay', 0)
+class BulkWriteRetryTest(TestCase):
+    def setUp(self):
+        self.items = [{'server_id': str(i), 'server_name': 'server' + str(i)} for i in range(60)]
+
+    def test_put_items_retries_unprocessed(self):
+        log.info("Testing unprocessed items are retried until every chunk is written")
+        client = ThrottledWriteClient(unprocessed=2)
+        result = bulk_write.put_items('cmf-unittest-servers', self.items, 'server_id', client)
+        self.assertEqual(sorted(client.written, key=int), [item['server_id'] for item in self.items])
+        self.assertEqual(sorted(result.succeeded, key=int), [item['server_id'] for item in self.items])
+        self.assertEqual(result.failed, {})
+        self.assertEqual(result.metrics['batches'], 3)
+        self.assertEqual(result.metrics['succeeded'], 60)
+        self.assertGreater(result.metrics['retries'], 0)
+
+    def test_put_items_reports_failed(self):
+        log.info("Testing items never processed are reported as failed")
+        client = ThrottledWriteClient(unprocessed=0, always_fail=('7', '42'))
+        result = bulk_write.put_items('cmf-unittest-servers', self.items, 'server_id', client)
+        self.assertEqual(sorted(result.failed.keys()), ['42', '7'])
+        self.assertEqual(len(result.succeeded), 58)
+        self.assertEqual(client.calls, 3 + 2 * (bulk_write.max_attempts - 1))
+
+    def test_put_items_error(self):
+        log.info("Testing errors that are not retried fail the chunk")
+        client = ThrottledWriteClient(error_code='ValidationException')
+        result = bulk_write.put_items('cmf-unittest-servers', self.items[:10], 'server_id', client)
+        self.assertEqual(len(result.failed), 10)
+        self.assertEqual(client.calls, 1)
+        self.assertIn('ValidationException', result.failed['0'])
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class BulkWriteTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.servers_table_name)
+
+    def test_put_and_delete_items(self):
+        log.info("Testing items are written and deleted in concurrent chunks")
+        items = [{'server_id': str(i), 'server_name': 'server' + str(i), 'tags': ['a', 'b']} for i in range(110)]
+        result = bulk_write.put_items(self.servers_table_name, items, 'server_id', self.client)
+        self.assertEqual(result.metrics['succeeded'], 110)
+        self.assertEqual(self.client.scan(TableName=self.servers_table_name, Select='COUNT')['Count'], 110)
+
+        result = bulk_write.delete_items(self.servers_table_name, [str(i) for i in range(100)], 'server_id',
+                                         self.client)
+        self.assertEqual(len(result.succeeded), 100)
+        self.assertEqual(self.client.scan(TableName=self.servers_table_name, Select='COUNT')['Count'], 10)
@@ -0,0 +1,164 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+import threading
+from types import SimpleNamespace
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import dynamodb_scan
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+class SegmentedScanClient(object):
+    # moto ignores Segment and TotalSegments, this client implements them over a list of items so the parallel
+    # scan can be tested. Items are assigned to segments by the integer value of their key.
+    def __init__(self, items, page_size):
+        self.items = items
+        self.page_size = page_size
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self.lock:
+            self.requests.append(kwargs)
+        segment_items = [item for item in self.items
+                         if int(item['server_id']) % kwargs.get('TotalSegments', 1) == kwargs.get('Segment', 0)]
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start = segment_items.index(kwargs['ExclusiveStartKey']) + 1
+        page = segment_items[start:start + self.page_size]
+        response = {'Items': page}
+        if start + self.page_size < len(segment_items):
+            response['LastEvaluatedKey'] = page[-1]
+        return response
+
+
+class DynamoDBScanParallelTest(TestCase):
+    def setUp(self):
+        self.items = [{'server_id': str(i)} for i in range(50)]
+        self.client = SegmentedScanClient(self.items, page_size=3)
+        self.table = SimpleNamespace(name='cmf-unittest-servers', meta=SimpleNamespace(client=self.client))
+
+    def test_scan_table_segments(self):
+        log.info("Testing parallel scan returns every item once")
+        scan_data = dynamodb_scan.scan_table(self.table, total_segments=4)
+        self.assertEqual(sorted(scan_data, key=lambda item: int(item['server_id'])), self.items)
+        self.assertEqual(set(request['Segment'] for request in self.client.requests), {0, 1, 2, 3})
+        self.assertTrue(all(request['TotalSegments'] == 4 for request in self.client.requests))
+
+    def test_scan_table_filter_arguments(self):
+        log.info("Testing scan arguments are passed to every segment")
+        dynamodb_scan.scan_table(self.table, ['server_id'], total_segments=2, consistent_read=False,
+                                 FilterExpression='filter')
+        for request in self.client.requests:
+            self.assertEqual(request['FilterExpression'], 'filter')
+            self.assertEqual(request['ProjectionExpression'], '#p0')
+            self.assertFalse(request['ConsistentRead'])
+
+    def test_iter_scan_table_stops_early(self):
+        log.info("Testing streaming scan only requests pages as they are consumed")
+        items = dynamodb_scan.iter_scan_table(self.table, total_segments=2)
+        next(items)
+        items.close()
+        self.assertEqual(len(self.client.requests), 2)
+
+    def test_get_total_segments(self):
+        log.info("Testing number of segments is based on the table size")
+        self.assertEqual(dynamodb_scan.get_total_segments(self.table, 3), 3)
+        with mock.patch.object(dynamodb_scan, 'get_table_size', return_value=0):
+            self.assertEqual(dynamodb_scan.get_total_segments(self.table), 1)
+        with mock.patch.object(dynamodb_scan, 'get_table_size',
+                               return_value=dynamodb_scan.segment_size_bytes * 2 + 1):
+            self.assertEqual(dynamodb_scan.get_total_segments(self.table), 3)
+        with mock.patch.object(dynamodb_scan, 'get_table_size',
+                               return_value=dynamodb_scan.segment_size_bytes * 1000):
+            self.assertEqual(dynamodb_scan.get_total_segments(self.table), dynamodb_scan.max_segments)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class DynamoDBScanTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.servers_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+        for i in range(10):
+            self.servers_client.put_item(
+                TableName=self.servers_table_name,
+                Item={'server_id': {'S': str(i)}, 'server_name': {'S': 'server' + str(i)}, 'app_id': {'S': '1'}})
+        dynamodb_scan._table_sizes.clear()
+
+    def tearDown(self):
+        dynamodb_scan._table_sizes.clear()
+        self.servers_client.delete_table(TableName=self.servers_table_name)
+
+    def test_scan_table_pages(self):
+        log.info("Testing serial scan follows LastEvaluatedKey")
+        table = boto3.resource('dynamodb').Table(self.servers_table_name)
+        scan_data = dynamodb_scan.scan_table(table, Limit=3)
+        self.assertEqual(sorted(item['server_id'] for item in scan_data), [str(i) for i in range(10)])
+        self.assertEqual(scan_data[0]['server_name'], 'server' + scan_data[0]['server_id'])
+
+    def test_scan_table_projection(self):
+        log.info("Testing scan returns only the projected attributes")
+        table = boto3.resource('dynamodb').Table(self.servers_table_name)
+        for item in dynamodb_scan.iter_scan_table(table, ['server_id', 'app_id']):
+            self.assertEqual(set(item.keys()), {'server_id', 'app_id'})
+
+    def test_get_table_size_cached(self):
+        log.info("Testing table size is read once per ttl")
+        table = boto3.resource('dynamodb').Table(self.servers_table_name)
+        with mock.patch.object(table.meta.client, 'describe_table',
+                               return_value={'Table': {'TableSizeBytes': 10}}) as describe_table:
+            self.assertEqual(dynamodb_scan.get_table_size(table), 10)
+            self.assertEqual(dynamodb_scan.get_table_size(table), 10)
+            describe_table.assert_called_once_with(TableName=self.servers_table_name)
@@ -0,0 +1,130 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import item_changes
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemChangesTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        item_changes._changes_table = None
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+        self.changes_table_name = '{}-{}-'.format('cmf', 'unittest') + 'item-changes'
+        self.client.create_table(
+            TableName=self.changes_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+              {"AttributeName": "change_key", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+              {"AttributeName": "change_key", "AttributeType": "S"},
+            ],
+        )
+        self.servers_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.servers_table_name)
+        for server_id in range(1, 5):
+            self.servers_table.put_item(Item={'server_id': str(server_id), 'server_name': 'server' + str(server_id),
+                                              'server_os_family': 'linux'})
+
+    def tearDown(self):
+        item_changes._changes_table = None
+        self.client.delete_table(TableName=self.servers_table_name)
+        self.client.delete_table(TableName=self.changes_table_name)
+
+    def test_parse_since(self):
+        log.info("Testing since values are converted to UTC timestamps")
+        self.assertEqual(item_changes.parse_since('2022-05-01T10:00:00'), '2022-05-01T10:00:00.000000')
+        self.assertEqual(item_changes.parse_since('2022-05-01T10:00:00Z'), '2022-05-01T10:00:00.000000')
+        self.assertEqual(item_changes.parse_since('2022-05-01T12:00:00.5+02:00'), '2022-05-01T10:00:00.500000')
+        self.assertIsNone(item_changes.parse_since('yesterday'))
+        self.assertFalse(item_changes.is_within_retention('2000-01-01T00:00:00.000000'))
+
+    def test_get_delta(self):
+        log.info("Testing the delta returns changed items and tombstones of deleted items")
+        item_changes.record_changes('server', ['1'], 'create')
+        since = item_changes.get_timestamp()
+        item_changes.record_changes('server', ['2', '3'], 'create')
+        item_changes.record_change('server', '3', 'update')
+        item_changes.record_change('server', '4', 'delete')
+        self.servers_table.delete_item(Key={'server_id': '4'})
+        item_changes.record_change('app', '5', 'create')
+
+        delta = item_changes.get_delta(self.servers_table, 'server', since)
+        self.assertEqual([item['server_id'] for item in delta['items']], ['2', '3'])
+        self.assertEqual(delta['deleted'], ['4'])
+        self.assertLess(delta['since'], item_changes.get_timestamp())
+
+        delta = item_changes.get_delta(self.servers_table, 'server', since, ['server_name'])
+        self.assertEqual(delta['items'], [{'server_name': 'server2'}, {'server_name': 'server3'}])
+        self.assertEqual(delta['deleted'], ['4'])
+
+    def test_version_and_etag(self):
+        log.info("Testing recorded changes increment the version used for the ETag")
+        self.assertEqual(item_changes.get_version('server'), 0)
+        item_changes.record_change('server', '1', 'update')
+        item_changes.record_changes('server', ['2', '3'], 'create')
+        self.assertEqual(item_changes.get_version('server'), 2)
+        self.assertEqual(item_changes.get_version('app'), 0)
+
+        etag = item_changes.get_etag('server', 2, {'limit': '10'})
+        self.assertNotEqual(etag, item_changes.get_etag('server', 2, {'limit': '20'}))
+        self.assertTrue(item_changes.is_not_modified({'headers': {'if-none-match': 'W/' + etag}}, etag))
+        self.assertTrue(item_changes.is_not_modified({'headers': {'If-None-Match': '"x", ' + etag}}, etag))
+        self.assertFalse(item_changes.is_not_modified({'headers': {'If-None-Match': '"x"'}}, etag))
+        self.assertFalse(item_changes.is_not_modified({'headers': None}, etag))
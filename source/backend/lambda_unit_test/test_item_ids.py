@@ -0,0 +1,95 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import item_ids
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemIdsTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.policies_table_name = '{}-{}-'.format('cmf', 'unittest') + 'policies'
+        self.client.create_table(
+            TableName=self.policies_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "policy_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "policy_id", "AttributeType": "S"},
+            ],
+        )
+        self.ids_table_name = '{}-{}-'.format('cmf', 'unittest') + 'ids'
+        self.client.create_table(
+            TableName=self.ids_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "counter_name", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "counter_name", "AttributeType": "S"},
+            ],
+        )
+        for policy_id in ['1', '2', '9', 'custom']:
+            self.client.put_item(TableName=self.policies_table_name, Item={'policy_id': {'S': policy_id}})
+        self.policies_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.policies_table_name)
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.policies_table_name)
+        self.client.delete_table(TableName=self.ids_table_name)
+
+    def test_allocate_ids_seeded(self):
+        log.info("Testing first allocation is seeded from the highest existing id")
+        self.assertEqual(item_ids.allocate_id(self.policies_table, 'policy_id'), '10')
+        self.assertEqual(item_ids.allocate_id(self.policies_table, 'policy_id'), '11')
+
+    def test_allocate_ids_block(self):
+        log.info("Testing a block of ids is reserved in one call")
+        self.assertEqual(item_ids.allocate_ids(self.policies_table, 'policy_id', 5000), 10)
+        with mock.patch.object(item_ids, 'seed_counter') as seed_counter:
+            self.assertEqual(item_ids.allocate_ids(self.policies_table, 'policy_id', 2), 5010)
+            seed_counter.assert_not_called()
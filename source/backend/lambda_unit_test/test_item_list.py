@@ -0,0 +1,191 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import item_list
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+class ItemListTokenTest(TestCase):
+
+    def test_next_token(self):
+        log.info("Testing next_token round trip and validation")
+        last_evaluated_key = {'server_id': '1', '_item_type': 'server', 'server_name': 'server1'}
+        next_token = item_list.encode_next_token(last_evaluated_key)
+        self.assertEqual(item_list.decode_next_token(next_token, 'server'), last_evaluated_key)
+        self.assertIsNone(item_list.decode_next_token(next_token, 'app'))
+        self.assertIsNone(item_list.decode_next_token('not a token', 'server'))
+        self.assertIsNone(item_list.decode_next_token(item_list.encode_next_token(['server']), 'server'))
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemListBackfillTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.servers_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+        self.servers_client.put_item(TableName=self.servers_table_name,
+                                     Item={'server_id': {'S': '1'}, 'server_name': {'S': 'server1'}})
+        self.servers_client.put_item(TableName=self.servers_table_name,
+                                     Item={'server_id': {'S': '2'}, 'server_name': {'S': 'server2'},
+                                           '_item_type': {'S': 'server'}})
+
+    def tearDown(self):
+        self.servers_client.delete_table(TableName=self.servers_table_name)
+
+    def test_backfill_item_type(self):
+        log.info("Testing _item_type is added to items without it")
+        table = boto3.resource('dynamodb').Table(self.servers_table_name)
+        self.assertEqual(item_list.backfill_item_type(table, 'server'), 1)
+        item = table.get_item(Key={'server_id': '1'})['Item']
+        self.assertEqual(item, {'server_id': '1', 'server_name': 'server1', '_item_type': 'server'})
+        self.assertEqual(item_list.backfill_item_type(table, 'server'), 0)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemListIndexTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        item_list.item_indexes._index_status.clear()
+        self.apps_table_name = '{}-{}-'.format('cmf', 'unittest') + 'apps'
+        self.apps_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.apps_client.create_table(
+            TableName=self.apps_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "app_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "app_id", "AttributeType": "S"},
+              {"AttributeName": "_item_type", "AttributeType": "S"},
+              {"AttributeName": "app_name", "AttributeType": "S"},
+              {"AttributeName": "wave_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'app_name-index',
+                    'KeySchema': [
+                        {'AttributeName': '_item_type', 'KeyType': 'HASH'},
+                        {'AttributeName': 'app_name', 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'wave_id-index',
+                    'KeySchema': [
+                        {'AttributeName': 'wave_id', 'KeyType': 'HASH'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ]
+        )
+        for app_id, app_name, wave_id, owner in [('1', 'delta', '1', 'a'), ('2', 'alpha', '2', 'a'),
+                                                 ('3', 'echo', '1', 'b'), ('4', 'charlie', '1', 'a'),
+                                                 ('5', 'bravo', '2', 'b')]:
+            self.apps_client.put_item(
+                TableName=self.apps_table_name,
+                Item={'app_id': {'S': app_id}, 'app_name': {'S': app_name}, 'wave_id': {'S': wave_id},
+                      'app_owner': {'S': owner}, '_item_type': {'S': 'app'}})
+        self.schema = {'schema_name': 'app', 'attributes': [
+            {'name': 'app_name', 'type': 'string'},
+            {'name': 'wave_id', 'type': 'relationship', 'indexed': True},
+            {'name': 'app_owner', 'type': 'relationship', 'indexed': True},
+            {'name': 'tags', 'type': 'relationship', 'indexed': True, 'listMultiSelect': True}
+        ]}
+
+    def tearDown(self):
+        self.apps_client.delete_table(TableName=self.apps_table_name)
+
+    def test_get_indexed_attributes(self):
+        log.info("Testing only single value attributes can be indexed")
+        self.assertEqual(item_list.get_indexed_attributes(self.schema), ['wave_id', 'app_owner'])
+
+    def test_list_items_index(self):
+        log.info("Testing lists filtered on an indexed attribute query the attribute index")
+        table = boto3.resource('dynamodb').Table(self.apps_table_name)
+        list_request, errors = item_list.get_list_request({'wave_id': '1', 'app_owner': 'a'}, self.schema)
+        self.assertEqual(errors, [])
+        with mock.patch.object(item_list, 'query_name_index') as mock_query_name_index:
+            items = item_list.list_items(table, list_request, 'app')
+            mock_query_name_index.assert_not_called()
+        self.assertEqual([item['app_name'] for item in items], ['charlie', 'delta'])
+
+        # app_owner has no index, the filter is applied to the name index query.
+        list_request, errors = item_list.get_list_request({'app_owner': 'b'}, self.schema)
+        self.assertEqual([item['app_name'] for item in item_list.list_items(table, list_request, 'app')],
+                         ['bravo', 'echo'])
+
+    def test_list_items_index_pages(self):
+        log.info("Testing pages of an attribute index query continue from the last item returned")
+        table = boto3.resource('dynamodb').Table(self.apps_table_name)
+        names = []
+        query_string_parameters = {'wave_id': '1', 'limit': '2', 'attributes': 'app_name'}
+        while True:
+            list_request, errors = item_list.get_list_request(query_string_parameters, self.schema)
+            self.assertEqual(errors, [])
+            body = item_list.list_items(table, list_request, 'app')
+            self.assertTrue(all(list(item.keys()) == ['app_name'] for item in body['items']))
+            names.extend(item['app_name'] for item in body['items'])
+            if 'next_token' not in body:
+                break
+            next_token = body['next_token']
+            query_string_parameters = {**query_string_parameters, 'next_token': next_token}
+        self.assertEqual(sorted(names), ['charlie', 'delta', 'echo'])
+
+        # The token is only valid with the same filter.
+        _, errors = item_list.get_list_request({'wave_id': '2', 'limit': '2', 'next_token': next_token}, self.schema)
+        self.assertEqual(errors, ['next_token is not valid.'])
@@ -0,0 +1,124 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import item_names
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemNamesTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.servers_table_name = '{}-{}-'.format('cmf', 'unittest') + 'servers'
+        self.client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "server_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "server_id", "AttributeType": "S"},
+            ],
+        )
+        self.names_table_name = '{}-{}-'.format('cmf', 'unittest') + 'names'
+        self.client.create_table(
+            TableName=self.names_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "name_key", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "name_key", "AttributeType": "S"},
+            ],
+        )
+        self.client.put_item(TableName=self.servers_table_name,
+                             Item={'server_id': {'S': '1'}, 'server_name': {'S': 'Server1'}})
+        self.servers_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.servers_table_name)
+        self.names_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.names_table_name)
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.servers_table_name)
+        self.client.delete_table(TableName=self.names_table_name)
+
+    def test_reserve_name(self):
+        log.info("Testing a name can only be reserved by one item")
+        self.assertTrue(item_names.reserve_name(self.servers_table, 'server', 'Server1', '1'))
+        self.assertTrue(item_names.reserve_name(self.servers_table, 'server', 'server1', '1'))
+        self.assertFalse(item_names.reserve_name(self.servers_table, 'server', 'SERVER1', '2'))
+        self.assertEqual(self.names_table.get_item(Key={'name_key': 'server#server1'})['Item']['item_id'], '1')
+
+    def test_acquire_name(self):
+        log.info("Testing acquire_name reports whether the reservation was created")
+        self.assertEqual(item_names.acquire_name(self.servers_table, 'server', 'Server1', '1'), (True, True))
+        self.assertEqual(item_names.acquire_name(self.servers_table, 'server', 'server1', '1'), (True, False))
+        self.assertEqual(item_names.acquire_name(self.servers_table, 'server', 'server1', '2'), (False, False))
+
+    def test_reserve_names(self):
+        log.info("Testing bulk reservation returns items with names in use")
+        item_names.reserve_name(self.servers_table, 'server', 'Server1', '1')
+        items = [{'server_id': '2', 'server_name': 'server1'}, {'server_id': '3', 'server_name': 'server3'}]
+        self.assertEqual(item_names.reserve_names(self.servers_table, 'server', items), [items[0]])
+
+    def test_reserve_name_stale(self):
+        log.info("Testing a stale reservation is replaced")
+        self.names_table.put_item(Item={'name_key': 'server#server2', 'item_id': '5', 'reserved': 0})
+        self.assertTrue(item_names.reserve_name(self.servers_table, 'server', 'server2', '2'))
+        self.names_table.put_item(Item={'name_key': 'server#server1', 'item_id': '1', 'reserved': 0})
+        self.assertFalse(item_names.reserve_name(self.servers_table, 'server', 'server1', '2'))
+
+    def test_release_name(self):
+        log.info("Testing a reservation is only released by the item holding it")
+        item_names.reserve_name(self.servers_table, 'server', 'Server1', '1')
+        item_names.release_name('server', 'server1', '2')
+        self.assertIn('Item', self.names_table.get_item(Key={'name_key': 'server#server1'}))
+        item_names.release_name('server', 'server1', '1')
+        self.assertNotIn('Item', self.names_table.get_item(Key={'name_key': 'server#server1'}))
+
+    def test_backfill_names(self):
+        log.info("Testing names of existing items are reserved")
+        self.assertEqual(item_names.backfill_names(self.servers_table, 'server', self.names_table), 1)
+        self.assertEqual(self.names_table.get_item(Key={'name_key': 'server#server1'})['Item']['item_id'], '1')
+        self.assertEqual(item_names.backfill_names(self.servers_table, 'server', self.names_table), 0)
@@ -0,0 +1,136 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+import item_indexes
+import item_tree
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemTreeTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        item_indexes._index_status.clear()
+        self.client = boto3.client("dynamodb", region_name='us-east-1')
+        self.apps_table_name = 'cmf-unittest-apps'
+        self.servers_table_name = 'cmf-unittest-servers'
+        self.client.create_table(
+            TableName=self.apps_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[{"AttributeName": "app_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "app_id", "AttributeType": "S"},
+                {"AttributeName": "wave_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'wave_id-index',
+                'KeySchema': [{"AttributeName": "wave_id", "KeyType": "HASH"}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }]
+        )
+        self.client.create_table(
+            TableName=self.servers_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[{"AttributeName": "server_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "server_id", "AttributeType": "S"},
+                {"AttributeName": "app_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'app_id-index',
+                'KeySchema': [{"AttributeName": "app_id", "KeyType": "HASH"}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }]
+        )
+        self.apps_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.apps_table_name)
+        self.servers_table = boto3.resource('dynamodb', region_name='us-east-1').Table(self.servers_table_name)
+        self.apps_table.put_item(Item={'app_id': '1', 'app_name': 'b app', 'wave_id': '1',
+                                       'aws_accountid': '111111111111', 'aws_region': 'us-east-1'})
+        self.apps_table.put_item(Item={'app_id': '2', 'app_name': 'a app', 'wave_id': '1',
+                                       'aws_accountid': '222222222222', 'aws_region': 'US-EAST-1 '})
+        self.apps_table.put_item(Item={'app_id': '3', 'app_name': 'c app', 'wave_id': '2',
+                                       'aws_accountid': '111111111111', 'aws_region': 'us-east-1'})
+        self.servers_table.put_item(Item={'server_id': '1', 'server_name': 'server2', 'app_id': '1',
+                                          'server_os_family': 'linux'})
+        self.servers_table.put_item(Item={'server_id': '2', 'server_name': 'server1', 'app_id': '1',
+                                          'server_os_family': 'windows'})
+        self.servers_table.put_item(Item={'server_id': '3', 'server_name': 'server3', 'app_id': '2',
+                                          'server_os_family': 'Linux'})
+        self.servers_table.put_item(Item={'server_id': '4', 'server_name': 'server4', 'app_id': '3',
+                                          'server_os_family': 'linux'})
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.apps_table_name)
+        self.client.delete_table(TableName=self.servers_table_name)
+
+    def test_get_wave_tree(self):
+        log.info("Testing the apps of a wave are returned with their servers")
+        apps = item_tree.get_wave_tree('1', self.apps_table, self.servers_table)
+        self.assertEqual([app['app_id'] for app in apps], ['2', '1'])
+        self.assertEqual([server['server_id'] for server in apps[0]['servers']], ['3'])
+        self.assertEqual([server['server_id'] for server in apps[1]['servers']], ['2', '1'])
+        self.assertEqual(item_tree.get_wave_tree('3', self.apps_table, self.servers_table), [])
+
+    def test_group_servers(self):
+        log.info("Testing the servers of a wave are grouped by account and OS family")
+        apps = item_tree.get_wave_tree('1', self.apps_table, self.servers_table)
+        groups = item_tree.group_servers(apps, ['account'])
+        self.assertEqual([(group['aws_accountid'], group['aws_region'], len(group['servers'])) for group in groups],
+                         [('222222222222', 'us-east-1', 1), ('111111111111', 'us-east-1', 2)])
+        groups = item_tree.group_servers(apps, ['os'])
+        self.assertEqual([(group['os_family'], len(group['servers'])) for group in groups],
+                         [('linux', 2), ('windows', 1)])
+        self.assertEqual(len(item_tree.group_servers(apps, ['account', 'os'])), 3)
+
+    def test_query_by_attribute_scan(self):
+        log.info("Testing items are found with a scan when the table has no index on the attribute")
+        apps = item_indexes.query_by_attribute(self.apps_table, 'aws_accountid', '111111111111', ['app_id'])
+        self.assertEqual(sorted(app['app_id'] for app in apps), ['1', '3'])
+        self.assertEqual(item_indexes.get_index_status(self.apps_table, 'aws_accountid-index'), None)
+        self.assertEqual(item_indexes.get_index_status(self.apps_table, 'wave_id-index'), 'ACTIVE')
+
+    def test_create_index(self):
+        log.info("Testing an index is created on a relationship attribute")
+        self.assertTrue(item_indexes.create_index(self.servers_table, 'app_id'))
+        self.assertTrue(item_indexes.create_index(self.apps_table, 'aws_accountid'))
+        indexes = self.client.describe_table(TableName=self.apps_table_name)['Table']['GlobalSecondaryIndexes']
+        self.assertIn('aws_accountid-index', [index['IndexName'] for index in indexes])
@@ -0,0 +1,171 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+server_schema = {
+    'schema_name': 'server',
+    'lastModifiedTimestamp': '2022-01-01T00:00:00.000000',
+    'attributes': [
+        {'name': 'server_id', 'type': 'string', 'required': True, 'hidden': True},
+        {'name': 'server_name', 'type': 'string', 'required': True, 'validation_regex': '^[a-z0-9-]+$',
+         'validation_regex_msg': 'Server name must be lowercase.'},
+        {'name': 'server_os_family', 'type': 'list', 'listvalue': 'windows,linux', 'required': True},
+        {'name': 'tags', 'type': 'list', 'listvalue': 'web,db', 'listMultiSelect': True},
+        {'name': 'ip_addresses', 'type': 'multivalue-string', 'validation_regex': '^[0-9.]+$'},
+        {'name': 'server_fqdn', 'type': 'string',
+         'conditions': {'queries': [{'attribute': 'server_os_family', 'comparator': '=', 'value': 'linux'}],
+                        'outcomes': {'true': ['required'], 'false': ['not_required']}}}
+    ]
+}
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+class ItemValidationTest(TestCase):
+
+    def test_compiled_schema(self):
+        import item_validation
+        log.info("Testing compiled schema lookups")
+        compiled_schema = item_validation.get_compiled_schema(server_schema)
+        self.assertIn('server_name', compiled_schema.attributes)
+        self.assertEqual(compiled_schema.list_values['server_os_family'], frozenset(['windows', 'linux']))
+        self.assertIn('ip_addresses', compiled_schema.regex_patterns)
+        self.assertEqual(compiled_schema.required_rules,
+                         [('server_name', None), ('server_os_family', None),
+                          ('server_fqdn', server_schema['attributes'][5]['conditions'])])
+        self.assertIs(item_validation.get_compiled_schema(server_schema), compiled_schema)
+
+    def test_check_valid_item_create_required(self):
+        import item_validation
+        log.info("Testing required and conditionally required attributes")
+        result = item_validation.check_valid_item_create({'server_os_family': 'linux'}, server_schema)
+        self.assertEqual(result, ['Attribute: server_name is required and not provided.',
+                                  'Attribute: server_fqdn is required and not provided.'])
+
+    def test_check_valid_item_create_values(self):
+        import item_validation
+        log.info("Testing attribute value validation")
+        item = {'server_name': 'Server1', 'server_os_family': 'windows', 'tags': ['web', 'app'],
+                'ip_addresses': ['10.0.0.1', 'host'], 'unknown': 'x', '_history': {}}
+        result = item_validation.check_valid_item_create(item, server_schema)
+        self.assertEqual(result, ['Attribute: server_name, Server name must be lowercase.',
+                                  "Attribute tags's value does not match any of the allowed values 'web,db' "
+                                  "defined in the schema",
+                                  'Attribute: ip_addresses, Error in validation, please check entered value.',
+                                  'Attribute: unknown is not defined in the schema.'])
+
+    def test_check_valid_item_create_valid(self):
+        import item_validation
+        log.info("Testing valid item")
+        item = {'server_name': 'server1', 'server_os_family': 'windows', 'tags': ['web', 'db'],
+                'ip_addresses': ['10.0.0.1']}
+        self.assertIsNone(item_validation.check_valid_item_create(item, server_schema))
+
+    def test_validate_relationships_with_index(self):
+        import item_validation
+        log.info("Testing relationship validation against the relationship index")
+        attributes = [{'name': 'app_id', 'type': 'relationship', 'rel_entity': 'application', 'rel_key': 'app_id'},
+                      {'name': 'wave_ids', 'type': 'relationship', 'rel_entity': 'wave', 'rel_key': 'wave_id',
+                       'listMultiSelect': True}]
+        related_data = {'application': [{'app_id': '1'}, {'app_id': '2'}], 'wave': [{'wave_id': '5'}]}
+        relationship_index = item_validation.get_relationship_index(related_data, attributes)
+        self.assertEqual(relationship_index, {'application': {'app_id': {'1', '2'}}, 'wave': {'wave_id': {'5'}}})
+
+        errors = item_validation.validate_item_keys_and_values({'app_id': '3', 'wave_ids': ['5', '6']}, attributes,
+                                                               relationship_index)
+        self.assertEqual(errors, [['app_id:3 related record does not exist using key app_id'],
+                                  ['wave_ids: The following related record ids do not exist using key wave_id - 6']])
+
+    def test_validate_relationships_not_preloaded(self):
+        import item_validation
+        log.info("Testing related table is loaded once when not preloaded")
+        attributes = [{'name': 'app_id', 'type': 'relationship', 'rel_entity': 'application', 'rel_key': 'app_id'}]
+        relationship_index = {}
+        with mock.patch.object(item_validation, 'get_related_items',
+                               return_value={'application': [{'app_id': '1'}]}) as get_related_items:
+            for app_id in ['1', '1', '2']:
+                item_validation.validate_item_keys_and_values({'app_id': app_id}, attributes, relationship_index)
+            get_related_items.assert_called_once_with(['application'], {'application': ['app_id']})
+        self.assertEqual(relationship_index, {'application': {'app_id': {'1'}}})
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class ItemValidationRelatedItemsTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.table_name = '{}-{}-'.format('cmf', 'unittest') + 'apps'
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.client.create_table(
+            TableName=self.table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "app_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "app_id", "AttributeType": "S"},
+            ],
+        )
+        for app_id in ['1', '2']:
+            self.client.put_item(
+                   TableName=self.table_name,
+                   Item={'app_id': {'S': app_id}, 'app_name': {'S': 'app ' + app_id}, 'name': {'S': 'n' + app_id},
+                         'description': {'S': 'not required for relationship validation'}})
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.table_name)
+
+    def test_get_relationship_data_projection(self):
+        import item_validation
+        log.info("Testing related tables are loaded once with only the related keys")
+        schema = {'schema_name': 'server', 'attributes': [
+            {'name': 'app_id', 'type': 'relationship', 'rel_entity': 'application', 'rel_key': 'app_id'},
+            {'name': 'app_names', 'type': 'relationship', 'rel_entity': 'application', 'rel_key': 'name',
+             'listMultiSelect': True}]}
+
+        related_items = item_validation.get_related_items(['application', 'application'],
+                                                          {'application': ['app_id', 'name']})
+        self.assertEqual(sorted(related_items['application'], key=lambda i: i['app_id']),
+                         [{'app_id': '1', 'name': 'n1'}, {'app_id': '2', 'name': 'n2'}])
+
+        relationship_index = item_validation.get_relationship_data([{'app_id': '1', 'app_names': ['n2']}], schema)
+        self.assertEqual(relationship_index, {'application': {'app_id': {'1', '2'}, 'name': {'n1', 'n2'}}})
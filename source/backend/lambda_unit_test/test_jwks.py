@@ -0,0 +1,118 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+import unittest
+import logging
+import os
+import time
+from unittest import TestCase, mock
+
+from jose import jwk, jwt, JWTError
+import rsa
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+
+import jwks
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+def create_key(kid):
+    # rsa is installed with python-jose.
+    public_key, private_key = rsa.newkeys(2048)
+    private_pem = private_key.save_pkcs1().decode('utf-8')
+    public_pem = public_key.save_pkcs1().decode('utf-8')
+    public_jwk = {**jwk.construct(public_pem, 'RS256').to_dict(), 'kid': kid, 'use': 'sig'}
+    return private_pem, public_jwk
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest', 'userpool': 'us-east-1_pool', 'clientid': 'client'})
+class JwksTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key_1, cls.jwk_1 = create_key('kid1')
+        cls.private_key_2, cls.jwk_2 = create_key('kid2')
+
+    def setUp(self):
+        jwks.clear()
+        self.published = [self.jwk_1]
+        patcher = mock.patch.object(jwks, 'fetch_keys', side_effect=lambda url: list(self.published))
+        self.fetch_keys = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_key(self):
+        log.info("Testing keys are downloaded once and held by kid")
+        self.assertEqual(jwks.get_key('us-east-1', 'us-east-1_pool', 'kid1'), self.jwk_1)
+        self.assertEqual(jwks.get_keys('us-east-1', 'us-east-1_pool'), {'kid1': self.jwk_1})
+        self.fetch_keys.assert_called_once_with(
+            'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_pool/.well-known/jwks.json')
+
+    def test_kid_miss_refresh(self):
+        log.info("Testing keys are downloaded again for an unknown kid, at most once per refresh interval")
+        jwks.get_key('us-east-1', 'us-east-1_pool', 'kid1')
+        self.published = [self.jwk_1, self.jwk_2]
+        with mock.patch.object(jwks, 'jwks_refresh_interval', 0):
+            self.assertEqual(jwks.get_key('us-east-1', 'us-east-1_pool', 'kid2'), self.jwk_2)
+        self.assertEqual(self.fetch_keys.call_count, 2)
+
+        for _ in range(5):
+            self.assertIsNone(jwks.get_key('us-east-1', 'us-east-1_pool', 'unknown'))
+        self.assertEqual(self.fetch_keys.call_count, 2)
+
+    def test_expiry(self):
+        log.info("Testing keys are downloaded again once the TTL has expired and kept if the download fails")
+        jwks.get_key('us-east-1', 'us-east-1_pool', 'kid1')
+        self.fetch_keys.side_effect = OSError('network unreachable')
+        with mock.patch.object(jwks, 'jwks_cache_ttl', 0), mock.patch.object(jwks, 'jwks_refresh_interval', 0):
+            self.assertEqual(jwks.get_key('us-east-1', 'us-east-1_pool', 'kid1'), self.jwk_1)
+        self.assertEqual(self.fetch_keys.call_count, 2)
+
+    def test_public_key_cache(self):
+        log.info("Testing public keys are constructed once per kid")
+        public_key = jwks.get_public_key('us-east-1', 'us-east-1_pool', 'kid1')
+        self.assertIs(jwks.get_public_key('us-east-1', 'us-east-1_pool', 'kid1'), public_key)
+        self.assertIsNone(jwks.get_public_key('us-east-1', 'us-east-1_pool', 'unknown'))
+
+    def test_get_claims(self):
+        log.info("Testing MFAuth verifies ID tokens with the cached keys")
+        import policy
+        claims = {'sub': 'user', 'aud': 'client', 'token_use': 'id', 'exp': int(time.time()) + 3600,
+                  'iss': 'https://cognito-idp.us-east-1.amazonaws.com/us-east-1_pool'}
+        token = jwt.encode(claims, self.private_key_1, algorithm='RS256', headers={'kid': 'kid1'})
+        auth = policy.MFAuth()
+        for _ in range(3):
+            self.assertEqual(auth.get_claims('us-east-1', 'us-east-1_pool', token, 'client')['sub'], 'user')
+        self.fetch_keys.assert_called_once()
+
+        # Signed with the private key of kid2, which the user pool does not publish.
+        token = jwt.encode(claims, self.private_key_2, algorithm='RS256', headers={'kid': 'kid1'})
+        with self.assertRaises(JWTError):
+            auth.get_claims('us-east-1', 'us-east-1_pool', token, 'client')
@@ -0,0 +1,239 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import json
+import boto3
+import logging
+import os
+from types import SimpleNamespace
+from unittest import TestCase, mock
+from moto import mock_dynamodb, mock_s3
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+def create_table(client, table_name, hash_key, range_key=None):
+    key_schema = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+    attribute_definitions = [{"AttributeName": hash_key, "AttributeType": "S"}]
+    if range_key:
+        key_schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+        attribute_definitions.append({"AttributeName": range_key, "AttributeType": "S"})
+    client.create_table(TableName=table_name, BillingMode='PAY_PER_REQUEST', KeySchema=key_schema,
+                        AttributeDefinitions=attribute_definitions)
+
+
+class LambdaContext(object):
+    def __init__(self, remaining_time_ms=900000):
+        self.function_name = 'cmf-unittest-import-jobs'
+        self.remaining_time_ms = remaining_time_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_time_ms
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_s3
+@mock_dynamodb
+class LambdaImportJobsTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.tables = {
+            'cmf-unittest-waves': ('wave_id', None),
+            'cmf-unittest-apps': ('app_id', None),
+            'cmf-unittest-names': ('name_key', None),
+            'cmf-unittest-ids': ('counter_name', None),
+            'cmf-unittest-schema': ('schema_name', None),
+            'cmf-unittest-import-jobs': ('job_id', 'record_id'),
+            'cmf-unittest-item-changes': ('schema_name', 'change_key'),
+        }
+        for table_name, keys in self.tables.items():
+            create_table(self.client, table_name, *keys)
+
+        schema_table = boto3.resource('dynamodb', region_name='us-east-1').Table('cmf-unittest-schema')
+        schema_table.put_item(Item={'schema_name': 'wave', 'schema_type': 'user', 'attributes': [
+            {'name': 'wave_id', 'type': 'string'},
+            {'name': 'wave_name', 'type': 'string', 'required': True},
+            {'name': 'wave_status', 'type': 'list', 'listvalue': 'Not started,Planning,Completed'}]})
+        schema_table.put_item(Item={'schema_name': 'app', 'schema_type': 'user', 'attributes': [
+            {'name': 'app_id', 'type': 'string'},
+            {'name': 'app_name', 'type': 'string', 'required': True},
+            {'name': 'wave_id', 'type': 'relationship', 'rel_entity': 'wave', 'rel_key': 'wave_id',
+             'rel_display_attribute': 'wave_name'},
+            {'name': 'tags', 'type': 'multivalue-string'}]})
+
+        self.s3_client = boto3.client('s3', region_name='us-east-1')
+        self.s3_client.create_bucket(Bucket='cmf-unittest-import')
+
+        with mock.patch.dict(os.environ, {'application': 'cmf', 'environment': 'unittest'}):
+            from lambda_functions.lambda_import_jobs import lambda_import_jobs
+        self.lambda_import_jobs = lambda_import_jobs
+        sys.modules['schema_cache'].invalidate()
+        self.jobs_table = boto3.resource('dynamodb', region_name='us-east-1').Table('cmf-unittest-import-jobs')
+        self.apps_table = boto3.resource('dynamodb', region_name='us-east-1').Table('cmf-unittest-apps')
+
+    def tearDown(self):
+        for table_name in self.tables:
+            self.client.delete_table(TableName=table_name)
+
+    def put_job(self, import_format, lines, schemas=('wave', 'app')):
+        job_id = 'job-' + import_format
+        job = {
+            'job_id': job_id, 'record_id': 'job', 'status': 'QUEUED', 'format': import_format,
+            'schemas': list(schemas), 's3_key': 'imports/' + job_id + '.' + import_format,
+            'progress': self.lambda_import_jobs.new_progress(schemas), 'error_count': 0,
+            'position': {'schema_index': 0, 'row': 0},
+            '_history': {'createdTimestamp': '2022-01-01T00:00:00', 'createdBy': {'userRef': 'user'}}
+        }
+        self.jobs_table.put_item(Item=job)
+        self.s3_client.put_object(Bucket='cmf-unittest-import', Key=job['s3_key'], Body='\n'.join(lines).encode())
+        return job_id
+
+    def get_apps(self):
+        return {app['app_name']: app for app in self.apps_table.scan()['Items']}
+
+    def test_import_ndjson(self):
+        log.info("Testing NDJSON import creates waves before apps and resolves wave names")
+        job_id = self.put_job('ndjson', [
+            json.dumps({'schema': 'app', 'app_name': 'app1', 'wave_name': 'Wave 1', 'tags': ['a']}),
+            json.dumps({'schema': 'wave', 'wave_name': 'Wave 1', 'wave_status': 'Planning'}),
+            json.dumps({'schema': 'app', 'app_name': 'app2', 'wave_name': 'Wave 2'}),
+            json.dumps({'schema': 'app', 'app_name': 'app1'}),
+            json.dumps({'schema': 'app', 'app_name': 'app3', 'unknown': 'x'}),
+            json.dumps({'schema': 'server', 'server_name': 'server1'}),
+            'not json',
+            json.dumps({'schema': 'wave', 'wave_name': 'Wave 3', 'wave_status': 'Unknown'}),
+        ])
+        result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext())
+        self.assertEqual(result, 'COMPLETE_WITH_ERRORS')
+
+        apps = self.get_apps()
+        self.assertEqual(list(apps.keys()), ['app1'])
+        wave_id = self.lambda_import_jobs.item_names.get_name_owner('wave', 'wave 1')
+        self.assertEqual(apps['app1']['wave_id'], wave_id)
+        self.assertEqual(apps['app1']['_item_type'], 'app')
+        self.assertEqual(apps['app1']['_history']['createdBy'], {'userRef': 'user'})
+
+        job = json.loads(self.lambda_import_jobs.lambda_handler(
+            {'httpMethod': 'GET', 'pathParameters': {'jobid': job_id}}, LambdaContext())['body'])
+        self.assertEqual(job['status'], 'COMPLETE_WITH_ERRORS')
+        self.assertEqual(job['progress']['wave'], {'rows': 2, 'created': 1, 'failed': 1})
+        self.assertEqual(job['progress']['app'], {'rows': 4, 'created': 1, 'failed': 3})
+        self.assertEqual([error['row'] for error in job['errors']], [3, 4, 5, 6, 7, 8])
+        self.assertIn('wave_name Wave 2 does not exist', job['errors'][0]['errors'][0])
+        self.assertEqual(job['errors'][1]['errors'], ['Duplicate app_name in import.'])
+
+    def test_import_csv(self):
+        log.info("Testing CSV import converts multiple values and skips empty values")
+        job_id = self.put_job('csv', [
+            'schema,wave_name,app_name,tags',
+            'wave,Wave 1,,',
+            'app,Wave 1,app1,a;b',
+            'app,,app2,',
+        ])
+        result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext())
+        self.assertEqual(result, 'COMPLETE')
+        apps = self.get_apps()
+        self.assertEqual(apps['app1']['tags'], ['a', 'b'])
+        self.assertNotIn('wave_id', apps['app2'])
+        self.assertNotIn('tags', apps['app2'])
+
+    def test_import_handover(self):
+        log.info("Testing a worker short of time saves its position and continues in a new invocation")
+        job_id = self.put_job('ndjson', [json.dumps({'schema': 'app', 'app_name': 'app' + str(i)})
+                                         for i in range(5)], schemas=['app'])
+        with mock.patch.object(self.lambda_import_jobs, 'chunk_size', 2), \
+                mock.patch.object(self.lambda_import_jobs, 'invoke_worker') as invoke_worker:
+            result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext(1000))
+            self.assertEqual(result, 'HANDOVER')
+            invoke_worker.assert_called_once()
+            self.assertEqual(len(self.get_apps()), 2)
+
+            result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext())
+            self.assertEqual(result, 'COMPLETE')
+        self.assertEqual(sorted(self.get_apps().keys()), ['app' + str(i) for i in range(5)])
+        job = self.lambda_import_jobs.get_job(job_id)
+        self.assertEqual(job['progress']['app'], {'rows': 5, 'created': 5, 'failed': 0})
+
+    def test_import_corrected_row(self):
+        log.info("Testing a rejected row does not reserve its name for the rest of the import")
+        job_id = self.put_job('ndjson', [json.dumps({'schema': 'app', 'app_name': 'app1', 'unknown': 'x'}),
+                                         json.dumps({'schema': 'app', 'app_name': 'app1'})], schemas=['app'])
+        result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext())
+        self.assertEqual(result, 'COMPLETE_WITH_ERRORS')
+        self.assertEqual(list(self.get_apps().keys()), ['app1'])
+        job = self.lambda_import_jobs.get_job(job_id)
+        self.assertEqual(job['progress']['app'], {'rows': 2, 'created': 1, 'failed': 1})
+
+    def test_import_failed(self):
+        log.info("Testing row errors found before a worker failure are saved with the failed job")
+        job_id = self.put_job('ndjson', [json.dumps({'schema': 'app', 'app_name': 'app1', 'unknown': 'x'}),
+                                         json.dumps({'schema': 'app', 'app_name': 'app2'})], schemas=['app'])
+        with mock.patch.object(self.lambda_import_jobs.ImportPass, 'write', side_effect=Exception('write failed')):
+            result = self.lambda_import_jobs.lambda_handler({'import_job_id': job_id}, LambdaContext())
+        self.assertEqual(result, 'FAILED')
+        job = json.loads(self.lambda_import_jobs.lambda_handler(
+            {'httpMethod': 'GET', 'pathParameters': {'jobid': job_id}}, LambdaContext())['body'])
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertEqual([error['row'] for error in job['errors']], [1])
+
+    @mock.patch('lambda_functions.lambda_import_jobs.lambda_import_jobs.MFAuth')
+    def test_create_and_start_job(self, mock_auth):
+        log.info("Testing job creation returns an upload URL and the job starts once the file is uploaded")
+        mock_auth.return_value.getUserResourceCreationPolicy.return_value = {'action': 'allow'}
+        event = {'httpMethod': 'POST', 'pathParameters': None,
+                 'body': json.dumps({'format': 'csv', 'schemas': ['app', 'wave']})}
+        body = json.loads(self.lambda_import_jobs.lambda_handler(event, LambdaContext())['body'])
+        job_id = body['job']['job_id']
+        self.assertIn('cmf-unittest-import', body['upload_url'])
+        self.assertEqual(body['job']['schemas'], ['wave', 'app'])
+
+        start_event = {'httpMethod': 'POST', 'pathParameters': {'jobid': job_id}, 'body': None}
+        result = self.lambda_import_jobs.lambda_handler(start_event, LambdaContext())
+        self.assertEqual(result['statusCode'], 400)
+
+        self.s3_client.put_object(Bucket='cmf-unittest-import', Key=body['job']['s3_key'], Body=b'schema,wave_name')
+        with mock.patch.object(self.lambda_import_jobs, 'invoke_worker') as invoke_worker:
+            result = self.lambda_import_jobs.lambda_handler(start_event, LambdaContext())
+            invoke_worker.assert_called_once()
+        self.assertEqual(json.loads(result['body'])['status'], 'QUEUED')
+        self.assertEqual(self.lambda_import_jobs.get_job(job_id)['status'], 'QUEUED')
+
+        result = self.lambda_import_jobs.lambda_handler({'httpMethod': 'POST', 'pathParameters': None,
+                                                         'body': json.dumps({'schemas': ['pipeline']})},
+                                                        LambdaContext())
+        self.assertEqual(result['statusCode'], 400)
@@ -19,6 +19,7 @@
 
 
 import unittest
+import json
 import boto3
 import logging
 import os
@@ -100,6 +101,32 @@ class LambdaItemTestGet(TestCase):
         self.client.put_item(
                TableName=self.table_name,
                Item={'app_id': {'S': '3'}, 'app_name': {'S': 'test app'}})
+        self.changes_table_name = '{}-{}-'.format('cmf', 'unittest') + 'item-changes'
+        self.changes_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.changes_client.create_table(
+            TableName=self.changes_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+              {"AttributeName": "change_key", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+              {"AttributeName": "change_key", "AttributeType": "S"},
+            ],
+        )
+        self.names_table_name = '{}-{}-'.format('cmf', 'unittest') + 'names'
+        self.names_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.names_client.create_table(
+            TableName=self.names_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "name_key", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "name_key", "AttributeType": "S"},
+            ],
+        )
         self.schema_table_name = '{}-{}-'.format('cmf', 'unittest') + 'schema'
         # Creating schema table and creating schema item to test out schema types
         self.schema_client = boto3.client("dynamodb",region_name='us-east-1')
@@ -164,6 +191,8 @@ class LambdaItemTestGet(TestCase):
         self.policy_client.delete_table(TableName=self.policy_table_name)
         self.role_client.delete_table(TableName=self.role_table_name)
         self.schema_client.delete_table(TableName=self.schema_table_name)
+        self.names_client.delete_table(TableName=self.names_table_name)
+        self.changes_client.delete_table(TableName=self.changes_table_name)
         self.dynamodb = None
         print("Teardown complete")
 
@@ -175,7 +204,7 @@ class LambdaItemTestGet(TestCase):
         result = lambda_item.lambda_handler(self.event,'')
         data = result
         #print("Result data: ", data)
-        expected_response = {'headers': {**default_http_headers}, 'body': '[]'}
+        expected_response = {'headers': {**default_http_headers, 'ETag': mock.ANY}, 'statusCode': 200, 'body': '[]'}
         self.assertEqual(data, expected_response)
 
     def test_lambda_handler_correct_id(self):
@@ -186,7 +215,7 @@ class LambdaItemTestGet(TestCase):
         result = lambda_item.lambda_handler(self.event,'')
         data = result
         print("Result data: ",data)
-        expected_response = {'headers': {**default_http_headers}, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
+        expected_response = {'headers': {**default_http_headers, 'ETag': mock.ANY}, 'statusCode': 200, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
         self.assertEqual(data, expected_response)
 
     def test_lambda_handler_delete_app_id_unauthenticated_request(self):
@@ -267,6 +296,31 @@ class LambdaItemTestGet(TestCase):
         expected_response = {'headers': {**default_http_headers}, 'statusCode': 400, 'body': '{"errors": ["You cannot modify app_id, it is managed by the system"]}'}
         self.assertEqual(data, expected_response)
 
+    def test_lambda_handler_put_underscore_attribute(self):
+        from lambda_functions.lambda_item import lambda_item
+        import botocore
+        log.info("Testing lambda_app_item PUT rejects system attributes and reports failed updates")
+        # The handler rejects system attributes even where a policy allows them.
+        patcher = mock.patch.object(lambda_item.MFAuth, 'getUserAttributePolicy',
+                                    return_value={'action': 'allow', 'user': {'userRef': 'username'}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for body in ["{\"app_name\":\"forged\",\"_history\":{\"createdBy\":\"y\"}}", "{\"_version\":\"1\"}"]:
+            self.event = {"httpMethod": 'PUT', 'pathParameters': {'id': '3', 'schema': 'app'}, "body": body, 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+            result = lambda_item.lambda_handler(self.event,'')
+            self.assertEqual(result['statusCode'], 400)
+            self.assertEqual(json.loads(result['body']), {'errors': ['You cannot modify system attributes, these are managed by the system']})
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '3'})['Item']
+        self.assertEqual(item, {'app_id': '3', 'app_name': 'test app'})
+
+        error = botocore.exceptions.ClientError({'Error': {'Code': 'ValidationException', 'Message': 'update failed'}}, 'UpdateItem')
+        self.event['body'] = "{\"app_name\":\"renamed\"}"
+        with mock.patch.object(lambda_item.item_updates, 'update_item', side_effect=error):
+            result = lambda_item.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 500)
+        names_table = boto3.resource('dynamodb').Table(self.names_table_name)
+        self.assertNotIn('Item', names_table.get_item(Key={'name_key': 'app#renamed'}))
+
 
     def test_lambda_handler_put_no_attribute(self):
         self.event = {"httpMethod": 'PUT',"isBase64Encoded": False, 'pathParameters': {'id': '3', 'schema': 'app','schema_name':'app'},"body": "{\"app_name\":\"dummy\"}", 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}} 
@@ -274,7 +328,40 @@ class LambdaItemTestGet(TestCase):
         log.info("Testing lambda_app_item PUT attribute with authenticated user and valid attributes")
         lambda_item.lambda_handler.data_table = None
         result = lambda_item.lambda_handler(self.event,'')
-        data=result.get('body')
+        data=json.loads(result.get('body'))
         #print("Result data: ", data)
-        expected_response = '"HTTPStatusCode": 200'
-        self.assertIn(expected_response, data)
\ No newline at end of file
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '3'})['Item']
+        self.assertEqual(item['app_name'], 'dummy')
+        self.assertEqual(item['_version'], data['version'])
+
+    def test_lambda_handler_put_versions(self):
+        self.event = {"httpMethod": 'PUT',"isBase64Encoded": False, 'pathParameters': {'id': '3', 'schema': 'app'},"body": "{\"app_name\":\"versioned\"}", 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        from lambda_functions.lambda_item import lambda_item
+        log.info("Testing lambda_app_item PUT skips unchanged items and rejects stale versions")
+        version = json.loads(lambda_item.lambda_handler(self.event,'')['body'])['version']
+
+        # Nothing changed, the item is not written and keeps its version.
+        with mock.patch.object(lambda_item.item_updates, 'update_item') as mock_update_item:
+            result = lambda_item.lambda_handler(self.event,'')
+            mock_update_item.assert_not_called()
+        self.assertEqual(json.loads(result['body']), {'version': version})
+
+        self.event['headers'] = {'If-Match': '"' + version + '"'}
+        self.event['body'] = "{\"app_name\":\"versioned again\"}"
+        result = lambda_item.lambda_handler(self.event,'')
+        self.assertNotEqual(json.loads(result['body'])['version'], version)
+
+        # The version given is no longer current.
+        self.event['body'] = "{\"app_name\":\"stale\"}"
+        result = lambda_item.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 409)
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '3'})['Item']
+        self.assertEqual(item['app_name'], 'versioned again')
+
+    def test_lambda_handler_tree_not_wave(self):
+        self.event = {"httpMethod": 'GET', 'resource': '/user/{schema}/{id}/tree', 'pathParameters': {'id': '3', 'schema': 'app'}}
+        from lambda_functions.lambda_item import lambda_item
+        log.info("Testing lambda_app_item GET tree is only available for waves")
+        result = lambda_item.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body']), {'errors': ['Tree is only available for waves.']})
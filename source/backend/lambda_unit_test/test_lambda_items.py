@@ -19,6 +19,7 @@
 
 
 import unittest
+import json
 import boto3
 import logging
 import os
@@ -99,6 +100,44 @@ class LambdaItemTestGet(TestCase):
         self.client.put_item(
                TableName=self.table_name,
                Item={'app_id': {'S': '3'}, 'app_name': {'S': 'test app'}})
+        self.changes_table_name = '{}-{}-'.format('cmf', 'unittest') + 'item-changes'
+        self.names_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.names_client.create_table(
+            TableName=self.changes_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+              {"AttributeName": "change_key", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+              {"AttributeName": "change_key", "AttributeType": "S"},
+            ],
+        )
+        self.names_table_name = '{}-{}-'.format('cmf', 'unittest') + 'names'
+        self.names_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.names_client.create_table(
+            TableName=self.names_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "name_key", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "name_key", "AttributeType": "S"},
+            ],
+        )
+        self.ids_table_name = '{}-{}-'.format('cmf', 'unittest') + 'ids'
+        self.ids_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.ids_client.create_table(
+            TableName=self.ids_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "counter_name", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "counter_name", "AttributeType": "S"},
+            ],
+        )
         self.schema_table_name = '{}-{}-'.format('cmf', 'unittest') + 'schema'
         # Creating schema table and creating schema item to test out schema types
         self.schema_client = boto3.client("dynamodb",region_name='us-east-1')
@@ -163,6 +202,9 @@ class LambdaItemTestGet(TestCase):
         self.policy_client.delete_table(TableName=self.policy_table_name)
         self.role_client.delete_table(TableName=self.role_table_name)
         self.schema_client.delete_table(TableName=self.schema_table_name)
+        self.names_client.delete_table(TableName=self.names_table_name)
+        self.names_client.delete_table(TableName=self.changes_table_name)
+        self.ids_client.delete_table(TableName=self.ids_table_name)
         self.dynamodb = None
         print("Teardown complete")
   
@@ -174,7 +216,7 @@ class LambdaItemTestGet(TestCase):
         result = lambda_items.lambda_handler(self.event,'')
         data = result
         print("Result data: ", data)
-        expected_response = {'headers': {**default_http_headers}, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
+        expected_response = {'headers': {**default_http_headers, 'ETag': mock.ANY}, 'statusCode': 200, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
         self.assertEqual(data, expected_response)
 
     def test_lambda_handler_correct_id(self):
@@ -185,7 +227,7 @@ class LambdaItemTestGet(TestCase):
         result = lambda_items.lambda_handler(self.event,'')
         data = result
         print("Result data: ",data)
-        expected_response = {'headers': {**default_http_headers}, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
+        expected_response = {'headers': {**default_http_headers, 'ETag': mock.ANY}, 'statusCode': 200, 'body': '[{"app_id": "3", "app_name": "test app"}]'}
         self.assertEqual(data, expected_response)
         
 
@@ -223,4 +265,344 @@ class LambdaItemTestGet(TestCase):
         data=result.get('body')
         print("Result data: ", data)
         expected_response = '"newItems": [{"app_name": "dummy"'
-        self.assertIn(expected_response, data)
\ No newline at end of file
+        self.assertIn(expected_response, data)
+
+    def test_lambda_handler_post_multiple_chunks(self):
+        self.event = {"httpMethod": 'POST',"isBase64Encoded": False, 'pathParameters': {'schema': 'app'},"body": json.dumps([{'app_name': 'bulk' + str(i)} for i in range(60)]), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items POST writes every chunk of a bulk create")
+        result = lambda_items.lambda_handler(self.event,'')
+        data = json.loads(result.get('body'))
+        self.assertNotIn('errors', data)
+        self.assertEqual(len(data['newItems']), 60)
+        self.assertEqual(self.client.scan(TableName=self.table_name, Select='COUNT')['Count'], 61)
+
+    def test_lambda_handler_get_etag(self):
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items GET returns 304 until the table is modified")
+        self.event = {"httpMethod": 'GET', 'pathParameters': {'schema': 'app'}}
+        etag = lambda_items.lambda_handler(self.event,'')['headers']['ETag']
+        self.event['headers'] = {'If-None-Match': etag}
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 304)
+        self.assertEqual(result['body'], '')
+
+        post_event = {"httpMethod": 'POST', 'pathParameters': {'schema': 'app'}, "body": json.dumps({'app_name': 'new app'}), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        lambda_items.lambda_handler(post_event,'')
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 200)
+        self.assertNotEqual(result['headers']['ETag'], etag)
+        self.assertEqual(len(json.loads(result['body'])), 2)
+
+    def test_lambda_handler_get_since(self):
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items GET since returns items created after the timestamp")
+        since = '2000-01-01T00:00:00Z'
+        with mock.patch.object(lambda_items.item_changes, 'change_retention_days', 36500):
+            self.event = {"httpMethod": 'POST', 'pathParameters': {'schema': 'app'}, "body": json.dumps({'app_name': 'new app'}), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+            lambda_items.lambda_handler(self.event,'')
+            self.event = {"httpMethod": 'GET', 'pathParameters': {'schema': 'app'}, 'queryStringParameters': {'since': since, 'attributes': 'app_name'}}
+            result = lambda_items.lambda_handler(self.event,'')
+        data = json.loads(result.get('body'))
+        self.assertEqual(data['items'], [{'app_name': 'new app'}])
+        self.assertEqual(data['deleted'], [])
+
+        self.event = {"httpMethod": 'GET', 'pathParameters': {'schema': 'app'}, 'queryStringParameters': {'since': since}}
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 410)
+
+        self.event = {"httpMethod": 'GET', 'pathParameters': {'schema': 'app'}, 'queryStringParameters': {'since': 'now', 'limit': '5'}}
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(json.loads(result['body'])['errors'], ['since must be an ISO 8601 timestamp.', 'since can only be combined with attributes.'])
+
+    def test_lambda_handler_patch(self):
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items PATCH updates attributes of each item and reports missing items")
+        self.client.put_item(
+               TableName=self.table_name,
+               Item={'app_id': {'S': '4'}, 'app_name': {'S': 'other app'}, '_history': {'M': {'createdBy': {'S': 'someone'}}}})
+        self.event = {"httpMethod": 'PATCH', 'pathParameters': {'schema': 'app'}, "body": json.dumps([{'id': '3', 'attributes': {'app_name': 'renamed app'}}, {'id': '4', 'attributes': {'app_name': 'renamed other'}}, {'id': '9', 'attributes': {'app_name': 'missing app'}}]), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        result = lambda_items.lambda_handler(self.event,'')
+        data = json.loads(result['body'])
+        self.assertEqual(data['results'], [{'id': '3', 'updated': True}, {'id': '4', 'updated': True}, {'id': '9', 'errors': ['app Id: 9 does not exist']}])
+
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '4'})['Item']
+        self.assertEqual(item['app_name'], 'renamed other')
+        self.assertEqual(item['_history']['createdBy'], 'someone')
+        self.assertEqual(item['_history']['lastModifiedBy']['userRef'], 'username')
+        # Items written without _item_type are added to the name index by the update.
+        self.assertEqual(item['_item_type'], 'app')
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '3'})['Item']
+        self.assertEqual(item['_history']['lastModifiedBy']['userRef'], 'username')
+
+        # Names of items that were not updated are released, the new name of item 3 is held.
+        names_table = boto3.resource('dynamodb').Table(self.names_table_name)
+        self.assertNotIn('Item', names_table.get_item(Key={'name_key': 'app#missing app'}))
+        self.assertEqual(names_table.get_item(Key={'name_key': 'app#renamed app'})['Item']['item_id'], '3')
+
+        self.event['body'] = json.dumps([{'id': '4', 'attributes': {'app_name': 'Renamed App'}}])
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(json.loads(result['body'])['results'], [{'id': '4', 'errors': ['app_name: Renamed App already exist']}])
+
+    def test_lambda_handler_patch_failed(self):
+        from lambda_functions.lambda_items import lambda_items
+        import botocore
+        log.info("Testing lambda_app_items PATCH releases the new name of an item whose update failed")
+        error = botocore.exceptions.ClientError({'Error': {'Code': 'ValidationException', 'Message': 'update failed'}}, 'UpdateItem')
+        self.event = {"httpMethod": 'PATCH', 'pathParameters': {'schema': 'app'}, "body": json.dumps([{'id': '3', 'attributes': {'app_name': 'failed rename'}}]), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        with mock.patch.object(lambda_items.item_updates, 'update_item', side_effect=error):
+            result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(json.loads(result['body'])['results'], [{'id': '3', 'errors': ['update failed']}])
+
+        names_table = boto3.resource('dynamodb').Table(self.names_table_name)
+        self.assertNotIn('Item', names_table.get_item(Key={'name_key': 'app#failed rename'}))
+        item = boto3.resource('dynamodb').Table(self.table_name).get_item(Key={'app_id': '3'})['Item']
+        self.assertEqual(item['app_name'], 'test app')
+
+    def test_lambda_handler_patch_failed_same_name(self):
+        from lambda_functions.lambda_items import lambda_items
+        import botocore
+        log.info("Testing lambda_app_items PATCH keeps the name of an item whose update to the same name failed")
+        self.event = {"httpMethod": 'PATCH', 'pathParameters': {'schema': 'app'}, "body": json.dumps([{'id': '3', 'attributes': {'app_name': 'held app'}}]), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        lambda_items.lambda_handler(self.event,'')
+        error = botocore.exceptions.ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'update failed'}}, 'UpdateItem')
+        with mock.patch.object(lambda_items.item_updates, 'update_item', side_effect=error):
+            result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(json.loads(result['body'])['results'], [{'id': '3', 'errors': ['update failed']}])
+
+        names_table = boto3.resource('dynamodb').Table(self.names_table_name)
+        self.assertEqual(names_table.get_item(Key={'name_key': 'app#held app'})['Item']['item_id'], '3')
+
+    def test_lambda_handler_patch_conditional_required(self):
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items PATCH checks conditionally required attributes against the stored item")
+        conditions = {'queries': [{'attribute': 'app_type', 'comparator': '=', 'value': 'critical'}],
+                      'outcomes': {'true': ['required'], 'false': ['not_required']}}
+        boto3.resource('dynamodb').Table(self.schema_table_name).put_item(Item={
+            'schema_name': 'app', 'schema_type': 'user', 'lastModifiedTimestamp': '2030-01-01T00:00:00',
+            'attributes': [{'name': 'app_id', 'type': 'string'}, {'name': 'app_name', 'type': 'string'},
+                           {'name': 'app_type', 'type': 'string'},
+                           {'name': 'app_owner', 'type': 'string', 'conditions': conditions}]})
+        data_table = boto3.resource('dynamodb').Table(self.table_name)
+        data_table.put_item(Item={'app_id': '3', 'app_name': 'test app', 'app_type': 'critical', 'app_owner': 'me'})
+        data_table.put_item(Item={'app_id': '4', 'app_name': 'other app'})
+
+        updates = [{'id': '3', 'attributes': {'app_owner': ''}}, {'id': '4', 'attributes': {'app_type': 'critical'}},
+                   {'id': '5', 'attributes': {'app_type': 'critical', 'app_owner': 'you'}}]
+        self.event = {"httpMethod": 'PATCH', 'pathParameters': {'schema': 'app'}, "body": json.dumps(updates), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        with mock.patch.object(lambda_items.MFAuth, 'getUserAttributePolicy', return_value={'action': 'allow'}):
+            result = lambda_items.lambda_handler(self.event,'')
+            self.assertEqual(json.loads(result['body'])['results'], [
+                {'id': '3', 'errors': ['Attribute: app_owner is required and not provided.']},
+                {'id': '4', 'errors': ['Attribute: app_owner is required and not provided.']},
+                {'id': '5', 'errors': ['app Id: 5 does not exist']}])
+            self.assertEqual(data_table.get_item(Key={'app_id': '3'})['Item']['app_owner'], 'me')
+
+            self.event['body'] = json.dumps([{'id': '3', 'attributes': {'app_type': 'internal', 'app_owner': ''}}])
+            result = lambda_items.lambda_handler(self.event,'')
+            self.assertEqual(json.loads(result['body'])['results'], [{'id': '3', 'updated': True}])
+        self.assertNotIn('app_owner', data_table.get_item(Key={'app_id': '3'})['Item'])
+
+    def test_lambda_handler_patch_invalid(self):
+        from lambda_functions.lambda_items import lambda_items
+        log.info("Testing lambda_app_items PATCH rejects invalid requests and unauthorised attributes")
+        self.event = {"httpMethod": 'PATCH', 'pathParameters': {'schema': 'app'}, "body": json.dumps([{'id': '3', 'attributes': {'app_id': '5'}}, {'id': '3'}]), 'requestContext': {'authorizer':{'claims':{'cognito:groups':'admin','cognito:username':'username','email':'username@email.com'}}}}
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body'])['errors'], ['You cannot modify app_id, it is managed by the system', 'Each update requires an id and a non empty attributes object.'])
+
+        self.event['body'] = json.dumps([{'id': '3', 'attributes': {'app_name': 'a'}}, {'id': '4', 'attributes': {'wave_id': '1'}}])
+        result = lambda_items.lambda_handler(self.event,'')
+        self.assertEqual(result['statusCode'], 401)
+        self.assertIn('wave_id', result['body'])
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class LambdaItemsTestList(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.table_name = '{}-{}-'.format('cmf', 'unittest') + 'apps'
+        self.client = boto3.client("dynamodb",region_name='us-east-1')
+        self.client.create_table(
+            TableName=self.table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "app_id", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "app_id", "AttributeType": "S"},
+              {"AttributeName": "_item_type", "AttributeType": "S"},
+              {"AttributeName": "app_name", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                    {
+                        'IndexName': 'app_name-index',
+                        'KeySchema': [
+                            {'AttributeName': '_item_type', 'KeyType': 'HASH'},
+                            {'AttributeName': 'app_name', 'KeyType': 'RANGE'},
+                        ],
+                        'Projection': {
+                            'ProjectionType': 'ALL'
+                        }
+                    }
+                    ]
+        )
+        for app_id, app_name, wave_id in [('1', 'delta', '1'), ('2', 'alpha', '2'), ('3', 'echo', '1'),
+                                          ('4', 'charlie', '1'), ('5', 'bravo', '2')]:
+            self.client.put_item(
+                   TableName=self.table_name,
+                   Item={'app_id': {'S': app_id}, 'app_name': {'S': app_name}, 'wave_id': {'S': wave_id},
+                         '_item_type': {'S': 'app'}})
+
+        self.schema_table_name = '{}-{}-'.format('cmf', 'unittest') + 'schema'
+        self.schema_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.schema_client.create_table(
+            TableName=self.schema_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+            ],
+        )
+        self.schema_client.put_item(
+              TableName=self.schema_table_name,
+              Item={'schema_name': {'S': 'app'}, 'schema_type': {'S': 'user'},'attributes':{'L':[{'M': {'name': {'S': 'app_id'}, 'type': {'S' : 'string'}}},{'M': {'name': {'S': 'app_name'}, 'type': {'S' : 'string'}}},{'M': {'name': {'S': 'wave_id'}, 'type': {'S' : 'relationship'}}}]}})
+        self.changes_table_name = '{}-{}-'.format('cmf', 'unittest') + 'item-changes'
+        self.client.create_table(
+            TableName=self.changes_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+              {"AttributeName": "change_key", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+              {"AttributeName": "change_key", "AttributeType": "S"},
+            ],
+        )
+        self.names_table_name = '{}-{}-'.format('cmf', 'unittest') + 'names'
+        self.client.create_table(
+            TableName=self.names_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "name_key", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "name_key", "AttributeType": "S"},
+            ],
+        )
+        self.client.put_item(
+               TableName=self.names_table_name,
+               Item={'name_key': {'S': 'app#delta'}, 'item_id': {'S': '1'}, 'reserved': {'N': '0'}})
+        # The app schema cached by other test cases does not include wave_id.
+        if 'schema_cache' in sys.modules:
+            sys.modules['schema_cache'].invalidate()
+
+    def tearDown(self):
+        self.client.delete_table(TableName=self.table_name)
+        self.client.delete_table(TableName=self.changes_table_name)
+        self.client.delete_table(TableName=self.names_table_name)
+        self.schema_client.delete_table(TableName=self.schema_table_name)
+
+    def get_list(self, query_string_parameters):
+        from lambda_functions.lambda_items import lambda_items
+        event = {"httpMethod": 'GET', 'pathParameters': {'schema': 'app'},
+                 'queryStringParameters': query_string_parameters}
+        return lambda_items.lambda_handler(event, '')
+
+    def test_lambda_handler_list_pages(self):
+        log.info("Testing lambda_items GET pages through items in name order")
+        names = []
+        query_string_parameters = {'limit': '2'}
+        while True:
+            result = self.get_list(query_string_parameters)
+            body = json.loads(result['body'])
+            self.assertLessEqual(len(body['items']), 2)
+            names.extend(item['app_name'] for item in body['items'])
+            if 'next_token' not in body:
+                break
+            query_string_parameters = {'limit': '2', 'next_token': body['next_token']}
+        self.assertEqual(names, ['alpha', 'bravo', 'charlie', 'delta', 'echo'])
+
+    def test_lambda_handler_list_filter_projection(self):
+        log.info("Testing lambda_items GET with filter and projection")
+        result = self.get_list({'wave_id': '1', 'attributes': 'app_name'})
+        self.assertEqual(json.loads(result['body']),
+                         [{'app_name': 'charlie'}, {'app_name': 'delta'}, {'app_name': 'echo'}])
+
+    def test_lambda_handler_list_filter_pages(self):
+        log.info("Testing lambda_items GET filtered pages continue after the last item returned")
+        body = json.loads(self.get_list({'wave_id': '1', 'limit': '2'})['body'])
+        self.assertEqual([item['app_name'] for item in body['items']], ['charlie', 'delta'])
+        body = json.loads(self.get_list({'wave_id': '1', 'limit': '2', 'next_token': body['next_token']})['body'])
+        self.assertEqual([item['app_name'] for item in body['items']], ['echo'])
+
+    def test_lambda_handler_list_invalid(self):
+        log.info("Testing lambda_items GET with invalid list parameters")
+        result = self.get_list({'limit': '0', 'next_token': 'invalid', 'unknown': '1'})
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body'])['errors'],
+                         ['limit must be a number between 1 and 1000.', 'next_token is not valid.',
+                          'Filter attribute: unknown is not defined in the app schema.'])
+
+    def delete_items(self, body=None, query_string_parameters=None):
+        from lambda_functions.lambda_items import lambda_items
+        event = {"httpMethod": 'DELETE', 'pathParameters': {'schema': 'app'}, 'body': body,
+                 'queryStringParameters': query_string_parameters}
+        with mock.patch.object(lambda_items, 'MFAuth') as mock_auth:
+            mock_auth.return_value.getUserResourceCreationPolicy.return_value = {'action': 'allow'}
+            return lambda_items.lambda_handler(event, '')
+
+    def test_lambda_handler_delete_ids(self):
+        log.info("Testing lambda_items DELETE by ids reports each id and releases names")
+        result = self.delete_items(json.dumps({'ids': ['1', '2', '9']}))
+        self.assertEqual(json.loads(result['body'])['results'],
+                         [{'id': '1', 'deleted': True}, {'id': '2', 'deleted': True},
+                          {'id': '9', 'errors': ['app Id: 9 does not exist']}])
+        self.assertEqual(self.client.scan(TableName=self.table_name, Select='COUNT')['Count'], 3)
+        self.assertNotIn('Item', self.client.get_item(TableName=self.names_table_name,
+                                                      Key={'name_key': {'S': 'app#delta'}}))
+
+    def test_lambda_handler_delete_filter(self):
+        log.info("Testing lambda_items DELETE by filter deletes only the matching items")
+        result = self.delete_items(query_string_parameters={'wave_id': '1'})
+        self.assertEqual(sorted(result['id'] for result in json.loads(result['body'])['results']), ['1', '3', '4'])
+        self.assertEqual(sorted(item['app_id']['S'] for item in self.client.scan(TableName=self.table_name)['Items']),
+                         ['2', '5'])
+
+    def test_lambda_handler_delete_invalid(self):
+        log.info("Testing lambda_items DELETE requires ids or a filter")
+        result = self.delete_items()
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body'])['errors'],
+                         ['ids or a filter is required to select items to delete.'])
+        result = self.delete_items(json.dumps({'ids': ['1']}), {'wave_id': '1', 'limit': '5'})
+        self.assertEqual(json.loads(result['body'])['errors'],
+                         ['Only attribute filters can be used to select items to delete.',
+                          'ids and filters cannot be combined.'])
+
+    def batch_get(self, body):
+        from lambda_functions.lambda_items import lambda_items
+        event = {"httpMethod": 'POST', 'resource': '/user/{schema}/batchget', 'pathParameters': {'schema': 'app'},
+                 'body': body}
+        return lambda_items.lambda_handler(event, '')
+
+    def test_lambda_handler_batch_get(self):
+        log.info("Testing lambda_items batchget returns items in request order and lists missing ids")
+        result = self.batch_get(json.dumps({'ids': ['4', '9', '1', 4], 'attributes': ['app_name']}))
+        self.assertEqual(json.loads(result['body']),
+                         {'items': [{'app_name': 'charlie'}, {'app_name': 'delta'}], 'missing': ['9']})
+
+    def test_lambda_handler_batch_get_invalid(self):
+        log.info("Testing lambda_items batchget with invalid requests")
+        result = self.batch_get(json.dumps({'ids': []}))
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(json.loads(result['body'])['errors'], ['body must be an object with a non empty list of ids.'])
+        result = self.batch_get(json.dumps({'ids': [str(i) for i in range(5001)], 'attributes': ['unknown']}))
+        self.assertEqual(json.loads(result['body'])['errors'],
+                         ['A maximum of 5000 ids can be requested.',
+                          'Attribute: unknown is not defined in the app schema.'])
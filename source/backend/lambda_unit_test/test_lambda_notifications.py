@@ -0,0 +1,132 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+import unittest
+import json
+import boto3
+import botocore.exceptions
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+
+import schema_versions
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+@mock_dynamodb
+class LambdaNotificationsTest(TestCase):
+
+    def setUp(self):
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(TableName='cmf-unittest-schema-versions', BillingMode='PAY_PER_REQUEST',
+                            KeySchema=[{'AttributeName': 'registry_name', 'KeyType': 'HASH'}],
+                            AttributeDefinitions=[{'AttributeName': 'registry_name', 'AttributeType': 'S'}])
+        schema_versions._table = None
+
+    def get_notifications(self, headers=None):
+        from lambda_functions.lambda_notifications import lambda_notifications
+        return lambda_notifications.lambda_handler({'httpMethod': 'GET', 'headers': headers}, None)
+
+    def test_no_versions(self):
+        log.info("Testing the notifications before the first schema change")
+        response = self.get_notifications()
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['headers']['ETag'], '"0"')
+        self.assertEqual(json.loads(response['body']), {'lastChangeDate': '2020-01-01T00:00:00',
+                                                        'notifications': [{'type': 'schema', 'versions': []}]})
+
+    def test_record_version(self):
+        log.info("Testing every schema write is recorded in the registry")
+        schema_versions.rebuild([{'schema_name': 'server'}, {'schema_name': 'app',
+                                                             'lastModifiedTimestamp': '2022-05-01T10:00:00.000000'}])
+        schema_versions.record_version('script', '2022-06-01T10:00:00.000000')
+        schema_versions.record_version('server', '2022-07-01T10:00:00.000000')
+
+        response = self.get_notifications()
+        self.assertEqual(response['headers']['ETag'], '"3"')
+        self.assertEqual(json.loads(response['body']), {
+            'lastChangeDate': '2022-07-01T10:00:00.000000',
+            'notifications': [{'type': 'schema', 'versions': [
+                {'schema': 'app', 'lastModifiedTimestamp': '2022-05-01T10:00:00.000000'},
+                {'schema': 'script', 'lastModifiedTimestamp': '2022-06-01T10:00:00.000000'},
+                {'schema': 'server', 'lastModifiedTimestamp': '2022-07-01T10:00:00.000000'}]}]})
+
+    def test_record_first_version(self):
+        log.info("Testing the first schema write creates the registry")
+        schema_versions.record_version('wave', '2022-06-01T10:00:00.000000')
+        registry = schema_versions.get_registry()
+        self.assertEqual(registry['versions'], {'wave': '2022-06-01T10:00:00.000000'})
+        self.assertEqual(registry['version'], 1)
+
+    def test_write_schema(self):
+        log.info("Testing schema writes and their versions are recorded in one transaction")
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        client.create_table(TableName='cmf-unittest-schema', BillingMode='PAY_PER_REQUEST',
+                            KeySchema=[{'AttributeName': 'schema_name', 'KeyType': 'HASH'}],
+                            AttributeDefinitions=[{'AttributeName': 'schema_name', 'AttributeType': 'S'}])
+        schema_table = boto3.resource('dynamodb', region_name='us-east-1').Table('cmf-unittest-schema')
+        schema_versions.write_schema(schema_table, 'wave', '2022-06-01T10:00:00.000000', item={
+            'schema_name': 'wave', 'attributes': [], 'lastModifiedTimestamp': '2022-06-01T10:00:00.000000'})
+        schema_versions.write_schema(schema_table, 'wave', '2022-06-02T10:00:00.000000', update={
+            'Key': {'schema_name': 'wave'}, 'UpdateExpression': 'SET lastModifiedTimestamp = :dt',
+            'ExpressionAttributeValues': {':dt': '2022-06-02T10:00:00.000000'}})
+        self.assertEqual(schema_table.get_item(Key={'schema_name': 'wave'})['Item']['lastModifiedTimestamp'],
+                         '2022-06-02T10:00:00.000000')
+        registry = schema_versions.get_registry()
+        self.assertEqual(registry['versions'], {'wave': '2022-06-02T10:00:00.000000'})
+        self.assertEqual(registry['version'], 2)
+
+        # A failed schema write leaves the registry unchanged.
+        with self.assertRaises(botocore.exceptions.ClientError):
+            schema_versions.write_schema(schema_table, 'app', '2022-06-03T10:00:00.000000', update={
+                'Key': {'schema_name': 'app'}, 'UpdateExpression': 'SET lastModifiedTimestamp = :dt',
+                'ConditionExpression': 'attribute_exists(schema_name)',
+                'ExpressionAttributeValues': {':dt': '2022-06-03T10:00:00.000000'}})
+        self.assertEqual(schema_versions.get_registry()['version'], 2)
+
+    def test_if_none_match(self):
+        log.info("Testing unchanged notifications are answered with 304 Not Modified")
+        schema_versions.record_version('wave', '2022-06-01T10:00:00.000000')
+        etag = self.get_notifications()['headers']['ETag']
+
+        response = self.get_notifications({'If-None-Match': etag})
+        self.assertEqual(response['statusCode'], 304)
+        self.assertEqual(response['body'], '')
+        self.assertEqual(self.get_notifications({'if-none-match': 'W/' + etag})['statusCode'], 304)
+
+        schema_versions.record_version('wave', '2022-06-02T10:00:00.000000')
+        response = self.get_notifications({'If-None-Match': etag})
+        self.assertEqual(response['statusCode'], 200)
+        self.assertNotEqual(response['headers']['ETag'], etag)
@@ -0,0 +1,159 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+import unittest
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+
+import permissions
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+def create_table(client, table_name, key):
+    client.create_table(TableName=table_name, BillingMode='PAY_PER_REQUEST',
+                        KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+                        AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}])
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+@mock_dynamodb
+class PermissionsTest(TestCase):
+
+    def setUp(self):
+        client = boto3.client('dynamodb', region_name='us-east-1')
+        create_table(client, 'cmf-unittest-roles', 'role_id')
+        create_table(client, 'cmf-unittest-policies', 'policy_id')
+        create_table(client, 'cmf-unittest-roles-permissions', 'group_name')
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        self.roles_table = dynamodb.Table('cmf-unittest-roles')
+        self.policies_table = dynamodb.Table('cmf-unittest-policies')
+        self.roles_table.put_item(Item={'role_id': '1', 'role_name': 'FactoryAdmin', 'groups': [{'group_name': 'admin'}],
+                                        'policies': [{'policy_id': '1'}]})
+        self.roles_table.put_item(Item={'role_id': '2', 'role_name': 'ReadOnly', 'groups': [{'group_name': 'readonly'}],
+                                        'policies': [{'policy_id': '2'}]})
+        self.policies_table.put_item(Item={'policy_id': '1', 'policy_name': 'Administrator', 'entity_access': [
+            {'schema_name': 'application', 'create': True, 'update': True, 'delete': False,
+             'attributes': [{'attr_name': 'app_name'}, {'attr_name': 'wave_id'}]},
+            {'schema_name': 'server', 'create': False, 'update': True, 'attributes': [{'attr_name': 'server_name'}]}]})
+        self.policies_table.put_item(Item={'policy_id': '2', 'policy_name': 'Delete', 'entity_access': [
+            {'schema_name': 'application', 'delete': True, 'attributes': [{'attr_name': 'app_id'}]}]})
+        permissions.invalidate()
+        permissions._tables.clear()
+
+    def test_get_permissions(self):
+        log.info("Testing permissions are resolved and merged for the groups of a user")
+        for built in [False, True]:
+            if built:
+                permissions.rebuild()
+            resolved = permissions.get_permissions('[admin, readonly]', max_age=0)
+            self.assertEqual(resolved['application'], {'create': True, 'update': True, 'delete': True,
+                                                       'attributes': frozenset(['app_name', 'wave_id', 'app_id'])})
+            self.assertEqual(resolved['server'], {'create': False, 'update': True, 'delete': False,
+                                                  'attributes': frozenset(['server_name'])})
+            self.assertEqual(permissions.get_permissions(['admin'], max_age=0)['application']['delete'], False)
+            self.assertEqual(permissions.get_permissions('superadmin', max_age=0), {})
+
+    def test_rebuild(self):
+        log.info("Testing the permissions table holds one item per group")
+        permissions.rebuild()
+        table = permissions.get_table('roles-permissions')
+        item = table.get_item(Key={'group_name': 'readonly'})['Item']
+        self.assertEqual(item['permissions'], {'application': {'create': False, 'update': False, 'delete': True,
+                                                               'attributes': ['app_id']}})
+        self.assertIn('Item', table.get_item(Key={'group_name': 'admin'}))
+        self.assertIn('Item', table.get_item(Key={'group_name': permissions.version_key}))
+
+    def test_update_role_groups(self):
+        log.info("Testing a role write updates the groups removed from and added to the role")
+        permissions.rebuild()
+        previous_role = self.roles_table.get_item(Key={'role_id': '2'})['Item']
+        role = {**previous_role, 'groups': [{'group_name': 'support'}]}
+        self.roles_table.put_item(Item=role)
+        permissions.update_role_groups(previous_role, role)
+
+        self.assertEqual(permissions.get_permissions('readonly'), {})
+        self.assertTrue(permissions.get_permissions('support')['application']['delete'])
+        self.assertNotIn('Item', permissions.get_table('roles-permissions').get_item(Key={'group_name': 'readonly'}))
+        self.assertEqual(permissions.check_consistency(), {})
+
+    def test_update_policy_groups(self):
+        log.info("Testing a policy write updates the groups of the roles it is assigned to")
+        permissions.rebuild()
+        self.assertFalse(permissions.get_permissions('admin')['server']['delete'])
+        self.policies_table.update_item(Key={'policy_id': '1'}, UpdateExpression='SET entity_access[1].#delete = :t',
+                                        ExpressionAttributeNames={'#delete': 'delete'},
+                                        ExpressionAttributeValues={':t': True})
+        # Permissions are read from the permissions table, not the policies table.
+        self.assertFalse(permissions.get_permissions('admin', max_age=0)['server']['delete'])
+
+        permissions.update_policy_groups('1')
+        self.assertTrue(permissions.get_permissions('admin')['server']['delete'])
+
+    def test_cache(self):
+        log.info("Testing permissions are kept for permissions_cache_ttl seconds")
+        permissions.rebuild()
+        self.assertTrue(permissions.get_permissions('readonly')['application']['delete'])
+        permissions.get_table('roles-permissions').delete_item(Key={'group_name': 'readonly'})
+        self.assertTrue(permissions.get_permissions('readonly')['application']['delete'])
+        self.assertEqual(permissions.get_permissions('readonly', max_age=0), {})
+
+    def test_read_view_unprocessed(self):
+        log.info("Testing unprocessed keys are retried with backoff and the view is skipped after max_attempts")
+        permissions.rebuild()
+        keys = {'cmf-unittest-roles-permissions': {'Keys': [{'group_name': 'readonly'}]}}
+        with mock.patch.object(permissions.boto3, 'resource') as mock_resource, \
+                mock.patch.object(permissions.time, 'sleep') as mock_sleep:
+            mock_resource.return_value.batch_get_item.return_value = {'Responses': {}, 'UnprocessedKeys': keys}
+            self.assertIsNone(permissions.read_view(('readonly',)))
+        self.assertEqual(mock_resource.return_value.batch_get_item.call_count, permissions.max_attempts)
+        self.assertEqual(mock_sleep.call_count, permissions.max_attempts)
+        self.assertTrue(permissions.get_permissions('readonly')['application']['delete'])
+
+    def test_check_consistency(self):
+        log.info("Testing differences between the permissions table and the roles and policies tables are reported")
+        permissions.rebuild()
+        self.assertEqual(permissions.check_consistency(), {})
+
+        self.roles_table.put_item(Item={'role_id': '3', 'role_name': 'Support', 'groups': [{'group_name': 'support'}],
+                                        'policies': [{'policy_id': '2'}]})
+        permissions.get_table('roles-permissions').put_item(Item={'group_name': 'removed', 'permissions': {}})
+        differences = permissions.check_consistency()
+        self.assertEqual(sorted(differences), ['removed', 'support'])
+        self.assertIsNone(differences['support']['stored'])
+        self.assertIsNone(differences['removed']['expected'])
+
+        permissions.rebuild()
+        self.assertEqual(permissions.check_consistency(), {})
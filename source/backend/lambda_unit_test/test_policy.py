@@ -0,0 +1,106 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+import unittest
+import logging
+import os
+import time
+from unittest import TestCase, mock
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+
+import policy
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+method_arn = 'arn:aws:execute-api:us-east-1:111122223333:abcdef1234/prod/GET/admin/users'
+
+
+def get_claims(groups, exp=None):
+    return {'sub': 'user-' + '-'.join(groups), 'token_use': 'id', 'email': 'user@example.com',
+            'cognito:groups': groups, 'exp': exp if exp is not None else int(time.time()) + 3600}
+
+
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest', 'userpool': 'us-east-1_pool', 'clientid': 'client'})
+class AdminResourcePolicyTest(TestCase):
+
+    def setUp(self):
+        policy._claims_cache.clear()
+        self.tokens = {'admin-token': get_claims(['admin']), 'read-token': get_claims(['readonly']),
+                       'notadmin-token': get_claims(['readonly', 'notadmin']),
+                       'expired-token': get_claims(['admin'], exp=int(time.time()) - 1)}
+        patcher = mock.patch.object(policy.MFAuth, 'get_claims',
+                                    side_effect=lambda region, userpool, token, audience=None: self.tokens[token])
+        self.get_claims = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_policy(self, token, arn=method_arn):
+        return policy.MFAuth().getAdminResourcePolicy({'authorizationToken': token, 'methodArn': arn})
+
+    def test_claims_cache(self):
+        log.info("Testing verified claims are cached by token until they expire")
+        for _ in range(3):
+            self.get_policy('admin-token')
+        self.assertEqual(self.get_claims.call_count, 1)
+
+        for _ in range(3):
+            self.get_policy('expired-token')
+        self.assertEqual(self.get_claims.call_count, 4)
+
+    def test_claims_cache_size(self):
+        log.info("Testing the least recently used claims are evicted")
+        with mock.patch.object(policy, 'claims_cache_size', 1):
+            self.get_policy('admin-token')
+            self.get_policy('read-token')
+            self.get_policy('read-token')
+            self.get_policy('admin-token')
+        self.assertEqual(self.get_claims.call_count, 3)
+        self.assertEqual(len(policy._claims_cache), 1)
+
+    def test_method_policy(self):
+        log.info("Testing the policy allows only the requested method by default")
+        statements = self.get_policy('admin-token')['policyDocument']['Statement']
+        self.assertEqual(statements, [{'Action': 'execute-api:Invoke', 'Effect': 'Allow', 'Resource': [method_arn]}])
+
+        statements = self.get_policy('read-token')['policyDocument']['Statement']
+        self.assertEqual(statements[0]['Effect'], 'Deny')
+
+    @mock.patch.dict(os.environ, {'wildcard_policy': 'true'})
+    def test_wildcard_policy(self):
+        log.info("Testing the wildcard policy allows all methods of the requested API resource")
+        statements = self.get_policy('admin-token')['policyDocument']['Statement']
+        prefix = 'arn:aws:execute-api:us-east-1:111122223333:abcdef1234/prod/*/'
+        self.assertEqual(statements, [{'Action': 'execute-api:Invoke', 'Effect': 'Allow',
+                                       'Resource': [prefix + 'admin', prefix + 'admin/*']}])
+
+        for token in ['read-token', 'notadmin-token']:
+            statements = self.get_policy(token)['policyDocument']['Statement']
+            self.assertEqual(statements, [{'Action': 'execute-api:Invoke', 'Effect': 'Deny',
+                                           'Resource': ['arn:aws:execute-api:us-east-1:111122223333:abcdef1234/prod/*/*']}])
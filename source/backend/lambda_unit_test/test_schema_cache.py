@@ -0,0 +1,110 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+
+
+import boto3
+import logging
+import os
+from unittest import TestCase, mock
+from moto import mock_dynamodb
+
+
+# This is to get around the relative path import issue.
+# Absolute paths are being used in this file after setting the root directory
+import sys
+from pathlib import Path
+file = Path(__file__).resolve()
+package_root_directory = file.parents [1]
+sys.path.append(str(package_root_directory))
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_policy/python/')
+sys.path.append(str(package_root_directory)+'/lambda_layers/lambda_layer_items/python/')
+
+
+# Set log level
+loglevel = logging.INFO
+logging.basicConfig(level=loglevel)
+log = logging.getLogger(__name__)
+
+
+# Setting the default AWS region environment variable required by the Python SDK boto3
+@mock.patch.dict(os.environ, {'AWS_DEFAULT_REGION': 'us-east-1','region':'us-east-1', 'application': 'cmf', 'environment': 'unittest'})
+
+@mock_dynamodb
+class SchemaCacheTest(TestCase):
+    def setUp(self):
+        boto3.setup_default_session()
+        self.schema_table_name = '{}-{}-'.format('cmf', 'unittest') + 'schema'
+        self.schema_client = boto3.client("dynamodb",region_name='us-east-1')
+        self.schema_client.create_table(
+            TableName=self.schema_table_name,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+              {"AttributeName": "schema_name", "KeyType": "HASH"},
+            ],
+            AttributeDefinitions=[
+              {"AttributeName": "schema_name", "AttributeType": "S"},
+            ],
+        )
+        self.put_schema('2022-01-01T00:00:00.000000', 'app_name')
+        self.clear_cache()
+
+    def tearDown(self):
+        self.clear_cache()
+        self.schema_client.delete_table(TableName=self.schema_table_name)
+
+    def clear_cache(self):
+        # Schemas cached by other test modules would otherwise be returned while within the ttl.
+        if 'schema_cache' in sys.modules:
+            sys.modules['schema_cache'].invalidate()
+
+    @property
+    def schema_cache(self):
+        import schema_cache
+        return schema_cache
+
+    def put_schema(self, timestamp, attribute_name):
+        self.schema_client.put_item(
+              TableName=self.schema_table_name,
+              Item={'schema_name': {'S': 'app'}, 'schema_type': {'S': 'user'}, 'lastModifiedTimestamp': {'S': timestamp},
+                    'attributes':{'L':[{'M': {'name': {'S': attribute_name}, 'type': {'S' : 'string'}}}]}})
+
+    def test_get_schema_cached(self):
+        log.info("Testing schema is served from cache while within ttl")
+        schema = self.schema_cache.get_schema('app')
+        self.assertEqual(schema['attributes'][0]['name'], 'app_name')
+
+        with mock.patch.object(self.schema_cache.get_schema_table(), 'get_item') as get_item:
+            self.assertIs(self.schema_cache.get_schema('app', max_age=60), schema)
+            get_item.assert_not_called()
+
+    def test_get_schema_reload_on_new_version(self):
+        log.info("Testing schema is reloaded when lastModifiedTimestamp changes")
+        self.schema_cache.get_schema('app')
+        self.put_schema('2022-01-02T00:00:00.000000', 'app_owner')
+        schema = self.schema_cache.get_schema('app', max_age=0)
+        self.assertEqual(schema['attributes'][0]['name'], 'app_owner')
+
+    def test_get_schema_unchanged_version(self):
+        log.info("Testing expired schema is kept when lastModifiedTimestamp is unchanged")
+        schema = self.schema_cache.get_schema('app')
+        self.assertIs(self.schema_cache.get_schema('app', max_age=0), schema)
+
+    def test_get_schema_not_found(self):
+        log.info("Testing missing schema returns None")
+        self.assertIsNone(self.schema_cache.get_schema('unknown'))
@@ -0,0 +1,69 @@
+#########################################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.                    #
+# SPDX-License-Identifier: MIT-0                                                        #
+#                                                                                       #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this  #
+# software and associated documentation files (the "Software"), to deal in the Software #
+# without restriction, including without limitation the rights to use, copy, modify,    #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to    #
+# permit persons to whom the Software is furnished to do so.                            #
+#                                                                                       #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,   #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A         #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT    #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION     #
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE        #
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                #
+#########################################################################################
+
+# Compares the permissions table of a deployment with the permissions recomputed from its roles and policies tables
+# and prints the groups that differ. With --repair the permissions table is rebuilt when differences are found.
+# Uses the default AWS credentials, which need read access to the roles, policies and permissions tables, and write
+# access to the permissions table for --repair.
+#
+# Usage: python tools/check_permissions.py <application> <environment> [--region us-east-1] [--repair]
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+package_root_directory = Path(__file__).resolve().parents[1]
+sys.path.append(str(package_root_directory) + '/lambda_layers/lambda_layer_policy/python/')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the permissions table against the roles and policies.')
+    parser.add_argument('application')
+    parser.add_argument('environment')
+    parser.add_argument('--region')
+    parser.add_argument('--repair', action='store_true', help='rebuild the permissions table if it differs')
+    args = parser.parse_args()
+
+    os.environ['application'] = args.application
+    os.environ['environment'] = args.environment
+    if args.region:
+        os.environ['AWS_DEFAULT_REGION'] = args.region
+
+    import permissions
+
+    differences = permissions.check_consistency()
+    if not differences:
+        print('The permissions table is consistent with the roles and policies.')
+        return 0
+
+    for group_name in sorted(differences):
+        print('Group: ' + group_name)
+        print('  stored:   ' + json.dumps(differences[group_name]['stored'], sort_keys=True, default=str))
+        print('  expected: ' + json.dumps(differences[group_name]['expected'], sort_keys=True, default=str))
+
+    if args.repair:
+        permissions.rebuild()
+        print('Rebuilt the permissions table of {} group(s).'.format(len(differences)))
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -63,7 +63,8 @@ export default class Tools {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("tools", "/ssm/jobs", options);
@@ -83,7 +84,8 @@ export default class Tools {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("tools", "/ssm/scripts", options);
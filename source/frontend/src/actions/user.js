@@ -19,7 +19,8 @@ export default class User {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("user", "/user/app", options);
@@ -29,7 +30,8 @@ export default class User {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("user", "/user/wave", options);
@@ -61,7 +63,8 @@ export default class User {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("user", "/user/server", options);
@@ -81,7 +84,8 @@ export default class User {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("user", "/user/database", options);
@@ -306,7 +310,8 @@ export default class User {
     const token = this.session.idToken.jwtToken;
     const options = {
       headers: {
-        Authorization: token
+        Authorization: token,
+        Accept: "application/vnd.cmf.compressed+json"
       }
     };
     return API.get("user", "/user/" + lSchema, options);
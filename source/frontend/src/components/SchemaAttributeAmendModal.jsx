@@ -403,6 +403,23 @@ const SchemaAttributeAmendModal = React.memo(({ children, closeModal , confirmAc
             null
           }
 
+          {localAttr.type === 'relationship' && !localAttr.listMultiSelect ?
+            <FormField
+              label="Indexed"
+              description="Index records by this attribute, the index is added on the next deployment of the solution."
+            >
+              <Checkbox
+                onChange={event => handleUserInput({field: 'indexed', value: event.detail.checked})}
+                checked={localAttr.indexed ? true : false}
+                disabled={localAttr.system ? true : false}
+              >
+                {'Filter records by this attribute using an index'}
+              </Checkbox>
+            </FormField>
+            :
+            null
+          }
+
              <FormField
                label="Required"
                description=""